@@ -1,5 +1,15 @@
-from django.contrib import admin
-from .models import Quiz, Question, Option, QuizAttempt
+import io
+
+from django import forms
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from . import bank
+from .models import Quiz, Question, Option, QuizAttempt, LeaderboardScore, UserStats, OutboundEmail
 
 # Register your models here.
 
@@ -11,15 +21,118 @@ class OptionInline(admin.TabularInline):
 
 class QuestionAdmin(admin.ModelAdmin):
     inlines = [OptionInline]
+    # Item analysis (see api/analysis.py)
+    list_display = ('__str__', 'responses', 'difficulty', 'discrimination')
+    readonly_fields = ('responses', 'difficulty', 'discrimination', 'option_pick_rates')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('quiz', 'item_stats')
+
+    def _stats(self, obj):
+        return getattr(obj, 'item_stats', None)
+
+    @admin.display(description='Responses')
+    def responses(self, obj):
+        stats = self._stats(obj)
+        return stats.responses if stats else 0
+
+    @admin.display(description='Difficulty (p)')
+    def difficulty(self, obj):
+        stats = self._stats(obj)
+        return _fmt(stats.difficulty if stats else None)
+
+    @admin.display(description='Discrimination')
+    def discrimination(self, obj):
+        stats = self._stats(obj)
+        return _fmt(stats.discrimination if stats else None)
+
+    @admin.display(description='Option pick rates')
+    def option_pick_rates(self, obj):
+        stats = self._stats(obj)
+        responses = stats.responses if stats else 0
+        options = obj.options.select_related('item_stats').order_by('id')
+        return ", ".join(
+            f"{option.text}: {_fmt(option.item_stats.picks / responses if responses and hasattr(option, 'item_stats') else None)}"
+            for option in options
+        )
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.2f}"
 
 class QuestionInline(admin.TabularInline):
     model = Question
     show_change_link = True
 
+class QuestionBankImportForm(forms.Form):
+    file = forms.FileField()
+    format = forms.ChoiceField(choices=[('jsonl', 'JSONL'), ('csv', 'CSV')])
+    upsert = forms.BooleanField(required=False, help_text="Update rows whose external id already exists.")
+
+
 class QuizAdmin(admin.ModelAdmin):
     inlines = [QuestionInline]
+    list_display = ('title', 'difficulty', 'sample_size', 'shuffle_options')
+    change_list_template = 'admin/api/quiz/change_list.html'
+    actions = ['export_jsonl', 'export_csv']
+
+    # --- Question bank import / export (see api/bank.py) ---
+    def get_urls(self):
+        return [
+            path('import-bank/', self.admin_site.admin_view(self.import_bank_view), name='api_quiz_import_bank'),
+        ] + super().get_urls()
+
+    def import_bank_view(self, request):
+        # Creates questions and options, not just quizzes; upsert rewrites existing ones
+        if not request.user.has_perms(['api.add_quiz', 'api.add_question']):
+            raise PermissionDenied
+        form = QuestionBankImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            if form.cleaned_data['upsert'] and not request.user.has_perms(['api.change_quiz', 'api.change_question']):
+                raise PermissionDenied
+            lines = io.TextIOWrapper(form.cleaned_data['file'].file, encoding='utf-8', newline='')
+            report = bank.import_bank(lines, fmt=form.cleaned_data['format'], upsert=form.cleaned_data['upsert'])
+            for error in report.errors:
+                self.message_user(request, error, messages.WARNING)
+            self.message_user(request, report.summary(), messages.SUCCESS)
+            return redirect('admin:api_quiz_changelist')
+        context = {**self.admin_site.each_context(request), 'opts': self.model._meta,
+                   'form': form, 'title': 'Import question bank'}
+        return TemplateResponse(request, 'admin/api/quiz/import_bank.html', context)
+
+    def _export(self, queryset, fmt, content_type):
+        lines = bank.EXPORTERS[fmt](quiz_ids=list(queryset.values_list('id', flat=True)))
+        response = StreamingHttpResponse(lines, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="quiz-bank.{fmt}"'
+        return response
+
+    @admin.action(description="Export selected quizzes (JSONL)")
+    def export_jsonl(self, request, queryset):
+        return self._export(queryset, 'jsonl', 'application/jsonl')
+
+    @admin.action(description="Export selected quizzes (CSV)")
+    def export_csv(self, request, queryset):
+        return self._export(queryset, 'csv', 'text/csv')
 
 admin.site.register(Quiz, QuizAdmin)
 admin.site.register(Question, QuestionAdmin)
 admin.site.register(Option)
-admin.site.register(QuizAttempt)
\ No newline at end of file
+admin.site.register(QuizAttempt)
+
+class LeaderboardScoreAdmin(admin.ModelAdmin):
+    list_display = ('board', 'user', 'score')
+    list_filter = ('board',)
+    raw_id_fields = ('user',)
+
+admin.site.register(LeaderboardScore, LeaderboardScoreAdmin)
+
+class UserStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'attempt_count', 'passed_count')
+    raw_id_fields = ('user',)
+
+admin.site.register(UserStats, UserStatsAdmin)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('email', 'kind', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('email',)
+
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
@@ -0,0 +1,254 @@
+"""
+Item analysis.
+
+Submissions write one AttemptAnswer row per question (single bulk insert).
+`python manage.py update_item_analysis` then folds new answers into
+QuestionStats / OptionStats in batches, starting from a watermark (the last
+AttemptAnswer id it consumed), so the job never rescans old answers and the
+submit path only pays for the insert.
+
+Ids are handed out before commit, so a lower id can still be invisible in
+an open transaction when a higher one is read. The job therefore stops at
+the first answer whose attempt was inserted less than SETTLE_SECONDS ago
+(QuizAttempt.inserted_at, the server's clock at write time - completed_at
+can be a client or outbox timestamp far in the past). Anything below it was
+written long enough ago that its transaction has finished.
+
+Per question we keep running sums, which is enough for:
+    difficulty      - share of correct responses
+    discrimination  - point-biserial correlation with the attempt percentage
+    pick rate       - OptionStats.picks / QuestionStats.responses
+
+Deleting answers that were already folded in (with their attempt, or their
+user's account) takes them back out of the sums - see forget_answers().
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Question, Option, AttemptAnswer, QuestionStats, OptionStats, AnalysisWatermark
+
+
+WATERMARK = 'item_analysis'
+BATCH_SIZE = 5000
+# Answers inserted more recently than this may still have an uncommitted
+# neighbour with a lower id; leave them for the next run so none are skipped.
+SETTLE_SECONDS = 60
+
+
+def answer_rows(attempt, review_data):
+    """AttemptAnswer rows for a graded attempt (see grading.grade)."""
+    rows = []
+    for item in review_data:
+        selected = item["user_selected_id"]
+        # Only keep option ids that really belong to this question
+        if selected is not None and not any(option["id"] == selected for option in item["options"]):
+            selected = None
+        rows.append(AttemptAnswer(
+            attempt=attempt,
+            question_id=item["question_id"],
+            option_id=selected,
+            is_correct=item["is_correct"],
+        ))
+    return rows
+
+
+class _QuestionDelta:
+    __slots__ = ('responses', 'correct', 'score_sum', 'score_sq_sum', 'correct_score_sum')
+
+    def __init__(self):
+        self.responses = 0
+        self.correct = 0
+        self.score_sum = 0.0
+        self.score_sq_sum = 0.0
+        self.correct_score_sum = 0.0
+
+    def add(self, is_correct, score):
+        self.responses += 1
+        self.score_sum += score
+        self.score_sq_sum += score * score
+        if is_correct:
+            self.correct += 1
+            self.correct_score_sum += score
+
+
+def run_batch(batch_size=BATCH_SIZE, settle_seconds=SETTLE_SECONDS):
+    """Consume the next batch of answers. Returns how many were processed."""
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+
+    with transaction.atomic():
+        watermark, _ = AnalysisWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+        rows = (
+            AttemptAnswer.objects
+            .filter(id__gt=watermark.position)
+            .order_by('id')
+            .values_list('id', 'question_id', 'option_id', 'is_correct',
+                         'attempt__percentage', 'attempt__inserted_at')
+            [:batch_size]
+        )
+
+        questions = defaultdict(_QuestionDelta)
+        picks = defaultdict(int)
+        last_id = None
+        for answer_id, question_id, option_id, is_correct, score, inserted_at in rows:
+            if inserted_at > cutoff:
+                break
+            questions[question_id].add(is_correct, score)
+            if option_id is not None:
+                picks[option_id] += 1
+            last_id = answer_id
+
+        if last_id is None:
+            return 0
+
+        _apply(QuestionStats, 'question_id', {
+            question_id: dict(
+                responses=F('responses') + delta.responses,
+                correct_count=F('correct_count') + delta.correct,
+                score_sum=F('score_sum') + delta.score_sum,
+                score_sq_sum=F('score_sq_sum') + delta.score_sq_sum,
+                correct_score_sum=F('correct_score_sum') + delta.correct_score_sum,
+            )
+            for question_id, delta in questions.items()
+        })
+        _apply(OptionStats, 'option_id', {
+            option_id: dict(picks=F('picks') + count)
+            for option_id, count in picks.items()
+        })
+
+        processed = sum(delta.responses for delta in questions.values())
+        watermark.position = last_id
+        watermark.save(update_fields=['position'])
+    return processed
+
+
+def _apply(model, key_field, updates):
+    # Make sure every row exists, then bump the counters in place
+    model.objects.bulk_create(
+        [model(**{key_field: key}) for key in updates],
+        ignore_conflicts=True,
+    )
+    for key, fields in updates.items():
+        model.objects.filter(**{key_field: key}).update(**fields)
+
+
+def run(batch_size=BATCH_SIZE, settle_seconds=SETTLE_SECONDS):
+    """Drain everything that has settled. Returns the number of answers processed."""
+    total = 0
+    while True:
+        processed = run_batch(batch_size, settle_seconds)
+        if not processed:
+            return total
+        total += processed
+
+
+def rebuild(settle_seconds=SETTLE_SECONDS):
+    """Forget all stats and recompute them from scratch."""
+    with transaction.atomic():
+        QuestionStats.objects.all().delete()
+        OptionStats.objects.all().delete()
+        AnalysisWatermark.objects.filter(name=WATERMARK).delete()
+    return run(settle_seconds=settle_seconds)
+
+
+def forget_answers(answers):
+    """
+    Subtract answers that are about to be deleted from the item stats.
+    Only the ones below the watermark were ever counted; each side is one
+    aggregate read and one bulk update, however many answers go.
+    """
+    with transaction.atomic(savepoint=False):
+        watermark = AnalysisWatermark.objects.select_for_update().filter(name=WATERMARK).first()
+        if watermark is None:
+            return
+        consumed = answers.filter(id__lte=watermark.position).order_by()
+        score = F('attempt__percentage')
+        questions = {
+            row['question_id']: row
+            for row in consumed.values('question_id').annotate(
+                responses=Count('id'),
+                correct=Count('id', filter=Q(is_correct=True)),
+                score_sum=Sum(score),
+                score_sq_sum=Sum(score * score),
+                correct_score_sum=Sum(score, filter=Q(is_correct=True)),
+            )
+        }
+        picks = dict(
+            consumed.exclude(option_id=None)
+            .values('option_id').annotate(picks=Count('id'))
+            .values_list('option_id', 'picks')
+        )
+
+        rows = list(QuestionStats.objects.select_for_update().filter(question_id__in=questions))
+        for item in rows:
+            delta = questions[item.question_id]
+            item.responses -= delta['responses']
+            item.correct_count -= delta['correct']
+            item.score_sum -= delta['score_sum'] or 0
+            item.score_sq_sum -= delta['score_sq_sum'] or 0
+            item.correct_score_sum -= delta['correct_score_sum'] or 0
+        QuestionStats.objects.bulk_update(
+            rows, ['responses', 'correct_count', 'score_sum', 'score_sq_sum', 'correct_score_sum'],
+        )
+
+        rows = list(OptionStats.objects.select_for_update().filter(option_id__in=picks))
+        for item in rows:
+            item.picks -= picks[item.option_id]
+        OptionStats.objects.bulk_update(rows, ['picks'])
+
+
+@receiver(pre_delete, sender=User)
+def _forget_user_answers(sender, instance, **kwargs):
+    # Their attempts and answers go with the account (CASCADE)
+    forget_answers(AttemptAnswer.objects.filter(attempt__user=instance))
+
+
+def quiz_report(quiz_id):
+    """Per-question item stats for one quiz (used by the analysis endpoint)."""
+    questions = list(
+        Question.objects
+        .filter(quiz_id=quiz_id)
+        .select_related('item_stats')
+        .order_by('id')
+    )
+    options = defaultdict(list)
+    for option in (
+        Option.objects
+        .filter(question__quiz_id=quiz_id)
+        .select_related('item_stats')
+        .order_by('id')
+    ):
+        options[option.question_id].append(option)
+
+    report = []
+    for question in questions:
+        item = getattr(question, 'item_stats', None)
+        responses = item.responses if item else 0
+        report.append({
+            "question_id": question.id,
+            "question_text": question.text,
+            "responses": responses,
+            "difficulty": item.difficulty if item else None,
+            "discrimination": item.discrimination if item else None,
+            "options": [
+                {
+                    "id": option.id,
+                    "text": option.text,
+                    "is_correct": option.is_correct,
+                    "pick_rate": _picks(option) / responses if responses else None,
+                }
+                for option in options[question.id]
+            ],
+        })
+    return report
+
+
+def _picks(option):
+    item = getattr(option, 'item_stats', None)
+    return item.picks if item else 0
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        # Register cache-invalidation / search-index / leaderboard / stats signal handlers
+        from . import analysis, authentication, content, leaderboard, search, stats  # noqa: F401
@@ -0,0 +1,208 @@
+"""
+Async read endpoints (ASGI only).
+
+Native-async versions of the read-heavy views, so an ASGI worker can keep
+hundreds of requests in flight while they wait on Postgres instead of
+parking a whole sync worker per request. They are routed in place of the
+sync views when settings.ASYNC_READ_VIEWS is on (see api/urls.py and
+quiz_backend/asgi.py); payloads are identical to the DRF views.
+
+Anything the async path doesn't implement (writes, cursor-paginated
+pages) is handed to the sync DRF view on a worker thread; the quiz list and
+the history are paginated by default, so only their legacy ?all=1 full
+lists are served here.
+"""
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError
+from django.db.models import Count
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status # pyright: ignore[reportMissingImports]
+
+from . import avatars, ingest, leaderboard, renderers, routing, sampling, stats, views
+from .content import aget_cached_catalog_page, aget_cached_payload, aget_content_version, content_etag, etag_matches
+from .grading import get_answer_key
+from .models import Quiz, QuizAttempt, UserProfile, UserStats
+from .pagination import HistoryCursorPagination, QuizCursorPagination
+
+
+def _json(data, status=status.HTTP_200_OK, **kwargs):
+    # Same renderer as the DRF views (api/renderers.py), so the bytes match the sync views
+    return HttpResponse(renderers.render(data), status=status, content_type='application/json', **kwargs)
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of APIView: authenticates with the configured
+    DRF authentication classes (JWT), requires a logged-in user and falls
+    back to `sync_view` for methods / requests it doesn't handle.
+    """
+    sync_view = None
+    replica_reads = True # see api/routing.py; every view here is a read
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if handler is None or self.use_sync(request):
+            return await sync_to_async(self.sync_view.as_view())(request, *args, **kwargs)
+
+        try:
+            request.user = await sync_to_async(self.authenticate)(request)
+        except exceptions.APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+            return _json(detail, status=exc.status_code, headers=self.authenticate_headers(request))
+        if request.user is None:
+            return _json({"detail": exceptions.NotAuthenticated.default_detail},
+                         status=status.HTTP_401_UNAUTHORIZED,
+                         headers=self.authenticate_headers(request))
+        if not self.replica_reads:
+            return await handler(request, *args, **kwargs)
+
+        await routing.aroute_reads(request.user)
+        try:
+            return await handler(request, *args, **kwargs)
+        except DatabaseError as exc:
+            if not routing.replica_failed(exc):
+                raise
+            return await handler(request, *args, **kwargs)
+
+    def use_sync(self, request):
+        return False
+
+    def authenticate(self, request):
+        # Same authenticators as the sync view (stateless for read-only endpoints)
+        for authenticator in self.sync_view.authentication_classes:
+            result = authenticator().authenticate(request)
+            if result is not None:
+                return result[0]
+        return None
+
+    def authenticate_headers(self, request):
+        authenticators = self.sync_view.authentication_classes
+        if not authenticators:
+            return {}
+        return {'WWW-Authenticate': authenticators[0]().authenticate_header(request)}
+
+
+# 1. List All Quizzes
+class AsyncQuizListView(AsyncAPIView):
+    sync_view = views.QuizListView
+
+    def use_sync(self, request):
+        return not QuizCursorPagination().wants_full_list(request.GET)
+
+    async def get(self, request):
+        difficulty = request.GET.get('difficulty')
+
+        async def build():
+            quizzes = (
+                Quiz.objects
+                .annotate(questions_count=Count('questions'))
+                .order_by('created_at', 'id')
+                .values('id', 'title', 'description', 'time_minutes', 'difficulty', 'questions_count')
+            )
+            if difficulty:
+                quizzes = quizzes.filter(difficulty=difficulty)
+            return [quiz async for quiz in quizzes]
+
+        return _json(await aget_cached_catalog_page(request.build_absolute_uri(), build))
+
+
+# 2. Get Single Quiz Details
+class AsyncQuizDetailView(AsyncAPIView):
+    sync_view = views.QuizDetailView
+
+    async def get(self, request, pk):
+        etag = content_etag(pk, await aget_content_version(pk))
+        if etag_matches(etag, request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
+
+        # Answer key -> payload (see QuizDetailView); a local LRU hit once warm
+        answer_key = await sync_to_async(get_answer_key)(pk)
+        if answer_key is None:
+            return _json({"detail": "No Quiz matches the given query."}, status=status.HTTP_404_NOT_FOUND)
+        if answer_key.randomized:
+            data = sampling.detail_payload(answer_key, seed=sampling.new_seed())
+            return _json(data, headers={'Cache-Control': 'private, no-store'})
+
+        async def build():
+            return sampling.detail_payload(answer_key)
+
+        etag, data = await aget_cached_payload('detail', pk, build)
+        return _json(data, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
+
+
+class AsyncLeaderboardView(AsyncAPIView):
+    sync_view = views.LeaderboardView
+
+    async def get(self, request):
+        try:
+            board = leaderboard.resolve_board(request.GET)
+        except ValueError:
+            return _json({"error": "Invalid quiz id"}, status=status.HTTP_400_BAD_REQUEST)
+        return _json(await leaderboard.atop(board, limit=10))
+
+
+class AsyncLeaderboardRankView(AsyncAPIView):
+    sync_view = views.LeaderboardRankView
+
+    async def get(self, request):
+        try:
+            board = leaderboard.resolve_board(request.GET)
+        except ValueError:
+            return _json({"error": "Invalid quiz id"}, status=status.HTTP_400_BAD_REQUEST)
+        return _json(await leaderboard.arank_of(board, request.user))
+
+
+class AsyncUserHistoryView(AsyncAPIView):
+    sync_view = views.UserHistoryView
+
+    def use_sync(self, request):
+        # Pages (the default) and the outbox read-your-writes merge stay on the sync view
+        return not HistoryCursorPagination().wants_full_list(request.GET) or ingest.outbox_enabled()
+
+    async def get(self, request):
+        attempts = (
+            QuizAttempt.objects
+            .filter(user=request.user)
+            .order_by('-completed_at', '-id')
+            .values('id', 'quiz__title', 'score', 'total_questions', 'percentage', 'completed_at')
+        )
+        return _json([
+            {
+                "id": attempt['id'],
+                "quiz_title": attempt['quiz__title'],
+                "score": attempt['score'],
+                "total_questions": attempt['total_questions'],
+                "percentage": round(attempt['percentage']),
+                "date": attempt['completed_at'],
+                "status": "Passed" if attempt['percentage'] >= stats.PASS_PERCENTAGE else "Failed"
+            }
+            async for attempt in attempts
+        ])
+
+
+class AsyncUserStatsView(AsyncAPIView):
+    sync_view = views.UserStatsView
+
+    async def get(self, request):
+        user_stats = await UserStats.objects.filter(user=request.user).afirst()
+        return _json(stats.as_dict(user_stats))
+
+
+class AsyncAvatarView(AsyncAPIView):
+    # PATCH (upload) stays on the sync view
+    sync_view = views.AvatarUpdateView
+    replica_reads = False # the sync view isn't routed either
+
+    async def get(self, request):
+        profile = (
+            await UserProfile.objects
+            .filter(user=request.user)
+            .values('avatar', 'avatar_hash', 'avatar_state')
+            .afirst()
+        ) or {'avatar': None, 'avatar_hash': '', 'avatar_state': UserProfile.READY}
+        return _json(avatars.payload(
+            profile['avatar'], profile['avatar_hash'], request.build_absolute_uri, profile['avatar_state'],
+        ))
@@ -0,0 +1,195 @@
+"""
+JWT authentication without a User query per request.
+
+CachedJWTAuthentication resolves the token's user from an in-process LRU,
+then from Django's cache, and only then from the database. Entries are keyed
+by a per-user version token that is bumped whenever the User row is saved
+or deleted (password changes included), the same scheme api/content.py uses
+for quiz content.
+
+Entries in the in-process LRU are trusted without any lookup for
+LOCAL_CACHE_SECONDS; after that the version token is read again, and a bumped
+version fetches the versioned row (from the shared cache when another process
+already has it). queryset.update() skips the signal that bumps the version,
+so the row itself is also compared with the database, every
+USER_RECHECK_SECONDS with a shared cache (Redis) and every LOCAL_CACHE_SECONDS
+without one, where a bump made by another worker process never arrives; a
+changed row (deactivated, new password, ...) bumps the version. A user
+disabled through save() loses access within LOCAL_CACHE_SECONDS, one disabled
+with update() within the recheck interval.
+
+StatelessJWTAuthentication goes one step further for read-only endpoints:
+with settings.JWT_STATELESS_READS on, the user is built from the token claims
+(id, username, email) and nothing is looked up at all. The trade-off is that
+a deactivated/deleted user keeps read access until their access token
+expires. It is only honoured with a shared cache (the `api.E001` check fails
+otherwise); without one it behaves like CachedJWTAuthentication.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.checks import Error, Tags, register
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication # pyright: ignore[reportMissingImports]
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken # pyright: ignore[reportMissingImports]
+from rest_framework_simplejwt.settings import api_settings # pyright: ignore[reportMissingImports]
+from rest_framework_simplejwt.utils import get_md5_hash_password # pyright: ignore[reportMissingImports]
+
+from .content import _get_version, cache_is_shared, version_timeout
+
+
+USER_VERSION_KEY = 'auth-user:{user_id}:version'
+USER_ROW_KEY = 'auth-user:{user_id}:{version}'
+USER_ROW_TIMEOUT = 60 * 60
+LOCAL_CACHE_SIZE = 1024
+LOCAL_CACHE_SECONDS = 5
+USER_RECHECK_SECONDS = 5 * 60
+
+_FIELDS = [field.attname for field in User._meta.concrete_fields]
+
+# user_id -> (version, row values, time.monotonic() the version was last checked, ... the row was last read)
+_local_users = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _drop_local(user_id):
+    with _local_lock:
+        _local_users.pop(user_id, None)
+
+
+def get_user_version(user_id):
+    return _get_version(USER_VERSION_KEY.format(user_id=user_id))
+
+
+def bump_user_version(user_id):
+    cache.set(USER_VERSION_KEY.format(user_id=user_id), time.time_ns(), timeout=version_timeout())
+    _drop_local(user_id) # this process sees the change at once, others within LOCAL_CACHE_SECONDS
+
+
+def _read_user(user_id):
+    return User.objects.filter(pk=user_id).values_list(*_FIELDS).first()
+
+
+def _store_local(user_id, version, values, checked, read):
+    with _local_lock:
+        _local_users[user_id] = (version, values, checked, read)
+        _local_users.move_to_end(user_id)
+        while len(_local_users) > LOCAL_CACHE_SIZE:
+            _local_users.popitem(last=False)
+
+
+def get_cached_user(user_id):
+    """Fresh User instance for `user_id` (or None), served from cache when possible."""
+    now = time.monotonic()
+    with _local_lock:
+        entry = _local_users.get(user_id)
+        if entry is not None:
+            _local_users.move_to_end(user_id)
+
+    if entry is not None and now - entry[2] < LOCAL_CACHE_SECONDS:
+        values = entry[1]
+    else:
+        version = get_user_version(user_id)
+        if entry is not None and entry[0] == version:
+            values, read = entry[1], entry[3]
+        else:
+            key = USER_ROW_KEY.format(user_id=user_id, version=version)
+            values = cache.get(key)
+            if values is None:
+                values = _read_user(user_id)
+                if values is None:
+                    _drop_local(user_id)
+                    return None
+                cache.set(key, values, timeout=USER_ROW_TIMEOUT)
+            read = now
+
+        if now - read >= (USER_RECHECK_SECONDS if cache_is_shared() else LOCAL_CACHE_SECONDS):
+            # Check the row itself, in case it changed without bumping the version
+            current = _read_user(user_id)
+            if current != values:
+                bump_user_version(user_id)
+                if current is None:
+                    return None
+                version = get_user_version(user_id)
+                cache.set(USER_ROW_KEY.format(user_id=user_id, version=version), current, timeout=USER_ROW_TIMEOUT)
+                values = current
+            read = now
+        _store_local(user_id, version, values, now, read)
+
+    # A new instance per request: views may modify (and save) request.user
+    return User.from_db(DEFAULT_DB_ALIAS, _FIELDS, values)
+
+
+def clear_local_cache():
+    with _local_lock:
+        _local_users.clear()
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    # NOTE: queryset.update() bypasses this, call bump_user_version() yourself
+    bump_user_version(instance.pk)
+    transaction.on_commit(lambda: bump_user_version(instance.pk))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """Drop-in replacement for simplejwt's JWTAuthentication."""
+
+    def get_user(self, validated_token):
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+
+def stateless_reads():
+    # Refused with a process-local cache: see check_stateless_reads()
+    return getattr(settings, 'JWT_STATELESS_READS', False) and cache_is_shared()
+
+
+@register(Tags.security)
+def check_stateless_reads(app_configs, **kwargs):
+    if getattr(settings, 'JWT_STATELESS_READS', False) and not cache_is_shared():
+        return [Error(
+            "JWT_STATELESS_READS needs a cache shared by every worker.",
+            hint="Set REDIS_URL, or turn QUIZ_STATELESS_READS off.",
+            id='api.E001',
+        )]
+    return []
+
+
+class StatelessJWTAuthentication(CachedJWTAuthentication):
+    """For read-only endpoints: trust the token claims when JWT_STATELESS_READS is on."""
+
+    def get_user(self, validated_token):
+        if not stateless_reads():
+            return super().get_user(validated_token)
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        # Never saved; is_staff / is_superuser stay False, so admin-only views still refuse it
+        user = User(id=user_id, username=validated_token.get('username', ''), email=validated_token.get('email', ''))
+        user._state.adding = False
+        user._state.db = DEFAULT_DB_ALIAS
+        return user
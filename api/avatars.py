@@ -0,0 +1,235 @@
+"""
+Avatar processing.
+
+Uploads are checked on the request thread without decoding any pixels
+(size, format and pixel count from the header, plus Image.verify() for
+structural damage) and then handed to a small worker pool, which does the
+one full decode, applies the EXIF orientation, drops all metadata and
+writes square thumbnails in WebP and JPEG:
+
+    avatars/<sha256 of upload>/<size>.webp|.jpg
+
+Files are named by content hash, so identical uploads share storage and are
+only processed once. The profile's avatar_state is 'processing' while the
+worker runs and ends up 'ready' or, when the upload cannot be decoded after
+all, 'failed'; only the latest upload (avatar_pending) reports back. The
+profile is switched over when the files exist, and the previous set is
+deleted unless another profile still uses it. Writing +
+referencing a set and deleting it hold the same per-hash lock (in the shared
+cache), so a set is never deleted under an upload that is about to reuse it.
+
+Files no profile points at (pre-thumbnail uploads, sets of deleted accounts)
+are removed by `python manage.py cleanup_avatars`, see sweep(); a legacy
+upload is also removed as soon as its owner uploads a new avatar.
+"""
+import hashlib
+import io
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import UserProfile
+
+
+logger = logging.getLogger(__name__)
+
+SIZES = (64, 128, 256)
+FORMATS = {'webp': ('WEBP', {'quality': 80, 'method': 4}), 'jpeg': ('JPEG', {'quality': 85, 'optimize': True})}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'GIF'}
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_PIXELS = 40_000_000
+DEFAULT_SIZE = 256
+PLACEHOLDER = 'https://placehold.co/150'
+DEFAULT_AVATAR = UserProfile._meta.get_field('avatar').default # shared by every profile, never deleted
+LOCK_KEY = 'avatar-lock:{content_hash}'
+LOCK_TIMEOUT = 60 # longer than rendering one upload takes
+
+_pool = ThreadPoolExecutor(max_workers=getattr(settings, 'AVATAR_WORKERS', 2), thread_name_prefix='avatar')
+
+
+class InvalidAvatar(ValueError):
+    pass
+
+
+def path_for(content_hash, size, fmt):
+    return f'avatars/{content_hash}/{size}.{EXTENSIONS[fmt]}'
+
+
+def urls_for(content_hash, build_uri):
+    return {
+        str(size): {fmt: build_uri(default_storage.url(path_for(content_hash, size, fmt))) for fmt in FORMATS}
+        for size in SIZES
+    }
+
+
+def payload(avatar, content_hash, build_uri, state=UserProfile.READY):
+    """GET response: the default URL plus every size/format when processed thumbnails exist."""
+    if content_hash:
+        sizes = urls_for(content_hash, build_uri)
+        return {"avatar": sizes[str(DEFAULT_SIZE)]['jpeg'], "sizes": sizes, "state": state}
+    if avatar:
+        return {"avatar": build_uri(default_storage.url(avatar)), "sizes": {}, "state": state}
+    return {"avatar": PLACEHOLDER, "sizes": {}, "state": state}
+
+
+def validate(upload):
+    """Read and sanity-check an upload from its header (no decode). Returns (data, content_hash)."""
+    if upload.size > MAX_UPLOAD_BYTES:
+        raise InvalidAvatar(f"Image too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)")
+    data = upload.read()
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise InvalidAvatar("Unsupported image format")
+            if image.width * image.height > MAX_PIXELS:
+                raise InvalidAvatar("Image dimensions too large")
+            image.verify() # chunk structure / checksums only, pixels are decoded by the worker
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError):
+        raise InvalidAvatar("Not a valid image")
+    return data, hashlib.sha256(data).hexdigest()
+
+
+def render(data):
+    """Decode once, strip metadata, return {(size, fmt): bytes}. Raises InvalidAvatar on corrupt data."""
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            image = ImageOps.exif_transpose(source).convert('RGB') # new image: no EXIF/ICC/comments
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as exc:
+        raise InvalidAvatar("Not a valid image") from exc
+    outputs = {}
+    for size in SIZES:
+        thumb = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        for fmt, (pil_format, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            thumb.save(buffer, pil_format, **options)
+            outputs[(size, fmt)] = buffer.getvalue()
+    return outputs
+
+
+@contextmanager
+def _locked(content_hash):
+    """Hold the thumbnail set's lock; a holder that died is waited out for LOCK_TIMEOUT at most."""
+    key = LOCK_KEY.format(content_hash=content_hash)
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while not cache.add(key, token, timeout=LOCK_TIMEOUT) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def _report(user_id, content_hash, **fields):
+    """Write the worker's outcome, unless a newer upload has taken over. Returns whether it was written."""
+    return UserProfile.objects.filter(user_id=user_id, avatar_pending=content_hash).update(
+        avatar_pending='', **fields,
+    )
+
+
+def process(user_id, data, content_hash):
+    """Write thumbnails (unless already stored), point the profile at them, drop the old set."""
+    with _locked(content_hash):
+        if not all(default_storage.exists(path_for(content_hash, size, fmt)) for size in SIZES for fmt in FORMATS):
+            try:
+                outputs = render(data)
+            except InvalidAvatar:
+                _report(user_id, content_hash, avatar_state=UserProfile.FAILED)
+                raise
+            for (size, fmt), payload in outputs.items():
+                name = path_for(content_hash, size, fmt)
+                if not default_storage.exists(name):
+                    default_storage.save(name, ContentFile(payload))
+
+        previous = (
+            UserProfile.objects
+            .filter(user_id=user_id)
+            .values_list('avatar', 'avatar_hash')
+            .first()
+        )
+        current = _report(
+            user_id, content_hash, avatar_state=UserProfile.READY,
+            avatar=path_for(content_hash, DEFAULT_SIZE, 'jpeg'), avatar_hash=content_hash,
+        )
+
+    if not current:
+        # Superseded by a newer upload (or the account is gone): this set may be referenced by nobody
+        cleanup(content_hash)
+        return
+    avatar, previous_hash = previous
+    if previous_hash:
+        if previous_hash != content_hash:
+            cleanup(previous_hash)
+    else:
+        cleanup_legacy(avatar)
+
+
+def cleanup(content_hash):
+    """Delete a thumbnail set once no profile references it anymore. Returns whether it was deleted."""
+    with _locked(content_hash):
+        if UserProfile.objects.filter(avatar_hash=content_hash).exists():
+            return False
+        for size in SIZES:
+            for fmt in FORMATS:
+                default_storage.delete(path_for(content_hash, size, fmt))
+    return True
+
+
+def cleanup_legacy(path):
+    """Delete a pre-thumbnail upload (avatars/<name>) once no profile references it."""
+    if not path or path == DEFAULT_AVATAR or UserProfile.objects.filter(avatar=path).exists():
+        return False
+    default_storage.delete(path)
+    return True
+
+
+def sweep():
+    """Delete every avatar file no profile references. Returns the number of sets / files removed."""
+    try:
+        directories, files = default_storage.listdir('avatars')
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for content_hash in directories:
+        if default_storage.listdir(f'avatars/{content_hash}')[1]: # emptied sets leave their directory behind
+            removed += cleanup(content_hash)
+    for name in files:
+        removed += cleanup_legacy(f'avatars/{name}')
+    return removed
+
+
+def _run(user_id, data, content_hash):
+    try:
+        process(user_id, data, content_hash)
+    except InvalidAvatar:
+        logger.info("Avatar upload of user %s could not be decoded", user_id)
+    except Exception:
+        _report(user_id, content_hash, avatar_state=UserProfile.FAILED)
+        logger.exception("Avatar processing failed for user %s", user_id)
+    finally:
+        close_old_connections()
+
+
+def submit(user_id, data, content_hash):
+    """
+    Mark the profile as processing, then process in the worker pool (or inline
+    when AVATAR_ASYNC_PROCESSING is off, e.g. tests; InvalidAvatar propagates).
+    """
+    fields = {'avatar_pending': content_hash, 'avatar_state': UserProfile.PROCESSING}
+    if not UserProfile.objects.filter(user_id=user_id).update(**fields):
+        UserProfile.objects.create(user_id=user_id, **fields)
+    if getattr(settings, 'AVATAR_ASYNC_PROCESSING', True):
+        _pool.submit(_run, user_id, data, content_hash)
+    else:
+        process(user_id, data, content_hash)
@@ -0,0 +1,498 @@
+"""
+Streaming import / export of question banks.
+
+File formats (the exporter writes exactly what the importer reads):
+
+JSONL - one record per line:
+    {"type": "quiz", "external_id": "bio-101", "title": "Biology", "description": "...",
+     "time_minutes": 10, "difficulty": "Easy", "icon_name": "FaLeaf",
+     "sample_size": null, "shuffle_options": false}
+    {"type": "question", "quiz": "bio-101", "external_id": "bio-101-q1", "text": "...",
+     "options": [{"text": "A", "is_correct": true}, {"text": "B", "is_correct": false}]}
+
+CSV - one question per row:
+    quiz, quiz_title, quiz_description, quiz_difficulty, quiz_time_minutes,
+    external_id, text, correct_option (1-based), option_1, option_2, ...
+    (quiz_* columns only matter the first time a quiz is seen; any other
+    column is reported and ignored)
+
+External ids and quiz keys are stored as strings; JSON numbers are accepted
+and converted, so `"external_id": 5` and `"5"` name the same row.
+
+Rows are read lazily and written in chunks with bulk_create, one transaction
+per chunk, so memory stays bounded whatever the file size. Every question is
+validated (non-empty text, at least two options, exactly one correct one -
+see Option's one_correct_option_per_question constraint - and every value
+within its column's max_length) before it is sent to the database; invalid
+rows are skipped and reported. Nothing is left for the database to reject:
+on Postgres a single bad row would abort its whole chunk after earlier
+chunks were committed.
+
+With upsert=True, rows whose external_id already exists update the stored
+quiz/question instead of failing, so re-running an import is idempotent.
+Options are only rewritten when they actually changed, which keeps the
+AttemptAnswer history of unchanged questions intact.
+"""
+import csv
+import json
+import re
+import time
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from . import search
+from .content import bump_catalog_version, bump_content_version, deferred_invalidation
+from .models import Quiz, Question, Option
+
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+QUIZ_FIELDS = ('title', 'description', 'time_minutes', 'difficulty', 'icon_name', 'sample_size', 'shuffle_options')
+DIFFICULTIES = {value for value, _ in Quiz.DIFFICULTY_CHOICES}
+# Accepted (min, max) for the integer quiz fields: at most a day / a day's worth of questions
+QUIZ_INT_RANGES = {'time_minutes': (1, 24 * 60), 'sample_size': (1, 24 * 60)}
+CSV_COLUMNS = {
+    'quiz', 'quiz_title', 'quiz_description', 'quiz_difficulty', 'quiz_time_minutes',
+    'external_id', 'text', 'correct_option',
+}
+OPTION_COLUMN = re.compile(r'option_(\d+)')
+
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+MAX_EXTERNAL_ID = _max_length(Question, 'external_id')
+MAX_OPTION_TEXT = _max_length(Option, 'text')
+MAX_QUIZ_LENGTHS = {field: _max_length(Quiz, field) for field in ('external_id', 'title', 'icon_name')}
+
+
+class BankFormatError(ValueError):
+    pass
+
+
+def _as_key(value):
+    """External ids / quiz keys as stored: stripped strings (ints converted), None when blank."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        value = str(value)
+    if isinstance(value, str):
+        return value.strip() or None
+    return value # anything else is rejected by the caller
+
+
+def _check_key(value, name):
+    if value is not None and not isinstance(value, str):
+        raise BankFormatError(f"{name} must be a string or an integer, got {type(value).__name__}")
+
+
+def _bounded_int(value, name):
+    low, high = QUIZ_INT_RANGES[name]
+    if isinstance(value, bool):
+        raise BankFormatError(f"{name} must be a number")
+    try:
+        number = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise BankFormatError(f"{name} must be a number")
+    if isinstance(value, float) and value != number:
+        raise BankFormatError(f"{name} must be a whole number")
+    if not low <= number <= high:
+        raise BankFormatError(f"{name} must be between {low} and {high}")
+    return number
+
+
+class ImportReport:
+    def __init__(self):
+        self.quizzes_created = 0
+        self.quizzes_updated = 0
+        self.questions_created = 0
+        self.questions_updated = 0
+        self.options_written = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"line {line}: {message}")
+
+    @property
+    def rows_per_second(self):
+        rows = self.questions_created + self.questions_updated
+        return rows / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f"quizzes: {self.quizzes_created} created, {self.quizzes_updated} updated; "
+            f"questions: {self.questions_created} created, {self.questions_updated} updated; "
+            f"options written: {self.options_written}; skipped: {self.skipped}; "
+            f"{self.rows_per_second:.0f} questions/s"
+        )
+
+
+class _Question:
+    __slots__ = ('line', 'quiz_key', 'external_id', 'text', 'options')
+
+    def __init__(self, line, quiz_key, external_id, text, options):
+        self.line = line
+        self.quiz_key = _as_key(quiz_key)
+        self.external_id = _as_key(external_id)
+        self.text = text.strip() if isinstance(text, str) else text
+        self.options = options # [(text, is_correct), ...]
+
+    def validate(self):
+        _check_key(self.quiz_key, "quiz")
+        _check_key(self.external_id, "external_id")
+        if not self.quiz_key:
+            raise BankFormatError("question has no quiz")
+        if self.text is not None and not isinstance(self.text, str):
+            raise BankFormatError("question text must be a string")
+        if not self.text:
+            raise BankFormatError("question text is empty")
+        if len(self.options) < 2:
+            raise BankFormatError("a question needs at least two options")
+        if self.external_id is not None and len(self.external_id) > MAX_EXTERNAL_ID:
+            raise BankFormatError(f"external_id is longer than {MAX_EXTERNAL_ID} characters")
+        if any(not text for text, _ in self.options):
+            raise BankFormatError("option text is empty")
+        if any(len(text) > MAX_OPTION_TEXT for text, _ in self.options):
+            raise BankFormatError(f"option text is longer than {MAX_OPTION_TEXT} characters")
+        correct = sum(1 for _, is_correct in self.options if is_correct)
+        if correct != 1:
+            raise BankFormatError(f"expected exactly one correct option, got {correct}")
+
+
+# -------------------------------------------------
+# Readers: yield ('quiz', line, fields) / ('question', line, _Question)
+# -------------------------------------------------
+def read_jsonl(lines):
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+            kind = record.get('type', 'question')
+            if kind == 'quiz':
+                yield 'quiz', line_number, record
+            elif kind == 'question':
+                options = [(str(o.get('text', '')).strip(), bool(o.get('is_correct'))) for o in record.get('options', [])]
+                yield 'question', line_number, _Question(
+                    line_number, record.get('quiz'), record.get('external_id'), record.get('text'), options,
+                )
+            else:
+                yield 'error', line_number, f"unknown record type {kind!r}"
+        except (ValueError, AttributeError, TypeError) as exc:
+            yield 'error', line_number, f"invalid JSON record ({exc})"
+
+
+def read_csv(lines):
+    reader = csv.DictReader(lines)
+    numbered = {}
+    for name in reader.fieldnames or []:
+        match = OPTION_COLUMN.fullmatch(name)
+        if match:
+            numbered[name] = int(match.group(1))
+        elif name not in CSV_COLUMNS:
+            yield 'error', 1, f"unknown column {name!r} ignored"
+    option_columns = sorted(numbered, key=numbered.get)
+    for row in reader:
+        line_number = reader.line_num
+        quiz_key = (row.get('quiz') or '').strip()
+        if row.get('quiz_title'):
+            yield 'quiz', line_number, {
+                'external_id': quiz_key,
+                'title': row['quiz_title'],
+                'description': row.get('quiz_description') or '',
+                'difficulty': row.get('quiz_difficulty') or 'Medium',
+                'time_minutes': row.get('quiz_time_minutes') or 10,
+                '_from_csv': True,
+            }
+        try:
+            correct = int(row.get('correct_option') or 0)
+        except ValueError:
+            yield 'error', line_number, "correct_option must be a number"
+            continue
+        options = [
+            (row[name].strip(), index == correct)
+            for index, name in enumerate(option_columns, 1)
+            if (row.get(name) or '').strip()
+        ]
+        yield 'question', line_number, _Question(
+            line_number, quiz_key, (row.get('external_id') or '').strip(), row.get('text'), options,
+        )
+
+
+READERS = {'jsonl': read_jsonl, 'csv': read_csv}
+
+
+# -------------------------------------------------
+# Import
+# -------------------------------------------------
+def import_bank(lines, fmt='jsonl', upsert=False, chunk_size=CHUNK_SIZE, dry_run=False):
+    """Import a question bank from an iterable of text lines. Returns an ImportReport."""
+    report = ImportReport()
+    quiz_ids = {}       # quiz external id -> pk (bounded by the number of quizzes)
+    seen_quizzes = set()
+    touched = set()     # quiz pks whose cached content must be invalidated
+    chunk = []
+
+    with deferred_invalidation():
+        try:
+            for kind, line, item in READERS[fmt](lines):
+                if kind == 'error':
+                    report.error(line, item)
+                elif kind == 'quiz':
+                    key = _as_key(item.get('external_id'))
+                    if item.get('_from_csv'):
+                        if key in seen_quizzes:
+                            continue # CSV repeats quiz columns on every row
+                        seen_quizzes.add(key)
+                    try:
+                        quiz_ids[key] = _import_quiz(item, upsert, report, dry_run)
+                        touched.add(quiz_ids[key])
+                    except BankFormatError as exc:
+                        report.error(line, exc)
+                else:
+                    try:
+                        item.validate()
+                        quiz_id = _resolve_quiz(item.quiz_key, quiz_ids)
+                    except BankFormatError as exc:
+                        report.error(line, exc)
+                        continue
+                    chunk.append((quiz_id, item))
+                    if len(chunk) >= chunk_size:
+                        _write_chunk(chunk, upsert, report, touched, dry_run)
+                        chunk = []
+            if chunk:
+                _write_chunk(chunk, upsert, report, touched, dry_run)
+        finally:
+            # Signals were silenced above: invalidate once per quiz instead of once per row
+            for quiz_id in touched:
+                if quiz_id is not None:
+                    bump_content_version(quiz_id)
+            bump_catalog_version()
+            search.reindex(touched)
+
+    report.elapsed = time.perf_counter() - report.started
+    return report
+
+
+def _import_quiz(fields, upsert, report, dry_run):
+    key = _as_key(fields.get('external_id'))
+    _check_key(key, "quiz external_id")
+    if not key:
+        raise BankFormatError("quiz has no external_id")
+    if not fields.get('title'):
+        raise BankFormatError("quiz has no title")
+    values = {name: fields[name] for name in QUIZ_FIELDS if name in fields and fields[name] is not None}
+    for name, max_length in MAX_QUIZ_LENGTHS.items():
+        value = key if name == 'external_id' else values.get(name)
+        if value is not None and len(str(value)) > max_length:
+            raise BankFormatError(f"quiz {name} is longer than {max_length} characters")
+    if values.get('difficulty', 'Medium') not in DIFFICULTIES:
+        raise BankFormatError(f"unknown difficulty {values['difficulty']!r}")
+    values['time_minutes'] = _bounded_int(values.get('time_minutes', 10), 'time_minutes')
+    if 'sample_size' in values:
+        values['sample_size'] = _bounded_int(values['sample_size'], 'sample_size')
+    if 'shuffle_options' in values:
+        values['shuffle_options'] = bool(values['shuffle_options'])
+
+    existing = Quiz.objects.filter(external_id=key).values_list('id', flat=True).first()
+    if existing is not None and not upsert:
+        raise BankFormatError(f"quiz {key!r} already exists (use upsert)")
+    if dry_run:
+        return existing
+    if existing is not None:
+        Quiz.objects.filter(pk=existing).update(**values)
+        report.quizzes_updated += 1
+        return existing
+    report.quizzes_created += 1
+    return Quiz.objects.create(external_id=key, **values).pk
+
+
+def _resolve_quiz(key, quiz_ids):
+    if key not in quiz_ids:
+        quiz_id = Quiz.objects.filter(external_id=key).values_list('id', flat=True).first()
+        if quiz_id is None:
+            raise BankFormatError(f"unknown quiz {key!r}")
+        quiz_ids[key] = quiz_id
+    return quiz_ids[key]
+
+
+def _write_chunk(chunk, upsert, report, touched, dry_run):
+    external_ids = [item.external_id for _, item in chunk if item.external_id]
+    existing = dict(
+        Question.objects
+        .filter(external_id__in=external_ids)
+        .values_list('external_id', 'id')
+    ) if external_ids else {}
+
+    new, updates, seen = [], [], set()
+    for quiz_id, item in chunk:
+        if item.external_id:
+            if item.external_id in seen:
+                report.error(item.line, f"duplicate question {item.external_id!r} in file")
+                continue
+            seen.add(item.external_id)
+        question_id = existing.get(item.external_id)
+        if question_id is None:
+            new.append((quiz_id, item))
+        elif upsert:
+            updates.append((question_id, quiz_id, item))
+        else:
+            report.error(item.line, f"question {item.external_id!r} already exists (use upsert)")
+
+    if dry_run:
+        report.questions_created += len(new)
+        report.questions_updated += len(updates)
+        return
+
+    with transaction.atomic():
+        created = Question.objects.bulk_create([
+            Question(quiz_id=quiz_id, external_id=item.external_id, text=item.text)
+            for quiz_id, item in new
+        ])
+        options = [
+            Option(question_id=question.id, text=text, is_correct=is_correct)
+            for question, (_, item) in zip(created, new)
+            for text, is_correct in item.options
+        ]
+        touched.update(quiz_id for quiz_id, _ in new)
+
+        if updates:
+            options += _update_questions(updates, touched)
+
+        Option.objects.bulk_create(options)
+
+    report.questions_created += len(new)
+    report.questions_updated += len(updates)
+    report.options_written += len(options)
+
+
+def _update_questions(updates, touched):
+    """Apply upserts; returns the Option rows that need (re)creating."""
+    ids = [question_id for question_id, _, _ in updates]
+    current = {
+        question.id: question
+        for question in Question.objects.filter(id__in=ids).only('id', 'quiz_id', 'text')
+    }
+    current_options = {question_id: [] for question_id in ids}
+    for question_id, text, is_correct in (
+        Option.objects.filter(question_id__in=ids).order_by('id').values_list('question_id', 'text', 'is_correct')
+    ):
+        current_options[question_id].append((text, is_correct))
+
+    changed_questions, replace_options = [], []
+    for question_id, quiz_id, item in updates:
+        question = current[question_id]
+        if question.quiz_id != quiz_id or question.text != item.text:
+            touched.update((question.quiz_id, quiz_id))
+            question.quiz_id, question.text = quiz_id, item.text
+            changed_questions.append(question)
+        if current_options[question_id] != item.options:
+            touched.add(quiz_id)
+            replace_options.append((question_id, item))
+
+    if changed_questions:
+        Question.objects.bulk_update(changed_questions, ['quiz', 'text'])
+    if replace_options:
+        Option.objects.filter(question_id__in=[question_id for question_id, _ in replace_options]).delete()
+    return [
+        Option(question_id=question_id, text=text, is_correct=is_correct)
+        for question_id, item in replace_options
+        for text, is_correct in item.options
+    ]
+
+
+# -------------------------------------------------
+# Export (generators of text lines, so callers can stream them)
+# -------------------------------------------------
+def _quiz_key(quiz_id, external_id):
+    return external_id or f'quiz-{quiz_id}'
+
+
+def _iter_questions(quiz_ids, chunk_size):
+    """Yield (question_id, quiz_id, external_id, text, [(text, is_correct)]) in id order."""
+    questions = Question.objects.order_by('id')
+    if quiz_ids is not None:
+        questions = questions.filter(quiz_id__in=quiz_ids)
+    rows = questions.values_list('id', 'quiz_id', 'external_id', 'text').iterator(chunk_size=chunk_size)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        options = {row[0]: [] for row in batch}
+        for question_id, text, is_correct in (
+            Option.objects
+            .filter(question_id__in=options)
+            .order_by('id')
+            .values_list('question_id', 'text', 'is_correct')
+        ):
+            options[question_id].append((text, is_correct))
+        for question_id, quiz_id, external_id, text in batch:
+            yield question_id, quiz_id, external_id, text, options[question_id]
+
+
+def _quiz_keys(quiz_ids):
+    quizzes = Quiz.objects.order_by('id')
+    if quiz_ids is not None:
+        quizzes = quizzes.filter(id__in=quiz_ids)
+    return quizzes
+
+
+def export_jsonl(quiz_ids=None, chunk_size=CHUNK_SIZE):
+    keys = {}
+    for quiz in _quiz_keys(quiz_ids).iterator(chunk_size=chunk_size):
+        keys[quiz.id] = _quiz_key(quiz.id, quiz.external_id)
+        record = {'type': 'quiz', 'external_id': keys[quiz.id]}
+        record.update({name: getattr(quiz, name) for name in QUIZ_FIELDS})
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+    for question_id, quiz_id, external_id, text, options in _iter_questions(quiz_ids, chunk_size):
+        yield json.dumps({
+            'type': 'question',
+            'quiz': keys[quiz_id],
+            'external_id': external_id or f'question-{question_id}',
+            'text': text,
+            'options': [{'text': o_text, 'is_correct': is_correct} for o_text, is_correct in options],
+        }, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def export_csv(quiz_ids=None, chunk_size=CHUNK_SIZE):
+    quizzes = {quiz.id: quiz for quiz in _quiz_keys(quiz_ids).only('id', 'external_id', *QUIZ_FIELDS)}
+    option_counts = Option.objects.values('question_id').annotate(n=Count('id'))
+    if quiz_ids is not None:
+        option_counts = option_counts.filter(question__quiz_id__in=quiz_ids)
+    width = option_counts.aggregate(width=Max('n'))['width'] or 2
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(
+        ['quiz', 'quiz_title', 'quiz_description', 'quiz_difficulty', 'quiz_time_minutes',
+         'external_id', 'text', 'correct_option'] + [f'option_{i}' for i in range(1, width + 1)]
+    )
+    described = set()
+    for question_id, quiz_id, external_id, text, options in _iter_questions(quiz_ids, chunk_size):
+        quiz = quizzes[quiz_id]
+        # Quiz columns only on the first row of each quiz
+        quiz_columns = ['', '', '', '']
+        if quiz_id not in described:
+            described.add(quiz_id)
+            quiz_columns = [quiz.title, quiz.description, quiz.difficulty, quiz.time_minutes]
+        correct = next((index for index, (_, ok) in enumerate(options, 1) if ok), '')
+        yield writer.writerow(
+            [_quiz_key(quiz_id, quiz.external_id)] + quiz_columns
+            + [external_id or f'question-{question_id}', text, correct]
+            + [o_text for o_text, _ in options]
+        )
+
+
+EXPORTERS = {'jsonl': export_jsonl, 'csv': export_csv}
@@ -0,0 +1,203 @@
+"""
+Batch submissions (POST /api/submissions/batch/).
+
+Offline clients queue their results and replay them in one request:
+
+    {"submissions": [
+        {"key": "3f2c...", "quiz_id": 7, "answers": {"12": 48, ...},
+         "client_timestamp": "2026-10-01T12:00:00Z"},
+        ...
+    ]}
+
+`key` is a client-generated idempotency key (at most 64 characters).
+`attempt` / `session` work as on the single submit endpoint.
+
+The whole batch costs a fixed number of round trips. Every answer key it
+needs is fetched in one pass (grading.get_answer_keys). The attempts and
+their answers go in with one bulk insert each. Leaderboard and stats
+updates are applied once for the batch, as the outbox flush does. The only
+exceptions are sessions, which are closed one UPDATE each.
+
+Batches are always written directly, whatever QUIZ_SUBMIT_MODE says; a
+batch is already the amortized path.
+
+The key is stored on the attempt and is unique per user. A retried batch
+gets "duplicate" (with the stored result) for the items already written,
+instead of writing them twice. Items that fail validation are "rejected"
+and do not affect the rest.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import analysis, grading, leaderboard, sessions, stats
+from .models import QuizAttempt, AttemptAnswer
+
+
+MAX_KEY_LENGTH = 64
+MAX_QUIZ_ID = 2 ** 63 - 1 # anything larger can't be looked up (BIGINT)
+
+
+class _Item:
+    __slots__ = ('index', 'key', 'quiz_id', 'data', 'completed_at', 'attempt', 'review_data')
+
+    def __init__(self, index, key, quiz_id, data, completed_at):
+        self.index = index
+        self.key = key
+        self.quiz_id = quiz_id
+        self.data = data
+        self.completed_at = completed_at
+        self.attempt = None
+        self.review_data = None
+
+
+def _rejected(key, error):
+    return {"key": key, "status": "rejected", "error": error}
+
+
+def _result(key, status, attempt):
+    return {
+        "key": key,
+        "status": status,
+        "attempt_id": attempt.id,
+        "quiz_id": attempt.quiz_id,
+        "score": attempt.score,
+        "total": attempt.total_questions,
+        "percentage": attempt.percentage,
+    }
+
+
+def _completed_at(value, now):
+    """client_timestamp (ISO 8601 or epoch seconds) -> aware datetime, or raise ValueError."""
+    if value is None:
+        return now
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            when = datetime.fromtimestamp(value, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError): # out of range for the platform, or NaN
+            raise ValueError("client_timestamp is out of range")
+    else:
+        when = parse_datetime(value) if isinstance(value, str) else None
+        if when is None:
+            raise ValueError("client_timestamp must be ISO 8601 or epoch seconds")
+        if timezone.is_naive(when):
+            when = timezone.make_aware(when, dt_timezone.utc)
+    if when < now - timedelta(days=settings.QUIZ_BATCH_MAX_AGE_DAYS):
+        raise ValueError(f"client_timestamp is older than {settings.QUIZ_BATCH_MAX_AGE_DAYS} days")
+    return min(when, now) # clock skew: never in the future
+
+
+def _quiz_id(value):
+    """quiz_id as sent (an integer, an integral float or a numeric string) -> int, or raise ValueError."""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()): # NaN / inf included
+        raise ValueError("quiz_id must be an integer")
+    try:
+        quiz_id = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("quiz_id must be an integer")
+    if not 1 <= quiz_id <= MAX_QUIZ_ID:
+        raise ValueError("quiz_id out of range")
+    return quiz_id
+
+
+def _parse(index, raw, now, seen):
+    if not isinstance(raw, dict):
+        raise ValueError("each submission must be an object")
+    key = raw.get('key')
+    if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f"key must be a string of 1-{MAX_KEY_LENGTH} characters")
+    if key in seen:
+        raise ValueError("key appears twice in this batch")
+    seen.add(key)
+    quiz_id = _quiz_id(raw.get('quiz_id'))
+    if not isinstance(raw.get('answers', {}), dict):
+        raise ValueError("answers must be an object")
+    return _Item(index, key, quiz_id, raw, _completed_at(raw.get('client_timestamp'), now))
+
+
+def submit_batch(user, submissions):
+    """Grade and record a list of submissions. Returns one result per submission, in order."""
+    now = timezone.now()
+    results = [None] * len(submissions)
+    items = []
+    seen = set()
+    for index, raw in enumerate(submissions):
+        try:
+            items.append(_parse(index, raw, now, seen))
+        except ValueError as exc:
+            key = raw.get('key') if isinstance(raw, dict) else None
+            results[index] = _rejected(key, str(exc))
+
+    items = _skip_stored(user, items, results)
+
+    # Every answer key the batch needs, in one pass
+    answer_keys = grading.get_answer_keys({item.quiz_id for item in items})
+    graded = []
+    for item in items:
+        answer_key = answer_keys.get(item.quiz_id)
+        if answer_key is None:
+            results[item.index] = _rejected(item.key, "Quiz not found")
+            continue
+        try:
+            questions = sessions.questions_for_submit(answer_key, user, item.data)
+        except sessions.SessionError as exc:
+            results[item.index] = _rejected(item.key, str(exc))
+            continue
+        score, item.review_data = grading.grade(answer_key, item.data.get('answers', {}), questions)
+        total = len(item.review_data)
+        item.attempt = QuizAttempt(
+            user_id=user.id, quiz_id=item.quiz_id, score=score, total_questions=total,
+            percentage=stats.percentage(score, total), completed_at=item.completed_at,
+            client_key=item.key,
+        )
+        graded.append(item)
+
+    try:
+        _write(graded)
+    except IntegrityError:
+        # A concurrent retry of the same batch got there first: whatever it
+        # stored is a duplicate now, write the rest
+        graded = _skip_stored(user, graded, results)
+        _write(graded)
+
+    for item in graded:
+        results[item.index] = _result(item.key, "created", item.attempt)
+    return results
+
+
+def _skip_stored(user, items, results):
+    """Fill in results for keys this user already submitted; return the remaining items."""
+    if not items:
+        return items
+    stored = {
+        attempt.client_key: attempt
+        for attempt in (
+            QuizAttempt.objects
+            .filter(user=user, client_key__in=[item.key for item in items])
+            .only('id', 'quiz_id', 'score', 'total_questions', 'percentage', 'client_key')
+        )
+    }
+    remaining = []
+    for item in items:
+        if item.key in stored:
+            results[item.index] = _result(item.key, "duplicate", stored[item.key])
+        else:
+            remaining.append(item)
+    return remaining
+
+
+def _write(items):
+    if not items:
+        return
+    with transaction.atomic():
+        attempts = QuizAttempt.objects.bulk_create([item.attempt for item in items])
+        AttemptAnswer.objects.bulk_create([
+            row
+            for attempt, item in zip(attempts, items)
+            for row in analysis.answer_rows(attempt, item.review_data)
+        ])
+        leaderboard.record_attempts(attempts)
+        stats.record_attempts(attempts)
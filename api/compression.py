@@ -0,0 +1,51 @@
+"""
+Response compression.
+
+Django's GZipMiddleware, restricted to what is worth compressing: JSON and
+other text responses of at least settings.GZIP_MIN_BYTES (quiz payloads,
+reviews). Small responses, binary files (avatars, already compressed static
+files) and streamed responses (bank exports: their size isn't known up
+front, and gzip would hold each chunk back) go out as they are. gzip is only
+used when Accept-Encoding allows it; "gzip;q=0" refuses it. Django adds
+random bytes to every gzip header, which keeps BREACH-style length probing
+impractical.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/')
+GZIP_CODINGS = ('gzip', 'x-gzip')
+
+
+def accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding value lists gzip with a non-zero quality (lower case, as GZipMiddleware reads it)."""
+    for item in accept_encoding.split(','):
+        coding, *params = (part.strip() for part in item.split(';'))
+        if coding not in GZIP_CODINGS:
+            continue
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+class CompressionMiddleware(GZipMiddleware):
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '')
+        if not content_type.startswith(COMPRESSIBLE_TYPES) or response.streaming:
+            return response
+        if len(response.content) < getattr(settings, 'GZIP_MIN_BYTES', 1024):
+            return response
+        if not accepts_gzip(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            if not response.has_header('Content-Encoding'):
+                patch_vary_headers(response, ('Accept-Encoding',))
+            return response
+        return super().process_response(request, response)
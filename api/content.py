@@ -0,0 +1,273 @@
+"""
+Quiz content versioning.
+
+Every cache that holds quiz content (answer keys, rendered payloads, ...) is
+keyed by the quiz's current content version. Editing a Quiz, Question or
+Option bumps the version, so stale entries are simply never read again and
+age out on their own - no need to hunt them down one by one.
+
+The version also doubles as the HTTP ETag for quiz content, so a client that
+already has the current payload gets a 304 straight from the cache.
+
+Version keys expire too (version_timeout()): an expired version is simply
+replaced by a fresh one, costing one rebuild. With the process-local cache
+(no REDIS_URL, local runs only - production refuses to start without it) a
+bump reaches only the worker that made it, so there the timeout is short and
+the other workers catch up within LOCAL_VERSION_TIMEOUT.
+"""
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils.http import parse_etags
+
+from .models import Quiz, Question, Option
+from .routing import primary
+
+
+VERSION_KEY = 'quiz:{quiz_id}:version'
+PAYLOAD_KEY = 'quiz:{quiz_id}:{kind}:{version}'
+CATALOG_VERSION_KEY = 'quiz-catalog:version'
+CATALOG_PAGE_KEY = 'quiz-catalog:{version}:{digest}'
+PAYLOAD_TIMEOUT = 60 * 60 * 24
+VERSION_TIMEOUT = 60 * 60 * 24 * 7
+LOCAL_VERSION_TIMEOUT = 60
+
+# Backends that keep entries inside one process: a version bumped in one
+# worker is never seen by the others
+_PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def cache_is_shared():
+    """True when every worker process reads and writes the same default cache."""
+    return settings.CACHES['default']['BACKEND'] not in _PROCESS_LOCAL_BACKENDS
+
+
+def version_timeout():
+    """Lifetime of a version token."""
+    return VERSION_TIMEOUT if cache_is_shared() else LOCAL_VERSION_TIMEOUT
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Unknown (first read or evicted) -> start a fresh version.
+        # time_ns() keeps tokens unique even if the key was evicted before.
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=version_timeout()):
+            version = cache.get(key, version)
+    return version
+
+
+def get_content_version(quiz_id):
+    """Return the current content version token for a quiz."""
+    return _get_version(VERSION_KEY.format(quiz_id=quiz_id))
+
+
+def get_content_versions(quiz_ids):
+    """get_content_version() for many quizzes: {quiz_id: version}, one cache round trip when warm."""
+    keys = {VERSION_KEY.format(quiz_id=quiz_id): quiz_id for quiz_id in quiz_ids}
+    found = cache.get_many(keys)
+    versions = {keys[key]: version for key, version in found.items()}
+    for key, quiz_id in keys.items():
+        if key not in found:
+            versions[quiz_id] = _get_version(key)
+    return versions
+
+
+def bump_content_version(quiz_id):
+    """Invalidate every cached view of this quiz's content."""
+    cache.set(VERSION_KEY.format(quiz_id=quiz_id), time.time_ns(), timeout=version_timeout())
+
+
+def get_catalog_version():
+    """Version of the quiz catalog as a whole (titles, difficulty, question counts)."""
+    return _get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), timeout=version_timeout())
+
+
+def content_etag(quiz_id, version, attempt_id=None):
+    """
+    ETag of a quiz payload; one derived from an attempt (its review) gets
+    its own namespace so it can never match the quiz's own detail ETag.
+    """
+    if attempt_id is not None:
+        return f'"attempt-{attempt_id}-quiz-{quiz_id}-{version}"'
+    return f'"quiz-{quiz_id}-{version}"'
+
+
+def etag_matches(etag, if_none_match):
+    """
+    If-None-Match uses the weak comparison: W/"x" matches "x". GZipMiddleware
+    weakens the ETag of every response it compresses, so that is the form
+    clients send back for large payloads.
+    """
+    return any(tag == '*' or tag.removeprefix('W/') == etag for tag in parse_etags(if_none_match))
+
+
+def get_cached_payload(kind, quiz_id, build, attempt_id=None):
+    """
+    Return (etag, payload) for a rendered view of a quiz.
+    `build()` is only called on a miss; the result is stored under the
+    version read *before* building, so a concurrent edit can never be
+    cached under its own (newer) version.
+    """
+    version = get_content_version(quiz_id)
+    key = PAYLOAD_KEY.format(quiz_id=quiz_id, kind=kind, version=version)
+    payload = cache.get(key)
+    if payload is None:
+        with primary(): # never cache a lagging replica's rows under the new version
+            payload = build()
+        cache.set(key, payload, timeout=PAYLOAD_TIMEOUT)
+    return content_etag(quiz_id, version, attempt_id), payload
+
+
+def get_cached_catalog_page(request_uri, build):
+    """Same as get_cached_payload(), for one rendered page of the quiz list."""
+    version = get_catalog_version()
+    digest = hashlib.md5(request_uri.encode()).hexdigest()
+    key = CATALOG_PAGE_KEY.format(version=version, digest=digest)
+    page = cache.get(key)
+    if page is None:
+        with primary():
+            page = build()
+        cache.set(key, page, timeout=PAYLOAD_TIMEOUT)
+    return page
+
+
+# -------------------------------------------------
+# Async variants (api/async_views.py). Same keys, so sync and async
+# workers share one cache; `abuild` is a coroutine function.
+# -------------------------------------------------
+async def _aget_version(key):
+    version = await cache.aget(key)
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(key, version, timeout=version_timeout()):
+            version = await cache.aget(key, version)
+    return version
+
+
+async def aget_content_version(quiz_id):
+    return await _aget_version(VERSION_KEY.format(quiz_id=quiz_id))
+
+
+async def aget_cached_payload(kind, quiz_id, abuild):
+    version = await aget_content_version(quiz_id)
+    key = PAYLOAD_KEY.format(quiz_id=quiz_id, kind=kind, version=version)
+    payload = await cache.aget(key)
+    if payload is None:
+        with primary():
+            payload = await abuild()
+        if payload is not None: # None = quiz not found
+            await cache.aset(key, payload, timeout=PAYLOAD_TIMEOUT)
+    return content_etag(quiz_id, version), payload
+
+
+async def aget_cached_catalog_page(request_uri, abuild):
+    version = await _aget_version(CATALOG_VERSION_KEY)
+    digest = hashlib.md5(request_uri.encode()).hexdigest()
+    key = CATALOG_PAGE_KEY.format(version=version, digest=digest)
+    page = await cache.aget(key)
+    if page is None:
+        with primary():
+            page = await abuild()
+        await cache.aset(key, page, timeout=PAYLOAD_TIMEOUT)
+    return page
+
+
+_local = threading.local()
+
+
+@contextmanager
+def deferred_invalidation():
+    """
+    Silence the per-row signal handlers below for bulk edits (imports, ...).
+    The caller is responsible for bumping the affected versions afterwards.
+    """
+    previous = getattr(_local, 'deferred', False)
+    _local.deferred = True
+    try:
+        yield
+    finally:
+        _local.deferred = previous
+
+
+def _bump(quiz_id, catalog=False):
+    if quiz_id is None or getattr(_local, 'deferred', False):
+        return
+
+    def bump():
+        bump_content_version(quiz_id)
+        if catalog:
+            bump_catalog_version()
+
+    bump()
+    # Bump again once the transaction commits: a reader that reloaded the
+    # content mid-transaction could otherwise pin the old rows under the
+    # new version.
+    transaction.on_commit(bump)
+
+
+# -------------------------------------------------
+# Invalidation signals
+# NOTE: queryset.update() / bulk_create() bypass these,
+# call bump_content_version() / bump_catalog_version() yourself after bulk writes.
+# -------------------------------------------------
+# Deleting a quiz/question cascades to thousands of rows; remember what is
+# going away (pre_delete runs before any row is deleted) so the children
+# don't each bump - or query - on their way out.
+def _deleting(kind):
+    if not hasattr(_local, kind):
+        setattr(_local, kind, {})
+    return getattr(_local, kind)
+
+
+@receiver(pre_delete, sender=Quiz)
+def quiz_deleting(sender, instance, **kwargs):
+    _deleting('quizzes')[instance.pk] = True
+
+
+@receiver(pre_delete, sender=Question)
+def question_deleting(sender, instance, **kwargs):
+    _deleting('questions')[instance.pk] = instance.quiz_id
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    _deleting('quizzes').pop(instance.pk, None)
+    _bump(instance.pk, catalog=True)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    _deleting('questions').pop(instance.pk, None)
+    if instance.quiz_id in _deleting('quizzes'):
+        return
+    # Question counts show up in the catalog too
+    _bump(instance.quiz_id, catalog=True)
+
+
+@receiver([post_save, post_delete], sender=Option)
+def option_changed(sender, instance, **kwargs):
+    if getattr(_local, 'deferred', False) or instance.question_id in _deleting('questions'):
+        return
+    quiz_id = (
+        Question.objects
+        .filter(pk=instance.question_id)
+        .values_list('quiz_id', flat=True)
+        .first()
+    )
+    _bump(quiz_id)
@@ -0,0 +1,226 @@
+"""
+Grading engine.
+
+A quiz is graded against a compact answer key (question id -> correct option
+id) that is loaded in a fixed number of queries and cached both in-process
+and in Django's cache. Grading itself is a plain dictionary comparison, so
+submit cost does not grow with the number of questions.
+"""
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+
+from .content import get_content_version, get_content_versions
+from .models import Quiz, Question, Option
+from .routing import primary
+
+
+ANSWER_KEY_CACHE_KEY = 'quiz:{quiz_id}:answer_key:v2:{version}'
+LOCAL_CACHE_SIZE = 256
+
+
+class AnswerKey:
+    """Everything needed to grade (and review) one quiz."""
+
+    __slots__ = ('quiz_id', 'version', 'title', 'time_minutes', 'sample_size', 'shuffle_options',
+                 'questions', 'correct')
+
+    def __init__(self, quiz_id, version, questions, title='', time_minutes=10, sample_size=None,
+                 shuffle_options=False):
+        self.quiz_id = quiz_id
+        self.version = version
+        self.title = title
+        self.time_minutes = time_minutes
+        # Question pool settings (see api/sampling.py)
+        self.sample_size = sample_size
+        self.shuffle_options = shuffle_options
+        # [(question_id, text, [(option_id, text), ...]), ...] in quiz order
+        self.questions = questions
+        # {question_id: correct_option_id or None}
+        self.correct = {}
+
+    @property
+    def total(self):
+        return len(self.questions)
+
+    @property
+    def randomized(self):
+        """True when every attempt gets its own draw of questions / option order."""
+        sampled = self.sample_size is not None and self.sample_size < self.total
+        return sampled or self.shuffle_options
+
+    @classmethod
+    def load(cls, quiz_id, version):
+        """Build the key from the database (3 queries, whatever the quiz size)."""
+        return cls.load_many({quiz_id: version}).get(quiz_id)
+
+    @classmethod
+    def load_many(cls, versions):
+        """Keys for {quiz_id: version} in the same 3 queries; missing quizzes are left out."""
+        # Always from the primary: the key is cached under the version read before loading
+        with primary():
+            return cls._load_many(versions)
+
+    @classmethod
+    def _load_many(cls, versions):
+        quizzes = (
+            Quiz.objects
+            .filter(pk__in=list(versions))
+            .values('id', 'title', 'time_minutes', 'sample_size', 'shuffle_options')
+        )
+        keys = {}
+        for quiz in quizzes:
+            quiz_id = quiz.pop('id')
+            keys[quiz_id] = cls(quiz_id, versions[quiz_id], [], **quiz)
+        if not keys:
+            return keys
+
+        questions = list(
+            Question.objects
+            .filter(quiz_id__in=list(keys))
+            .order_by('id')
+            .values_list('id', 'quiz_id', 'text')
+        )
+        options = (
+            Option.objects
+            .filter(question__quiz_id__in=list(keys))
+            .order_by('id')
+            .values_list('id', 'question_id', 'text', 'is_correct')
+        )
+
+        by_question = {question_id: [] for question_id, _, _ in questions}
+        quiz_of = {question_id: quiz_id for question_id, quiz_id, _ in questions}
+        for question_id, quiz_id, _ in questions:
+            keys[quiz_id].correct[question_id] = None
+        for option_id, question_id, text, is_correct in options:
+            by_question[question_id].append((option_id, text))
+            if is_correct:
+                keys[quiz_of[question_id]].correct[question_id] = option_id
+
+        for question_id, quiz_id, text in questions:
+            keys[quiz_id].questions.append((question_id, text, by_question[question_id]))
+        return keys
+
+
+# In-process LRU on top of the shared cache; entries carry their version so
+# a bump anywhere in the cluster is picked up on the next lookup.
+_local_keys = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def get_answer_key(quiz_id):
+    """Return the AnswerKey for a quiz, or None if the quiz does not exist."""
+    version = get_content_version(quiz_id)
+
+    with _local_lock:
+        key = _local_keys.get(quiz_id)
+        if key is not None and key.version == version:
+            _local_keys.move_to_end(quiz_id)
+            return key
+
+    cache_key = ANSWER_KEY_CACHE_KEY.format(quiz_id=quiz_id, version=version)
+    key = cache.get(cache_key)
+    if key is None:
+        key = AnswerKey.load(quiz_id, version)
+        if key is None:
+            return None
+        cache.set(cache_key, key)
+
+    with _local_lock:
+        _local_keys[quiz_id] = key
+        _local_keys.move_to_end(quiz_id)
+        while len(_local_keys) > LOCAL_CACHE_SIZE:
+            _local_keys.popitem(last=False)
+    return key
+
+
+def get_answer_keys(quiz_ids):
+    """
+    get_answer_key() for many quizzes at once: {quiz_id: AnswerKey}, missing
+    quizzes left out. Local hits, then one cache get_many, then one load_many()
+    for the rest - the number of round trips does not grow with the quizzes.
+    """
+    versions = get_content_versions(set(quiz_ids))
+    keys = {}
+    with _local_lock:
+        for quiz_id, version in versions.items():
+            key = _local_keys.get(quiz_id)
+            if key is not None and key.version == version:
+                _local_keys.move_to_end(quiz_id)
+                keys[quiz_id] = key
+
+    cache_keys = {
+        ANSWER_KEY_CACHE_KEY.format(quiz_id=quiz_id, version=version): quiz_id
+        for quiz_id, version in versions.items() if quiz_id not in keys
+    }
+    if cache_keys:
+        for cache_key, key in cache.get_many(cache_keys).items():
+            keys[cache_keys[cache_key]] = key
+        missing = {quiz_id: versions[quiz_id] for quiz_id in cache_keys.values() if quiz_id not in keys}
+        if missing:
+            loaded = AnswerKey.load_many(missing)
+            cache.set_many({
+                ANSWER_KEY_CACHE_KEY.format(quiz_id=quiz_id, version=key.version): key
+                for quiz_id, key in loaded.items()
+            })
+            keys.update(loaded)
+
+    with _local_lock:
+        for quiz_id, key in keys.items():
+            _local_keys[quiz_id] = key
+            _local_keys.move_to_end(quiz_id)
+        while len(_local_keys) > LOCAL_CACHE_SIZE:
+            _local_keys.popitem(last=False)
+    return keys
+
+
+def clear_local_cache():
+    with _local_lock:
+        _local_keys.clear()
+
+
+def _as_option_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def grade(answer_key, answers, questions=None):
+    """
+    Grade an answer map ({ "question_id": option_id }) against a key.
+    `questions` restricts grading to one attempt's draw (api/sampling.py);
+    by default every question of the quiz counts.
+    Returns (score, review_data).
+    """
+    score = 0
+    review_data = []
+    correct = answer_key.correct
+
+    for question_id, text, options in (answer_key.questions if questions is None else questions):
+        selected = answers.get(str(question_id))
+        selected_id = _as_option_id(selected) if selected else None
+        correct_id = correct[question_id]
+
+        is_correct = selected_id is not None and selected_id == correct_id
+        if is_correct:
+            score += 1
+
+        review_data.append(review_item(question_id, text, options, selected_id, correct_id, is_correct))
+
+    return score, review_data
+
+
+def review_item(question_id, text, options, selected_id, correct_id, is_correct):
+    """One entry of review_data (submit response, attempt review)."""
+    return {
+        "question_id": question_id,
+        "question_text": text,
+        "user_selected_id": selected_id,
+        "correct_option_id": correct_id,
+        "is_correct": is_correct,
+        "options": [
+            {"id": option_id, "text": option_text} for option_id, option_text in options
+        ]
+    }
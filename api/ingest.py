@@ -0,0 +1,125 @@
+"""
+Submission ingestion.
+
+Two modes, picked with settings.QUIZ_SUBMIT_MODE:
+
+    'sync'    (default) - the attempt, its answers and the leaderboard/stats
+                          updates are written in the request transaction.
+    'outbox'            - the request only appends one PendingAttempt row;
+                          `python manage.py flush_attempts` moves pending rows
+                          into QuizAttempt/AttemptAnswer with bulk_create and
+                          applies leaderboard/stats updates once per batch.
+
+In outbox mode the submitting user's history also reads their pending rows
+(see pending_history), so a fresh result never "disappears" while it waits
+for the worker.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import analysis, leaderboard, stats
+from .models import Quiz, Question, QuizAttempt, AttemptAnswer, PendingAttempt
+
+
+FLUSH_BATCH_SIZE = 500
+
+
+def outbox_enabled():
+    return getattr(settings, 'QUIZ_SUBMIT_MODE', 'sync') == 'outbox'
+
+
+def submit_attempt(user, quiz_id, score, total_questions, percentage, review_data):
+    """Record one graded submission, synchronously or via the outbox."""
+    if outbox_enabled():
+        PendingAttempt.objects.create(
+            user=user, quiz_id=quiz_id, score=score,
+            total_questions=total_questions, percentage=percentage,
+            answers=[
+                [row.question_id, row.option_id, row.is_correct]
+                for row in analysis.answer_rows(None, review_data)
+            ],
+        )
+        return None
+
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.create(
+            user=user, quiz_id=quiz_id, score=score,
+            total_questions=total_questions, percentage=percentage,
+        )
+        AttemptAnswer.objects.bulk_create(analysis.answer_rows(attempt, review_data))
+        leaderboard.record_attempts([attempt])
+        stats.record_attempts([attempt])
+    return attempt
+
+
+def flush(batch_size=FLUSH_BATCH_SIZE):
+    """Move one batch of pending submissions into history. Returns the batch size."""
+    with transaction.atomic():
+        pending = list(
+            PendingAttempt.objects
+            .select_for_update(skip_locked=True) # several workers may run side by side
+            .order_by('id')[:batch_size]
+        )
+        if not pending:
+            return 0
+
+        # Quizzes / users / questions may have been deleted while queued
+        quiz_ids = set(Quiz.objects.filter(id__in={p.quiz_id for p in pending}).values_list('id', flat=True))
+        user_ids = set(User.objects.filter(id__in={p.user_id for p in pending}).values_list('id', flat=True))
+        live = [p for p in pending if p.quiz_id in quiz_ids and p.user_id in user_ids]
+        question_ids = set(
+            Question.objects
+            .filter(id__in={answer[0] for p in live for answer in p.answers})
+            .values_list('id', flat=True)
+        )
+
+        attempts = QuizAttempt.objects.bulk_create([
+            QuizAttempt(
+                user_id=p.user_id, quiz_id=p.quiz_id, score=p.score,
+                total_questions=p.total_questions, percentage=p.percentage,
+                completed_at=p.submitted_at,
+            )
+            for p in live
+        ])
+        AttemptAnswer.objects.bulk_create([
+            AttemptAnswer(attempt=attempt, question_id=question_id, option_id=option_id, is_correct=is_correct)
+            for attempt, p in zip(attempts, live)
+            for question_id, option_id, is_correct in p.answers
+            if question_id in question_ids
+        ], batch_size=FLUSH_BATCH_SIZE * 10)
+
+        leaderboard.record_attempts(attempts)
+        stats.record_attempts(attempts)
+
+        PendingAttempt.objects.filter(id__in=[p.id for p in pending]).delete()
+    return len(pending)
+
+
+def pending_history(user, limit=None):
+    """The user's (`limit` newest) not-yet-flushed attempts, newest first, shaped like UserHistoryView rows."""
+    if not outbox_enabled() or limit == 0:
+        return []
+    rows = list(
+        PendingAttempt.objects
+        .filter(user=user)
+        .order_by('-submitted_at', '-id')
+        .values('quiz_id', 'score', 'total_questions', 'percentage', 'submitted_at')
+        [:limit]
+    )
+    if not rows:
+        return rows
+    titles = dict(
+        Quiz.objects.filter(id__in={row['quiz_id'] for row in rows}).values_list('id', 'title')
+    )
+    return [
+        {
+            'id': None, # assigned when the worker flushes it
+            'quiz__title': titles.get(row['quiz_id'], ''),
+            'score': row['score'],
+            'total_questions': row['total_questions'],
+            'percentage': row['percentage'],
+            'completed_at': row['submitted_at'],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,255 @@
+"""
+Request instrumentation.
+
+InstrumentationMiddleware (first in MIDDLEWARE) times every request and,
+for a sampled fraction of them (settings.INSTRUMENTATION_SAMPLE_RATE), also
+records every SQL query through a connection execute_wrapper. Per request:
+
+    total   - whole middleware stack
+    view    - view function (for DRF: including serializer.data)
+    render  - response rendering (DRF's JSON renderer), after the view returns
+    db      - time spent in SQL, and the number of queries
+
+Results go to
+
+    - a Server-Timing header (browser dev tools show it next to the request)
+    - the 'api.slow_requests' logger, as one JSON line with the slowest
+      queries, when total >= settings.SLOW_REQUEST_MS
+    - in-process per-route latency histograms, served to staff by
+      GET /api/metrics/ (DELETE resets them). Each worker process keeps its
+      own; scrape them all to get the full picture.
+
+Unsampled requests cost two perf_counter() calls and a histogram update.
+"""
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('api.slow_requests')
+
+# Upper bounds in ms; the last bucket catches everything slower
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+SQL_PREVIEW = 500
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class RequestStats:
+    __slots__ = ('started', 'view_started', 'view_ended', 'sampled', 'queries', 'db_seconds', 'worst')
+
+    def __init__(self, sampled):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_ended = None
+        self.sampled = sampled
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.worst = [] # [(seconds, sql)], slowest first, at most WORST_QUERIES
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            keep = _setting('INSTRUMENTATION_WORST_QUERIES', 3)
+            if len(self.worst) < keep or elapsed > self.worst[-1][0]:
+                self.worst.append((elapsed, sql))
+                self.worst.sort(key=lambda item: -item[0])
+                del self.worst[keep:]
+
+
+class Histograms:
+    """Per-route latency histograms, shared by all threads of this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, total_ms, stats):
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'buckets': [0] * len(BUCKETS_MS),
+                    'sampled': 0, 'db_ms': 0.0, 'queries': 0,
+                }
+            entry['count'] += 1
+            entry['total_ms'] += total_ms
+            entry['max_ms'] = max(entry['max_ms'], total_ms)
+            for index, bound in enumerate(BUCKETS_MS):
+                if total_ms <= bound:
+                    entry['buckets'][index] += 1
+                    break
+            if stats.sampled:
+                entry['sampled'] += 1
+                entry['db_ms'] += stats.db_seconds * 1000
+                entry['queries'] += stats.queries
+
+    def snapshot(self):
+        with self._lock:
+            routes = {route: {**entry, 'buckets': list(entry['buckets'])} for route, entry in self._routes.items()}
+        return {route: _summarize(entry) for route, entry in sorted(routes.items())}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+def _quantile(buckets, count, fraction):
+    # Upper bound of the bucket holding the requested rank
+    rank = fraction * count
+    seen = 0
+    for bound, hits in zip(BUCKETS_MS, buckets):
+        seen += hits
+        if seen >= rank:
+            return bound if bound != float('inf') else None
+    return None
+
+
+def _summarize(entry):
+    count, sampled = entry['count'], entry['sampled']
+    return {
+        'count': count,
+        'mean_ms': round(entry['total_ms'] / count, 2),
+        'max_ms': round(entry['max_ms'], 2),
+        'p50_ms': _quantile(entry['buckets'], count, 0.50),
+        'p95_ms': _quantile(entry['buckets'], count, 0.95),
+        'p99_ms': _quantile(entry['buckets'], count, 0.99),
+        'buckets': {
+            ('+Inf' if bound == float('inf') else str(bound)): hits
+            for bound, hits in zip(BUCKETS_MS, entry['buckets'])
+        },
+        'sampled': sampled,
+        'db_ms_per_request': round(entry['db_ms'] / sampled, 2) if sampled else None,
+        'queries_per_request': round(entry['queries'] / sampled, 2) if sampled else None,
+    }
+
+
+histograms = Histograms()
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return f"{request.method} /{match.route}" if match else f"{request.method} <unmatched>"
+
+
+class InstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def _start(self):
+        return RequestStats(sampled=random.random() < _setting('INSTRUMENTATION_SAMPLE_RATE', 1.0))
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = request._instrumentation = self._start()
+        with ExitStack() as stack:
+            if stats.sampled:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        self._finish(request, response, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = request._instrumentation = self._start()
+        # The async ORM runs queries in the thread-sensitive executor, so
+        # the wrapper has to be installed on that thread's connections.
+        # ASGIHandler gives every request its own ThreadSensitiveContext,
+        # i.e. its own such thread: the wrapper sees all of this request's
+        # queries (async ORM and sync_to_async'd code alike) and none of a
+        # concurrent one's. Only sync_to_async(thread_sensitive=False) would
+        # escape it, and api/ never uses that.
+        if stats.sampled:
+            await sync_to_async(_install)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            if stats.sampled:
+                await sync_to_async(_uninstall)(stats)
+        self._finish(request, response, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = getattr(request, '_instrumentation', None)
+        if stats is not None:
+            stats.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Runs right after the view, before DRF renders the response
+        stats = getattr(request, '_instrumentation', None)
+        if stats is not None:
+            stats.view_ended = time.perf_counter()
+        return response
+
+    def _finish(self, request, response, stats):
+        ended = time.perf_counter()
+        total_ms = (ended - stats.started) * 1000
+        view_ms = render_ms = None
+        if stats.view_started is not None:
+            view_end = stats.view_ended or ended
+            view_ms = (view_end - stats.view_started) * 1000
+            render_ms = (ended - view_end) * 1000 if stats.view_ended else 0.0
+
+        route = _route(request)
+        histograms.record(route, total_ms, stats)
+
+        if _setting('INSTRUMENTATION_SERVER_TIMING', True):
+            timings = [f'total;dur={total_ms:.1f}']
+            if view_ms is not None:
+                timings.append(f'view;dur={view_ms:.1f}')
+                timings.append(f'render;dur={render_ms:.1f}')
+            if stats.sampled:
+                timings.append(f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"')
+            response['Server-Timing'] = ', '.join(timings)
+
+        if total_ms >= _setting('SLOW_REQUEST_MS', 500):
+            logger.warning(json.dumps({
+                'event': 'slow_request',
+                'method': request.method,
+                'path': request.path,
+                'route': route,
+                'status': response.status_code,
+                'total_ms': round(total_ms, 1),
+                'view_ms': round(view_ms, 1) if view_ms is not None else None,
+                'render_ms': round(render_ms, 1) if render_ms is not None else None,
+                'sampled': stats.sampled,
+                'db_ms': round(stats.db_seconds * 1000, 1) if stats.sampled else None,
+                'queries': stats.queries if stats.sampled else None,
+                'worst_queries': [
+                    {'ms': round(seconds * 1000, 2), 'sql': sql[:SQL_PREVIEW]}
+                    for seconds, sql in stats.worst
+                ],
+            }))
+
+
+def _install(stats):
+    for connection in connections.all():
+        connection.execute_wrappers.append(stats)
+
+
+def _uninstall(stats):
+    for connection in connections.all():
+        if stats in connection.execute_wrappers:
+            connection.execute_wrappers.remove(stats)
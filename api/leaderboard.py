@@ -0,0 +1,279 @@
+"""
+Leaderboards.
+
+Per-user totals live in LeaderboardScore, one row per (board, user), and are
+updated incrementally whenever attempts are recorded instead of summing the
+whole QuizAttempt table on every request. Boards:
+
+    'all'              - sum of all scores (the classic leaderboard)
+    'week:YYYY-MM-DD'  - sum of scores for the week starting that Monday
+    'quiz:<id>'        - best score on one quiz
+
+Top-N and neighbour lookups are range scans on the (board, -score, user)
+index, so they never touch QuizAttempt. Ranks come from LeaderboardBucket,
+a per-board histogram of users per score kept in step with the totals: a
+rank is the sum of the buckets above the user's score plus the ties ahead
+of them, so it costs the number of distinct higher scores rather than the
+number of users ahead. Buckets left empty stay behind (they sum to zero)
+until the next rebuild.
+
+If the totals drift (attempts deleted by hand, ...) run
+`python manage.py rebuild_leaderboard`.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Q, Sum, Max, Value, When
+from django.db.models.functions import TruncWeek
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import LeaderboardBucket, LeaderboardScore, QuizAttempt
+
+
+ALL_TIME = 'all'
+REBUILD_BATCH_SIZE = 2000
+# Lost races against concurrent first entries before giving up
+CREATE_RETRIES = 3
+
+
+def week_board(when=None):
+    when = timezone.localtime(when or timezone.now())
+    monday = when.date() - timedelta(days=when.weekday())
+    return f'week:{monday.isoformat()}'
+
+
+def quiz_board(quiz_id):
+    return f'quiz:{quiz_id}'
+
+
+def resolve_board(params):
+    """Map request query params (?period=week / ?quiz=<id>) to a board key."""
+    quiz_id = params.get('quiz')
+    if quiz_id:
+        return quiz_board(int(quiz_id))
+    if params.get('period') == 'week':
+        return week_board()
+    return ALL_TIME
+
+
+# -------------------------------------------------
+# Writes
+# -------------------------------------------------
+def record_attempts(attempts):
+    """
+    Fold newly saved attempts into the boards.
+    Works on any number of attempts; deltas are merged per (board, user)
+    first, and the touched rows and their buckets are read and written in
+    bulk, so a batch costs the same handful of queries as one attempt.
+    """
+    sums = defaultdict(int)
+    bests = {}
+    for attempt in attempts:
+        when = attempt.completed_at or timezone.now()
+        sums[(ALL_TIME, attempt.user_id)] += attempt.score
+        sums[(week_board(when), attempt.user_id)] += attempt.score
+        key = (quiz_board(attempt.quiz_id), attempt.user_id)
+        bests[key] = max(bests.get(key, attempt.score), attempt.score)
+    if not sums:
+        return
+
+    # No savepoint: inside a submit/flush a failure aborts the caller's transaction anyway
+    with transaction.atomic(savepoint=False):
+        for retry in range(CREATE_RETRIES):
+            # Lock the rows being changed, so the buckets they leave are the right ones
+            current = {
+                (board, user_id): (pk, score)
+                for pk, board, user_id, score in (
+                    LeaderboardScore.objects.select_for_update()
+                    .filter(_any({'board': board, 'user_id': user_id} for board, user_id in [*sums, *bests]))
+                    .values_list('id', 'board', 'user_id', 'score')
+                )
+            }
+            missing = [
+                LeaderboardScore(board=board, user_id=user_id, score=score)
+                for (board, user_id), score in [*sums.items(), *bests.items()]
+                if (board, user_id) not in current
+            ]
+            if not missing:
+                break
+            try:
+                with transaction.atomic():
+                    LeaderboardScore.objects.bulk_create(missing)
+                break
+            except IntegrityError:
+                # Another request created one of the rows in the meantime; lock it and go again
+                if retry == CREATE_RETRIES - 1:
+                    raise
+
+        moves = Counter()
+        changed = []
+        for key, (pk, old) in current.items():
+            new = old + sums[key] if key in sums else max(old, bests[key])
+            if new != old:
+                changed.append(LeaderboardScore(pk=pk, score=new))
+                moves[(key[0], old)] -= 1
+                moves[(key[0], new)] += 1
+        for key, score in [*sums.items(), *bests.items()]:
+            if key not in current:
+                moves[(key[0], score)] += 1
+
+        LeaderboardScore.objects.bulk_update(changed, ['score'])
+        _move_buckets(moves)
+
+
+def _any(conditions):
+    return reduce(or_, (Q(**condition) for condition in conditions))
+
+
+def _move_buckets(moves):
+    """Apply {(board, score): change in users} to the histogram in two queries."""
+    moves = {key: change for key, change in moves.items() if change}
+    if not moves:
+        return
+    LeaderboardBucket.objects.bulk_create(
+        [LeaderboardBucket(board=board, score=score) for (board, score), change in moves.items() if change > 0],
+        ignore_conflicts=True,
+    )
+    LeaderboardBucket.objects.filter(
+        _any({'board': board, 'score': score} for board, score in moves)
+    ).update(users=F('users') + Case(
+        *(When(board=board, score=score, then=Value(change)) for (board, score), change in moves.items()),
+        default=Value(0),
+    ))
+
+
+@receiver(pre_delete, sender=User)
+def _leave_boards(sender, instance, **kwargs):
+    # The user's LeaderboardScore rows go with them (CASCADE); take them out of the buckets
+    moves = Counter()
+    for board, score in LeaderboardScore.objects.filter(user=instance).values_list('board', 'score'):
+        moves[(board, score)] -= 1
+    _move_buckets(moves)
+
+
+def rebuild():
+    """Recompute every board from QuizAttempt."""
+    def rows():
+        totals = QuizAttempt.objects.values('user_id').annotate(total=Sum('score')).order_by()
+        for row in totals.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            yield LeaderboardScore(board=ALL_TIME, user_id=row['user_id'], score=row['total'])
+
+        weekly = (
+            QuizAttempt.objects
+            .annotate(week=TruncWeek('completed_at'))
+            .values('week', 'user_id')
+            .annotate(total=Sum('score'))
+            .order_by()
+        )
+        for row in weekly.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            yield LeaderboardScore(board=week_board(row['week']), user_id=row['user_id'], score=row['total'])
+
+        best = QuizAttempt.objects.values('quiz_id', 'user_id').annotate(best=Max('score')).order_by()
+        for row in best.iterator(chunk_size=REBUILD_BATCH_SIZE):
+            yield LeaderboardScore(board=quiz_board(row['quiz_id']), user_id=row['user_id'], score=row['best'])
+
+    created = 0
+    with transaction.atomic():
+        LeaderboardScore.objects.all().delete()
+        batch = []
+        for entry in rows():
+            batch.append(entry)
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                LeaderboardScore.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+        LeaderboardScore.objects.bulk_create(batch)
+        created += len(batch)
+
+        LeaderboardBucket.objects.all().delete()
+        buckets = LeaderboardScore.objects.values('board', 'score').annotate(users=Count('id')).order_by()
+        LeaderboardBucket.objects.bulk_create(
+            (LeaderboardBucket(board=row['board'], score=row['score'], users=row['users'])
+             for row in buckets.iterator(chunk_size=REBUILD_BATCH_SIZE)),
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+    return created
+
+
+# -------------------------------------------------
+# Reads
+# -------------------------------------------------
+def _entry(rank, score_row):
+    user = score_row.user
+    return {
+        "rank": rank,
+        "username": user.username,
+        "name": f"{user.first_name} {user.last_name}".strip() or user.username,
+        "score": score_row.score,
+    }
+
+
+def _ranked(board):
+    return (
+        LeaderboardScore.objects
+        .filter(board=board)
+        .select_related('user')
+        .only('score', 'user__username', 'user__first_name', 'user__last_name')
+    )
+
+
+def top(board, limit=10):
+    rows = _ranked(board).order_by('-score', 'user_id')[:limit]
+    return [_entry(index + 1, row) for index, row in enumerate(rows)]
+
+
+def rank_of(board, user, neighbours=2):
+    """The user's own entry plus `neighbours` entries above and below."""
+    mine = _ranked(board).filter(user=user).first()
+    if mine is None:
+        return {"board": board, "me": None, "above": [], "below": []}
+
+    # Everyone in the buckets above the user's score, plus the ties ordered before them
+    higher = LeaderboardBucket.objects.filter(board=board, score__gt=mine.score).aggregate(users=Sum('users'))
+    ties = LeaderboardScore.objects.filter(board=board, score=mine.score, user_id__lt=user.pk).count()
+    rank = (higher['users'] or 0) + ties + 1
+    above = list(_ranked(board).filter(_above(mine.score, user.pk)).order_by('score', '-user_id')[:neighbours])
+    below = _ranked(board).filter(_below(mine.score, user.pk)).order_by('-score', 'user_id')[:neighbours]
+    return _around(board, rank, mine, above, below)
+
+
+def _above(score, user_id):
+    return Q(score__gt=score) | Q(score=score, user_id__lt=user_id)
+
+
+def _below(score, user_id):
+    return Q(score__lt=score) | Q(score=score, user_id__gt=user_id)
+
+
+def _around(board, rank, mine, above, below):
+    return {
+        "board": board,
+        "me": _entry(rank, mine),
+        "above": [_entry(rank - index - 1, row) for index, row in enumerate(above)][::-1],
+        "below": [_entry(rank + index + 1, row) for index, row in enumerate(below)],
+    }
+
+
+# Async twins for api/async_views.py
+async def atop(board, limit=10):
+    rows = [row async for row in _ranked(board).order_by('-score', 'user_id')[:limit]]
+    return [_entry(index + 1, row) for index, row in enumerate(rows)]
+
+
+async def arank_of(board, user, neighbours=2):
+    mine = await _ranked(board).filter(user=user).afirst()
+    if mine is None:
+        return {"board": board, "me": None, "above": [], "below": []}
+
+    higher = await LeaderboardBucket.objects.filter(board=board, score__gt=mine.score).aaggregate(users=Sum('users'))
+    ties = await LeaderboardScore.objects.filter(board=board, score=mine.score, user_id__lt=user.pk).acount()
+    rank = (higher['users'] or 0) + ties + 1
+    above = [row async for row in _ranked(board).filter(_above(mine.score, user.pk)).order_by('score', '-user_id')[:neighbours]]
+    below = [row async for row in _ranked(board).filter(_below(mine.score, user.pk)).order_by('-score', 'user_id')[:neighbours]]
+    return _around(board, rank, mine, above, below)
@@ -0,0 +1,158 @@
+"""
+Transactional email outbox.
+
+Requests never talk to the mail server: they append one OutboundEmail row
+(deduplicated per address while pending) and return. `python manage.py
+send_emails` picks due rows in batches, resolves the recipient, renders the
+message and sends the whole batch over one reused connection. Failures are
+retried with exponential backoff up to MAX_ATTEMPTS.
+
+A batch is claimed in a short transaction (its rows are pushed CLAIM_TIMEOUT
+into the future, so other workers skip them) and sent after the commit: no
+row locks are held while talking to the mail server. A worker that dies
+mid-batch leaves its rows to be picked up again once the claim runs out.
+
+Works with any EMAIL_BACKEND (console, locmem and filebased included).
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.core.validators import EmailValidator
+from django.db import transaction
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from .models import OutboundEmail
+
+
+PASSWORD_RESET = 'password_reset'
+FROM_EMAIL = "noreply@quizapp.com"
+SEND_BATCH_SIZE = 100
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 30 # 30s, 1m, 2m, 4m ...
+RESEND_COOLDOWN = timedelta(minutes=5) # one reset mail per address per window
+RETENTION = timedelta(days=7)
+CLAIM_TIMEOUT = timedelta(minutes=5) # longer than a batch takes to send
+MAX_EMAIL_LENGTH = OutboundEmail._meta.get_field('email').max_length
+
+_validate_email = EmailValidator()
+
+
+def queue(kind, email):
+    """
+    Queue a message. One INSERT whether or not the address belongs to anyone;
+    anything that isn't an email address is dropped without one. Returns
+    whether a message was queued (not for the client's eyes).
+    """
+    if not isinstance(email, str) or len(email) > MAX_EMAIL_LENGTH:
+        return False
+    try:
+        _validate_email(email)
+    except ValidationError:
+        return False
+    OutboundEmail.objects.bulk_create([OutboundEmail(kind=kind, email=email)], ignore_conflicts=True)
+    return True
+
+
+def queue_password_reset(email):
+    return queue(PASSWORD_RESET, email)
+
+
+def _password_reset(user):
+    token = default_token_generator.make_token(user)
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    reset_link = f"http://localhost:5173/reset-password?uid={uid}&token={token}"
+    return "Password Reset Request", f"Click the link to reset your password: {reset_link}"
+
+
+RENDERERS = {
+    PASSWORD_RESET: _password_reset,
+}
+
+
+def backoff(attempts):
+    return timedelta(seconds=BACKOFF_SECONDS * 2 ** (attempts - 1))
+
+
+def send_batch(batch_size=SEND_BATCH_SIZE):
+    """Deliver one batch of due messages. Returns how many rows were handled."""
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True) # several workers may run side by side
+            .filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        emails = {row.email for row in rows}
+        users = {}
+        for user in User.objects.filter(email__in=emails, is_active=True).order_by('-id'):
+            users[user.email] = user # lowest id wins, like the old .first()
+        recent = set(
+            OutboundEmail.objects
+            .filter(status=OutboundEmail.SENT, email__in=emails, sent_at__gte=now - RESEND_COOLDOWN)
+            .values_list('kind', 'email')
+        )
+
+        # Unknown addresses and repeats inside the cooldown are dropped silently
+        deliverable = [
+            row for row in rows
+            if row.email in users and (row.kind, row.email) not in recent and row.kind in RENDERERS
+        ]
+        dropped = [row.id for row in rows if row not in deliverable]
+
+        if deliverable:
+            OutboundEmail.objects.filter(id__in=[row.id for row in deliverable]).update(
+                next_attempt_at=now + CLAIM_TIMEOUT,
+            )
+        OutboundEmail.objects.filter(id__in=dropped).delete()
+        OutboundEmail.objects.filter(status=OutboundEmail.SENT, sent_at__lt=now - RETENTION).delete()
+
+    # Claimed and committed: send without holding any locks
+    if deliverable:
+        _deliver(deliverable, users, now)
+        OutboundEmail.objects.bulk_update(
+            deliverable, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'],
+        )
+    return len(rows)
+
+
+def _deliver(rows, users, now):
+    connection = mail.get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        for row in rows:
+            _failed(row, exc, now)
+        return
+
+    try:
+        for row in rows:
+            subject, body = RENDERERS[row.kind](users[row.email])
+            message = mail.EmailMessage(subject, body, FROM_EMAIL, [row.email], connection=connection)
+            try:
+                message.send()
+            except Exception as exc:
+                _failed(row, exc, now)
+            else:
+                row.status = OutboundEmail.SENT
+                row.sent_at = now
+                row.last_error = ''
+    finally:
+        connection.close()
+
+
+def _failed(row, exc, now):
+    row.attempts += 1
+    row.last_error = f"{type(exc).__name__}: {exc}"[:1000]
+    if row.attempts >= MAX_ATTEMPTS:
+        row.status = OutboundEmail.FAILED
+    else:
+        row.next_attempt_at = now + backoff(row.attempts)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import avatars
+
+
+class Command(BaseCommand):
+    help = "Delete avatar files no profile references (pre-thumbnail uploads, thumbnail sets of deleted accounts)."
+
+    def handle(self, *args, **options):
+        removed = avatars.sweep()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} unused avatar sets / files."))
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api import sessions
+
+
+class Command(BaseCommand):
+    help = "Delete quiz sessions (submitted or abandoned) whose deadline passed long ago."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-hours', type=float, default=24,
+                            help="Keep sessions whose deadline is more recent than this.")
+        parser.add_argument('--batch-size', type=int, default=sessions.EXPIRE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = sessions.expire(
+            timedelta(hours=options['older_than_hours']), batch_size=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired quiz sessions."))
@@ -0,0 +1,25 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from api import bank
+
+
+class Command(BaseCommand):
+    help = "Stream quizzes, questions and options to a JSONL or CSV file (or '-' for stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=sorted(bank.EXPORTERS), default='jsonl')
+        parser.add_argument('--quiz', type=int, action='append', dest='quizzes',
+                            help="Only export this quiz id (repeatable).")
+        parser.add_argument('--chunk-size', type=int, default=bank.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        lines = bank.EXPORTERS[options['format']](quiz_ids=options['quizzes'], chunk_size=options['chunk_size'])
+        if options['path'] == '-':
+            sys.stdout.writelines(lines)
+            return
+        with open(options['path'], 'w', encoding='utf-8', newline='') as out:
+            out.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f"Exported to {options['path']}"))
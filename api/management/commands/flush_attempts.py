@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import ingest
+
+
+class Command(BaseCommand):
+    help = "Move queued submissions (QUIZ_SUBMIT_MODE='outbox') into QuizAttempt in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=ingest.FLUSH_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep running, polling for new submissions.")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is empty (with --loop).")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            flushed = ingest.flush(batch_size=options['batch_size'])
+            total += flushed
+            if flushed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Flushed {total} attempts."))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api import synthetic
+from api.models import Quiz
+
+
+class Command(BaseCommand):
+    help = "Generate users, quizzes and attempts with realistic distributions for load testing (see api/synthetic.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--quizzes', type=int, default=50)
+        parser.add_argument('--questions', default='10-30',
+                            help="Questions per quiz, 'N' or 'MIN-MAX'.")
+        parser.add_argument('--options', type=int, default=4, help="Options per question.")
+        parser.add_argument('--attempts', type=int, default=100_000)
+        parser.add_argument('--answers', action='store_true',
+                            help="Also write per-question AttemptAnswer rows (and rebuild item analysis).")
+        parser.add_argument('--days', type=int, default=180, help="Spread attempts over this many days.")
+        parser.add_argument('--prefix', default='bench', help="Username prefix.")
+        parser.add_argument('--password', default=synthetic.PASSWORD, help="Password for every generated user.")
+        parser.add_argument('--seed', type=int, help="Random seed for a reproducible dataset.")
+        parser.add_argument('--batch-size', type=int, default=synthetic.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        low, _, high = options['questions'].partition('-')
+        try:
+            min_questions, max_questions = int(low), int(high or low)
+        except ValueError:
+            raise CommandError("--questions must be N or MIN-MAX")
+        if options['options'] < 2:
+            raise CommandError("--options must be at least 2")
+
+        generator = synthetic.Generator(
+            seed=options['seed'], batch_size=options['batch_size'], log=self.stdout.write,
+        )
+        with transaction.atomic():
+            user_ids = generator.users(options['users'], prefix=options['prefix'], password=options['password'])
+            quiz_key = generator.quizzes(options['quizzes'], min_questions, max_questions, options['options'])
+        if not user_ids or not quiz_key:
+            raise CommandError("Need at least one user and one quiz")
+
+        # Committed per batch, so an interrupted run keeps what it wrote
+        generator.attempts(options['attempts'], user_ids, quiz_key, days=options['days'], answers=options['answers'])
+        generator.rebuild_aggregates(answers=options['answers'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {len(user_ids)} users, {len(quiz_key)} quizzes, {options['attempts']} attempts "
+            f"({Quiz.objects.count()} quizzes in the database)."
+        ))
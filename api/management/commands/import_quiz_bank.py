@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import bank
+
+
+class Command(BaseCommand):
+    help = "Stream-import quizzes, questions and options from a JSONL or CSV file (see api/bank.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=sorted(bank.READERS),
+                            help="Defaults to the file extension.")
+        parser.add_argument('--upsert', action='store_true',
+                            help="Update rows whose external_id already exists instead of skipping them.")
+        parser.add_argument('--chunk-size', type=int, default=bank.CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Validate only, write nothing.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or path.rsplit('.', 1)[-1].lower()
+        if fmt not in bank.READERS:
+            raise CommandError(f"Unknown format {fmt!r}; pass --format jsonl|csv")
+
+        with open(path, encoding='utf-8', newline='') as lines:
+            report = bank.import_bank(
+                lines, fmt=fmt, upsert=options['upsert'],
+                chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+            )
+
+        for error in report.errors:
+            self.stderr.write(error)
+        if report.skipped > len(report.errors):
+            self.stderr.write(f"... and {report.skipped - len(report.errors)} more")
+        self.stdout.write(self.style.SUCCESS(report.summary()))
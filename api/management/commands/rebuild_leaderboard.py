@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recompute all leaderboard totals (all-time, weekly, per-quiz) from QuizAttempt."
+
+    def handle(self, *args, **options):
+        created = leaderboard.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt leaderboards: {created} entries."))
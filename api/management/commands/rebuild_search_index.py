@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api import search
+
+
+class Command(BaseCommand):
+    help = "Re-index every quiz for catalog search (Postgres documents; in-process indexes rebuild on their next search)."
+
+    def handle(self, *args, **options):
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Re-indexed {count} quizzes."))
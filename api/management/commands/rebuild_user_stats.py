@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api import stats
+
+
+class Command(BaseCommand):
+    help = "Recompute per-user stats (UserStats) from QuizAttempt."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', dest='users',
+                            help="Only repair this user id (repeatable).")
+
+    def handle(self, *args, **options):
+        written = stats.rebuild(user_ids=options['users'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {written} users."))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import mailer
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails (password resets, ...) in batches over one SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=mailer.SEND_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true',
+                            help="Keep running, polling for new messages.")
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help="Seconds to sleep when nothing is due (with --loop).")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            handled = mailer.send_batch(batch_size=options['batch_size'])
+            total += handled
+            if handled:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} queued emails."))
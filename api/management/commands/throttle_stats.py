@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import throttling
+
+
+class Command(BaseCommand):
+    help = "Show how many requests each throttle budget allowed / rejected (shed load)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing.")
+
+    def handle(self, *args, **options):
+        budgets = throttling.configured_budgets()
+        for budget, counts in throttling.metrics(budgets).items():
+            total = counts['allowed'] + counts['rejected']
+            shed = counts['rejected'] / total * 100 if total else 0
+            self.stdout.write(f"{budget:<20} allowed={counts['allowed']:<8} rejected={counts['rejected']:<8} shed={shed:.1f}%")
+        if options['reset']:
+            throttling.reset_metrics(budgets)
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
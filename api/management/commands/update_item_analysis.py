@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api import analysis
+
+
+class Command(BaseCommand):
+    help = "Fold new AttemptAnswer rows into per-question / per-option item stats."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=analysis.BATCH_SIZE)
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Drop all stats and recompute them from every stored answer.")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            processed = analysis.rebuild()
+        else:
+            processed = analysis.run(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} answers."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api import recommend
+
+
+class Command(BaseCommand):
+    help = "Fold new QuizAttempt rows into the user x quiz score matrix behind /api/recommendations/."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=recommend.BATCH_SIZE)
+        parser.add_argument('--rebuild', action='store_true',
+                            help="Drop the matrix and recompute it from every attempt.")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            processed = recommend.rebuild()
+        else:
+            processed = recommend.run(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} attempts."))
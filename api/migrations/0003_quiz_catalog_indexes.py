@@ -0,0 +1,47 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:16
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def keep_one_correct_option(apps, schema_editor):
+    # The constraint below refuses to build while any question has several
+    # correct options. Grading always used the first of them (lowest id),
+    # so keep that one and clear the flag on the others.
+    Option = apps.get_model('api', 'Option')
+    duplicates = list(
+        Option.objects.filter(is_correct=True)
+        .values('question_id')
+        .annotate(correct=Count('id'), keep=Min('id'))
+        .filter(correct__gt=1)
+        .order_by('question_id')
+    )
+    for row in duplicates:
+        Option.objects.filter(question_id=row['question_id'], is_correct=True).exclude(id=row['keep']).update(is_correct=False)
+    if duplicates:
+        ids = ', '.join(str(row['question_id']) for row in duplicates[:20])
+        more = f" (+{len(duplicates) - 20} more)" if len(duplicates) > 20 else ""
+        print(f"\n  Kept only the first correct option on {len(duplicates)} question(s): {ids}{more}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['created_at', 'id'], name='quiz_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['difficulty', 'created_at', 'id'], name='quiz_difficulty_created_idx'),
+        ),
+        migrations.RunPython(keep_one_correct_option, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='option',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_correct', True)), fields=('question',), name='one_correct_option_per_question'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_leaderboards(apps, schema_editor):
+    # Seed the boards from existing attempts (same as `manage.py rebuild_leaderboard`)
+    from datetime import timedelta
+    from django.db.models import Sum, Max
+    from django.db.models.functions import TruncWeek
+
+    QuizAttempt = apps.get_model('api', 'QuizAttempt')
+    LeaderboardScore = apps.get_model('api', 'LeaderboardScore')
+
+    def week(day):
+        monday = day.date() - timedelta(days=day.weekday())
+        return f'week:{monday.isoformat()}'
+
+    entries = [
+        LeaderboardScore(board='all', user_id=row['user_id'], score=row['total'])
+        for row in QuizAttempt.objects.values('user_id').annotate(total=Sum('score')).order_by()
+    ]
+    entries += [
+        LeaderboardScore(board=week(row['week']), user_id=row['user_id'], score=row['total'])
+        for row in (
+            QuizAttempt.objects.annotate(week=TruncWeek('completed_at'))
+            .values('week', 'user_id').annotate(total=Sum('score')).order_by()
+        )
+    ]
+    entries += [
+        LeaderboardScore(board=f"quiz:{row['quiz_id']}", user_id=row['user_id'], score=row['best'])
+        for row in QuizAttempt.objects.values('quiz_id', 'user_id').annotate(best=Max('score')).order_by()
+    ]
+    LeaderboardScore.objects.bulk_create(entries, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_quiz_catalog_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=40)),
+                ('score', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['board', '-score', 'user'], name='leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('board', 'user'), name='unique_leaderboard_user')],
+            },
+        ),
+        migrations.RunPython(backfill_leaderboards, migrations.RunPython.noop),
+    ]
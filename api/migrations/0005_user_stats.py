@@ -0,0 +1,54 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_user_stats(apps, schema_editor):
+    # Seed stats from existing attempts (same as `manage.py rebuild_user_stats`)
+    from django.db.models import Count
+
+    Quiz = apps.get_model('api', 'Quiz')
+    QuizAttempt = apps.get_model('api', 'QuizAttempt')
+    UserStats = apps.get_model('api', 'UserStats')
+
+    question_counts = dict(Quiz.objects.annotate(n=Count('questions')).values_list('id', 'n'))
+    per_user = {}
+    for user_id, quiz_id, score in QuizAttempt.objects.values_list('user_id', 'quiz_id', 'score').iterator():
+        stats = per_user.get(user_id)
+        if stats is None:
+            stats = per_user[user_id] = UserStats(user_id=user_id, histogram=[0] * 10)
+        stats.attempt_count += 1
+        total = question_counts.get(quiz_id, 0)
+        if total > 0:
+            percentage = score / total * 100
+            stats.graded_count += 1
+            stats.percentage_sum += percentage
+            stats.passed_count += percentage >= 60
+            stats.histogram[min(int(percentage // 10), 9)] += 1
+    UserStats.objects.bulk_create(per_user.values(), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_leaderboard_score'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.IntegerField(default=0)),
+                ('graded_count', models.IntegerField(default=0)),
+                ('percentage_sum', models.FloatField(default=0)),
+                ('passed_count', models.IntegerField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def snapshot_existing_attempts(apps, schema_editor):
+    # Best we can do for old rows: the quiz's current question count
+    from django.db.models import Count, F
+
+    Quiz = apps.get_model('api', 'Quiz')
+    QuizAttempt = apps.get_model('api', 'QuizAttempt')
+
+    for quiz_id, total in Quiz.objects.annotate(n=Count('questions')).values_list('id', 'n'):
+        if total > 0:
+            QuizAttempt.objects.filter(quiz_id=quiz_id).update(
+                total_questions=total,
+                percentage=F('score') * 100.0 / total,
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_user_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='percentage',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='total_questions',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', '-completed_at', '-id'], name='attempt_user_completed_idx'),
+        ),
+        migrations.RunPython(snapshot_existing_attempts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.9 on 2026-10-17 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='sample_size',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='shuffle_options',
+            field=models.BooleanField(default=False),
+        ),
+    ]
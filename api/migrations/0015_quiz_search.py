@@ -0,0 +1,48 @@
+# Generated by Django 5.2.9 on 2026-10-17 18:15
+
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Postgres only: the GIN index and the documents of existing quizzes.
+# SQLite searches an in-process index instead (api/search.py).
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "CREATE INDEX quiz_search_vector_idx ON api_quizsearchdocument USING gin (vector)"
+    )
+    schema_editor.execute("""
+        INSERT INTO api_quizsearchdocument (quiz_id, vector)
+        SELECT quiz.id,
+               setweight(to_tsvector('english', quiz.title), 'A')
+               || setweight(to_tsvector('english', quiz.description), 'B')
+               || setweight(to_tsvector('english', coalesce(string_agg(question.text, ' '), '')), 'C')
+        FROM api_quiz quiz
+        LEFT JOIN api_question question ON question.quiz_id = quiz.id
+        GROUP BY quiz.id
+    """)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS quiz_search_vector_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_attempt_client_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizSearchDocument',
+            fields=[
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='api.quiz')),
+                ('vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+            ],
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-17 18:55
+
+from django.db import migrations, models
+
+
+def backfill_buckets(apps, schema_editor):
+    # One bucket per (board, score) from the existing totals (same as `manage.py rebuild_leaderboard`)
+    from django.db.models import Count
+
+    LeaderboardScore = apps.get_model('api', 'LeaderboardScore')
+    LeaderboardBucket = apps.get_model('api', 'LeaderboardBucket')
+    rows = LeaderboardScore.objects.values('board', 'score').annotate(users=Count('id')).order_by()
+    LeaderboardBucket.objects.bulk_create(
+        (LeaderboardBucket(board=row['board'], score=row['score'], users=row['users']) for row in rows),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_attempt_inserted_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(max_length=40)),
+                ('score', models.IntegerField()),
+                ('users', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('board', 'score'), name='unique_leaderboard_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_buckets, migrations.RunPython.noop),
+    ]
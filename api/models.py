@@ -1,7 +1,11 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
 # -------------------------------------------------
 # 1. Quiz Model (Category / Topic)
@@ -33,6 +37,21 @@ class Quiz(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Stable key for bulk imports (see api/bank.py)
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+
+    # Question pool: serve this many random questions per attempt (NULL = all of them,
+    # in order) and optionally shuffle each question's options (see api/sampling.py)
+    sample_size = models.PositiveIntegerField(null=True, blank=True)
+    shuffle_options = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # Catalog sort order + difficulty filter (QuizListView)
+            models.Index(fields=['created_at', 'id'], name='quiz_created_idx'),
+            models.Index(fields=['difficulty', 'created_at', 'id'], name='quiz_difficulty_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -47,6 +66,8 @@ class Question(models.Model):
         on_delete=models.CASCADE
     )
     text = models.TextField()
+    # Stable key for bulk imports (see api/bank.py)
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
 
     def __str__(self):
         return f"{self.quiz.title} - {self.text[:50]}"
@@ -84,17 +105,256 @@ class QuizAttempt(models.Model):
         on_delete=models.CASCADE
     )
     score = models.IntegerField()
-    completed_at = models.DateTimeField(auto_now_add=True)
+    # Snapshot at submission time, so later quiz edits don't rewrite history
+    total_questions = models.IntegerField(default=0)
+    percentage = models.FloatField(default=0)
+    # Not auto_now_add: attempts flushed from the outbox keep their submit time
+    completed_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Server clock when the row was written, whoever wrote it: the watermark
+    # jobs settle on this, never on completed_at (outbox / client supplied)
+    inserted_at = models.DateTimeField(default=timezone.now, editable=False)
+    # Idempotency key sent by offline clients (batch submissions, see api/batch.py)
+    client_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'client_key'], condition=models.Q(client_key__isnull=False),
+                name='unique_attempt_client_key',
+            ),
+        ]
+        indexes = [
+            # User history, newest first (keyset pagination)
+            models.Index(fields=['user', '-completed_at', '-id'], name='attempt_user_completed_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} | {self.quiz.title} | Score: {self.score}"
 
 
 
+# -------------------------------------------------
+# 5. Submission Outbox (write-behind mode, see api/ingest.py)
+# -------------------------------------------------
+class PendingAttempt(models.Model):
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    quiz_id = models.BigIntegerField()
+    score = models.IntegerField()
+    total_questions = models.IntegerField()
+    percentage = models.FloatField()
+    # [[question_id, option_id or null, is_correct], ...]
+    answers = models.JSONField(default=list)
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+
+
+# -------------------------------------------------
+# 6. Per-Answer Storage (one row per question per attempt)
+# -------------------------------------------------
+class AttemptAnswer(models.Model):
+    attempt = models.ForeignKey(QuizAttempt, related_name='answers', on_delete=models.CASCADE)
+    question = models.ForeignKey(Question, related_name='+', on_delete=models.CASCADE)
+    # NULL = skipped (or an option that no longer exists)
+    option = models.ForeignKey(Option, related_name='+', null=True, on_delete=models.SET_NULL)
+    is_correct = models.BooleanField(default=False)
+
+
+
+# -------------------------------------------------
+# 7. Leaderboard Totals (maintained incrementally, see api/leaderboard.py)
+# -------------------------------------------------
+class LeaderboardScore(models.Model):
+    # 'all', 'week:<monday>' or 'quiz:<id>'
+    board = models.CharField(max_length=40)
+    user = models.ForeignKey(
+        User,
+        related_name='leaderboard_scores',
+        on_delete=models.CASCADE
+    )
+    score = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['board', 'user'], name='unique_leaderboard_user')
+        ]
+        indexes = [
+            # Top-N, rank counting and neighbour lookups are all range scans on this
+            models.Index(fields=['board', '-score', 'user'], name='leaderboard_rank_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.board} | {self.user.username} | {self.score}"
+
+
+# Number of users per (board, score), kept in step with LeaderboardScore:
+# a rank is the sum of the buckets above the user's score, not a count of
+# every row ahead of them
+class LeaderboardBucket(models.Model):
+    board = models.CharField(max_length=40)
+    score = models.IntegerField()
+    users = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also the index for the "buckets above this score" range scan
+            models.UniqueConstraint(fields=['board', 'score'], name='unique_leaderboard_bucket')
+        ]
+
+    def __str__(self):
+        return f"{self.board} | {self.score} | {self.users}"
+
+
+
+# -------------------------------------------------
+# 8. Per-User Stats (maintained incrementally, see api/stats.py)
+# -------------------------------------------------
+class UserStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stats')
+    attempt_count = models.IntegerField(default=0)
+    # Attempts on quizzes that had questions (the ones that count towards the average)
+    graded_count = models.IntegerField(default=0)
+    percentage_sum = models.FloatField(default=0)
+    passed_count = models.IntegerField(default=0)
+    # Attempts per 10% bucket: [0-9, 10-19, ..., 90-100]
+    histogram = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.user.username}'s Stats"
+
+
+
+# -------------------------------------------------
+# 9. Item Analysis (maintained by `manage.py update_item_analysis`)
+# -------------------------------------------------
+class QuestionStats(models.Model):
+    question = models.OneToOneField(Question, primary_key=True, related_name='item_stats', on_delete=models.CASCADE)
+    responses = models.IntegerField(default=0)
+    correct_count = models.IntegerField(default=0)
+    # Running sums of the attempt percentage (y) for the point-biserial index
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+    correct_score_sum = models.FloatField(default=0)
+
+    @property
+    def difficulty(self):
+        """Share of responses that were correct (classic p-value)."""
+        return self.correct_count / self.responses if self.responses else None
+
+    @property
+    def discrimination(self):
+        """Point-biserial correlation between getting this item right and the attempt score."""
+        n, x, y = self.responses, self.correct_count, self.score_sum
+        denominator = (n * x - x * x) * (n * self.score_sq_sum - y * y)
+        if n < 2 or denominator <= 0:
+            return None
+        return (n * self.correct_score_sum - x * y) / denominator ** 0.5
+
+    def __str__(self):
+        return f"Stats for question {self.question_id}"
+
+
+class OptionStats(models.Model):
+    option = models.OneToOneField(Option, primary_key=True, related_name='item_stats', on_delete=models.CASCADE)
+    picks = models.IntegerField(default=0)
+
+
+class AnalysisWatermark(models.Model):
+    # Last row id a batch job has consumed, e.g. 'item_analysis'
+    name = models.CharField(max_length=50, primary_key=True)
+    position = models.BigIntegerField(default=0)
+
+
+
+# -------------------------------------------------
+# 10. Email Outbox (delivered by `manage.py send_emails`, see api/mailer.py)
+# -------------------------------------------------
+class OutboundEmail(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (SENT, 'Sent'), (FAILED, 'Failed')]
+
+    kind = models.CharField(max_length=30) # e.g. 'password_reset'
+    # Only the requested address is stored; the worker resolves the user at send time
+    email = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Repeat requests collapse into the one queued message
+            models.UniqueConstraint(
+                fields=['kind', 'email'], condition=models.Q(status='pending'),
+                name='one_pending_email_per_address',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='email_due_idx'),
+            models.Index(fields=['kind', 'email', 'sent_at'], name='email_recent_idx'),
+        ]
+
+
+
+# -------------------------------------------------
+# 11. Quiz Sessions (started attempts with a deadline, see api/sessions.py)
+# -------------------------------------------------
+class QuizSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    quiz = models.ForeignKey(Quiz, related_name='+', on_delete=models.CASCADE)
+    # Reproduces the option order (and question draw) of the attempt, see api/sampling.py
+    seed = models.BigIntegerField()
+    # Questions issued, in order; NULL = the whole quiz
+    question_ids = models.JSONField(null=True, blank=True)
+    started_at = models.DateTimeField(default=timezone.now)
+    deadline = models.DateTimeField()
+    submitted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # `manage.py expire_sessions` deletes by deadline
+            models.Index(fields=['deadline'], name='session_deadline_idx'),
+        ]
+
+
+# -------------------------------------------------
+# 12. Search Documents (one per quiz, Postgres full-text search, see api/search.py)
+# -------------------------------------------------
+class QuizSearchDocument(models.Model):
+    quiz = models.OneToOneField(Quiz, primary_key=True, related_name='+', on_delete=models.CASCADE)
+    # title (weight A) + description (B) + question text (C). The GIN index is
+    # created by migration 0015 on Postgres only; SQLite leaves the table empty
+    vector = SearchVectorField(null=True)
+
+
+# -------------------------------------------------
+# 13. User x Quiz Score Matrix (maintained by `manage.py update_recommendations`, see api/recommend.py)
+# -------------------------------------------------
+class UserQuizScores(models.Model):
+    # One row of the matrix: every quiz this user has attempted, packed as
+    # 12-byte (quiz id, best %, last %, attempts) records sorted by quiz id
+    user = models.OneToOneField(User, primary_key=True, related_name='+', on_delete=models.CASCADE)
+    scores = models.BinaryField(default=bytes)
+
+
 # 1. Create the Profile Model
 class UserProfile(models.Model):
+    READY = 'ready'
+    PROCESSING = 'processing'
+    FAILED = 'failed'
+    AVATAR_STATE_CHOICES = [(READY, 'Ready'), (PROCESSING, 'Processing'), (FAILED, 'Failed')]
+
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     avatar = models.ImageField(upload_to='avatars/', default='avatars/default.png', null=True, blank=True)
+    # sha256 of the processed upload; thumbnails live under avatars/<hash>/ (see api/avatars.py)
+    avatar_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
+    # Latest upload handed to the worker; only its outcome is written back to avatar_state
+    avatar_pending = models.CharField(max_length=64, blank=True, default='')
+    avatar_state = models.CharField(max_length=10, choices=AVATAR_STATE_CHOICES, default=READY)
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
@@ -104,7 +364,3 @@ class UserProfile(models.Model):
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
         UserProfile.objects.create(user=instance)
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
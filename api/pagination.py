@@ -0,0 +1,29 @@
+from rest_framework.pagination import CursorPagination # pyright: ignore[reportMissingImports]
+
+
+class QuizCursorPagination(CursorPagination):
+    # Backed by the (created_at, id) / (difficulty, created_at, id) indexes on Quiz
+    ordering = ('created_at', 'id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # Paginated unless the client explicitly asks for the legacy full list (?all=1)
+    full_list_query_param = 'all'
+
+    def wants_full_list(self, params):
+        return params.get(self.full_list_query_param) == '1'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_full_list(request.query_params):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class HistoryCursorPagination(QuizCursorPagination):
+    # Backed by the (user, -completed_at, -id) index on QuizAttempt
+    ordering = ('-completed_at', '-id')
+    # Slots on the first page already taken by outbox rows (see UserHistoryView)
+    reserved = 0
+
+    def get_page_size(self, request):
+        return max(super().get_page_size(request) - self.reserved, 1)
@@ -0,0 +1,224 @@
+"""
+"Next quiz" recommendations (GET /api/recommendations/).
+
+The user x quiz score matrix is stored one row per user (UserQuizScores):
+the quizzes they attempted, packed as 12-byte records of (quiz id, best %,
+last %, attempts). `python manage.py update_recommendations` folds new
+QuizAttempt rows into it in batches from a watermark (the last attempt id
+it consumed), like the item analysis job, so it never rescans old attempts
+and the submit path pays nothing. It settles on inserted_at the same way.
+
+Serving is a cache lookup. A user's list is cached per catalog version and
+dropped whenever the job changes their row; a miss reads that one row plus
+the catalog summary (itself cached per catalog version), never the
+attempts table. Lists are at most one job run behind new attempts.
+
+The list is built from:
+    retry  - attempted quizzes whose best score is below the pass mark,
+             weakest first (at most RETRY_SLOTS of them)
+    new    - unattempted quizzes, closest to the user's level first
+
+The level is the easiest difficulty the user hasn't mastered yet: at least
+MASTERY_QUIZZES quizzes of it attempted with an average best of
+MASTERY_PERCENTAGE or more.
+"""
+import hashlib
+import heapq
+import struct
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .analysis import SETTLE_SECONDS
+from .content import get_catalog_version
+from .models import Quiz, QuizAttempt, UserQuizScores, AnalysisWatermark
+from .routing import primary
+from .stats import PASS_PERCENTAGE
+
+
+WATERMARK = 'recommendations'
+BATCH_SIZE = 5000
+RECOMMENDATIONS = 10
+RETRY_SLOTS = 3
+MASTERY_QUIZZES = 2
+MASTERY_PERCENTAGE = 80
+LEVELS = [value for value, _ in Quiz.DIFFICULTY_CHOICES] # easiest first
+# Score of an unattempted quiz by distance from the user's level
+LEVEL_FIT = (1.0, 0.4, 0.1)
+
+RECOMMENDATIONS_KEY = 'recommend:{user_id}:{version}'
+CATALOG_KEY = 'recommend-catalog:{version}'
+CACHE_TIMEOUT = 60 * 60 * 6
+
+_RECORD = struct.Struct('<QBBH') # quiz id (BigAutoField: 64 bits), best %, last %, attempts
+MAX_ATTEMPTS = 2 ** 16 - 1
+
+
+def unpack(blob):
+    """Matrix row -> {quiz_id: [best, last, attempts]}"""
+    return {quiz_id: [best, last, attempts] for quiz_id, best, last, attempts in _RECORD.iter_unpack(bytes(blob))}
+
+
+def pack(scores):
+    return b''.join(_RECORD.pack(quiz_id, *scores[quiz_id]) for quiz_id in sorted(scores))
+
+
+# -------------------------------------------------
+# Matrix maintenance
+# -------------------------------------------------
+def run_batch(batch_size=BATCH_SIZE, settle_seconds=SETTLE_SECONDS):
+    """Consume the next batch of attempts. Returns how many were processed."""
+    cutoff = timezone.now() - timedelta(seconds=settle_seconds)
+
+    with transaction.atomic():
+        watermark, _ = AnalysisWatermark.objects.select_for_update().get_or_create(name=WATERMARK)
+        rows = (
+            QuizAttempt.objects
+            .filter(id__gt=watermark.position)
+            .order_by('id')
+            .values_list('id', 'user_id', 'quiz_id', 'percentage', 'total_questions', 'inserted_at')
+            [:batch_size]
+        )
+
+        attempts = defaultdict(list)
+        processed = 0
+        last_id = None
+        for attempt_id, user_id, quiz_id, percentage, total, inserted_at in rows:
+            if inserted_at > cutoff:
+                break
+            if total > 0: # quizzes without questions say nothing about the user
+                attempts[user_id].append((quiz_id, min(100, max(0, round(percentage)))))
+            processed += 1
+            last_id = attempt_id
+
+        if last_id is None:
+            return 0
+
+        matrix = dict(
+            UserQuizScores.objects
+            .filter(user_id__in=list(attempts))
+            .values_list('user_id', 'scores')
+        )
+        updated = []
+        for user_id, new in attempts.items():
+            scores = unpack(matrix.get(user_id, b''))
+            for quiz_id, percentage in new:
+                best, _, count = scores.get(quiz_id, (0, 0, 0))
+                scores[quiz_id] = [max(best, percentage), percentage, min(count + 1, MAX_ATTEMPTS)]
+            updated.append(UserQuizScores(user_id=user_id, scores=pack(scores)))
+        UserQuizScores.objects.bulk_create(
+            updated, update_conflicts=True, unique_fields=['user'], update_fields=['scores'],
+        )
+
+        watermark.position = last_id
+        watermark.save(update_fields=['position'])
+
+    version = get_catalog_version()
+    cache.delete_many([RECOMMENDATIONS_KEY.format(user_id=user_id, version=version) for user_id in attempts])
+    return processed
+
+
+def run(batch_size=BATCH_SIZE, settle_seconds=SETTLE_SECONDS):
+    """Drain everything that has settled. Returns the number of attempts processed."""
+    total = 0
+    while True:
+        processed = run_batch(batch_size, settle_seconds)
+        if not processed:
+            return total
+        total += processed
+
+
+def rebuild(settle_seconds=SETTLE_SECONDS):
+    """Drop the matrix and recompute it from every attempt."""
+    with transaction.atomic():
+        UserQuizScores.objects.all().delete()
+        AnalysisWatermark.objects.filter(name=WATERMARK).delete()
+    # Every user with attempts is processed again, which drops their cached list
+    return run(settle_seconds=settle_seconds)
+
+
+# -------------------------------------------------
+# Serving
+# -------------------------------------------------
+def _catalog(version):
+    """Quizzes that can be recommended: {quiz_id: list fields}, cached per catalog version."""
+    key = CATALOG_KEY.format(version=version)
+    catalog = cache.get(key)
+    if catalog is None:
+        with primary():
+            catalog = {
+                row['id']: row
+                for row in (
+                    Quiz.objects
+                    .annotate(questions_count=Count('questions'))
+                    .filter(questions_count__gt=0)
+                    .values('id', 'title', 'difficulty', 'time_minutes', 'questions_count')
+                )
+            }
+        cache.set(key, catalog, timeout=CACHE_TIMEOUT)
+    return catalog
+
+
+def level(scores, catalog):
+    """The easiest difficulty the user hasn't mastered yet (the hardest once all are)."""
+    bests = defaultdict(list)
+    for quiz_id, (best, _, _) in scores.items():
+        if quiz_id in catalog:
+            bests[catalog[quiz_id]['difficulty']].append(best)
+    for difficulty in LEVELS:
+        done = bests[difficulty]
+        if len(done) < MASTERY_QUIZZES or sum(done) / len(done) < MASTERY_PERCENTAGE:
+            return difficulty
+    return LEVELS[-1]
+
+
+def _shuffle_key(user_id, quiz_id):
+    # Stable per user, different between users: ties don't hand everyone the same quiz
+    return hashlib.md5(f'{user_id}:{quiz_id}'.encode()).digest()[:4]
+
+
+def build(user_id, scores, catalog):
+    target = level(scores, catalog)
+    target_index = LEVELS.index(target)
+
+    weak = sorted(
+        (best, -attempts, quiz_id)
+        for quiz_id, (best, _, attempts) in scores.items()
+        if quiz_id in catalog and best < PASS_PERCENTAGE
+    )
+    picks = [(quiz_id, 'retry', best) for best, _, quiz_id in weak[:RETRY_SLOTS]]
+
+    fresh = heapq.nsmallest(RECOMMENDATIONS - len(picks), (
+        (
+            -LEVEL_FIT[min(abs(LEVELS.index(quiz['difficulty']) - target_index), len(LEVEL_FIT) - 1)]
+            if quiz['difficulty'] in LEVELS else 0,
+            _shuffle_key(user_id, quiz_id),
+            quiz_id,
+        )
+        for quiz_id, quiz in catalog.items() if quiz_id not in scores
+    ))
+    picks += [(quiz_id, 'new', None) for _, _, quiz_id in fresh]
+
+    return {
+        "level": target,
+        "recommendations": [
+            {**catalog[quiz_id], "reason": reason, "best_percentage": best}
+            for quiz_id, reason, best in picks
+        ],
+    }
+
+
+def recommendations(user):
+    version = get_catalog_version()
+    key = RECOMMENDATIONS_KEY.format(user_id=user.pk, version=version)
+    data = cache.get(key)
+    if data is None:
+        with primary(): # the job invalidates after writing to the primary
+            blob = UserQuizScores.objects.filter(user_id=user.pk).values_list('scores', flat=True).first()
+        data = build(user.pk, unpack(blob or b''), _catalog(version))
+        cache.set(key, data, timeout=CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,61 @@
+"""
+Fast JSON rendering.
+
+FastJSONRenderer is a drop-in for DRF's JSONRenderer that encodes with
+orjson when it is installed (several times faster on large payloads) and
+produces the same bytes:
+
+    - compact separators, UTF-8 output (DRF's COMPACT_JSON / UNICODE_JSON)
+    - datetimes, dates, Decimals, ... go through DRF's own JSONEncoder.default
+    - U+2028 / U+2029 escaped, as DRF does
+    - floats: orjson spells those outside [1e-4, 1e16) differently (1e16 for
+      1e+16, 0.00001 for 1e-05), so output that may hold one is rendered
+      again by JSONRenderer; that is rare for the numbers this API returns
+
+Anything orjson can't or shouldn't take (indented output for the browsable
+API, ints over 64 bits, non-default DRF JSON settings) falls back to
+JSONRenderer. The hot read endpoints hand it plain dicts / lists built from
+`.values()` rows or the answer key, so no serializer runs at all.
+"""
+import re
+
+from rest_framework.renderers import JSONRenderer # pyright: ignore[reportMissingImports]
+from rest_framework.utils.encoders import JSONEncoder # pyright: ignore[reportMissingImports]
+
+try:
+    import orjson
+except ImportError: # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_default = JSONEncoder().default
+# Any exponent, or a fraction below 1e-4 (can also match inside a string: that only costs the fallback)
+_ORJSON_ONLY_FLOATS = re.compile(rb'\de-?\d|0\.0000')
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if _ORJSON_ONLY_FLOATS.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+_renderer = FastJSONRenderer()
+
+
+def render(data):
+    """Bytes for `data`, exactly as the DRF views would send them."""
+    return _renderer.render(data)
@@ -0,0 +1,46 @@
+"""
+Attempt review.
+
+Submitting returns the score summary only; the per-question review is
+served by GET /api/attempts/<id>/review/. It is rebuilt from the attempt's
+AttemptAnswer rows and the cached answer key, so question and option
+texts are never stored per attempt.
+
+Attempts don't change, so a rebuilt review is cached under the quiz's
+content version (content.get_cached_payload) and sent with an ETag built
+from the attempt id and that version: a repeat visit is a 304, and a cold
+one costs two small queries plus the answer key.
+"""
+from .grading import get_answer_key, review_item
+from .models import AttemptAnswer
+
+
+def build(attempt_id, attempt):
+    """
+    Review payload for one attempt; `attempt` is its
+    {'quiz_id', 'score', 'total_questions', 'percentage'} row.
+    """
+    answer_key = get_answer_key(attempt['quiz_id'])
+    questions = {row[0]: row for row in answer_key.questions} if answer_key is not None else {}
+    correct = answer_key.correct if answer_key is not None else {}
+    answers = (
+        AttemptAnswer.objects
+        .filter(attempt_id=attempt_id)
+        .order_by('id') # the order the attempt was graded in
+        .values_list('question_id', 'option_id', 'is_correct')
+    )
+    review_data = []
+    for question_id, option_id, is_correct in answers:
+        if question_id not in questions:
+            continue # question deleted in the meantime
+        _, text, options = questions[question_id]
+        review_data.append(review_item(question_id, text, options, option_id, correct[question_id], is_correct))
+
+    return {
+        "attempt_id": attempt_id,
+        "quiz_id": attempt['quiz_id'],
+        "score": attempt['score'],
+        "total": attempt['total_questions'],
+        "percentage": attempt['percentage'],
+        "review_data": review_data,
+    }
@@ -0,0 +1,255 @@
+"""
+Read-replica routing.
+
+With DATABASE_REPLICA_URL set, the read-heavy endpoints (quiz list/detail,
+leaderboards, history, stats) read from the `replica` database; everything
+else - writes, auth, admin, commands - stays on `default`. Views opt in with
+ReplicaReadMixin (AsyncAPIView.replica_reads for the async twins), so a
+request that writes never reads from the replica mid-flight.
+
+The replica is skipped, and the primary used instead, when:
+
+    - the user wrote anything in the last REPLICA_STICKY_SECONDS
+      (ReplicaMiddleware pins them in the cache), so they see their own
+      submits / profile edits straight away
+    - the last health check found it lagging more than
+      REPLICA_MAX_LAG_SECONDS behind, or unreachable; the check runs at most
+      every REPLICA_CHECK_SECONDS per process
+    - a query on it fails mid-request: the replica is marked down and the
+      view runs again on the primary
+
+Version-keyed caches (answer keys, rendered quiz payloads, catalog pages)
+are always filled from the primary, see primary(): a lagging replica would
+otherwise store old content under the new version until the next edit.
+
+Locally, two SQLite files work: `cp db.sqlite3 db-replica.sqlite3` and set
+DATABASE_REPLICA_URL=sqlite:///db-replica.sqlite3. SQLite has no replication
+lag to measure, so only Postgres replicas are checked for lag; the
+down/fallback paths behave the same on both.
+"""
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_KEY = 'db-pin:{user_id}'
+
+# Caught up when everything received has been replayed; otherwise the age of the last replayed commit
+_PG_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    __slots__ = ('reads', 'wrote')
+
+    def __init__(self):
+        self.reads = None # alias reads go to; None = primary
+        self.wrote = False
+
+
+_request = contextvars.ContextVar('db_request', default=None)
+_primary = contextvars.ContextVar('db_primary', default=False)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside this block, whatever the view asked for."""
+    token = _primary.set(True)
+    try:
+        yield
+    finally:
+        _primary.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _request.get()
+        if state is None or _primary.get():
+            return None
+        return state.reads
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None:
+            state.wrote = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same rows on both sides
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica follows the primary's schema through replication
+        return db != REPLICA_DB_ALIAS
+
+
+# -------------------------------------------------
+# Health: one lag probe per process every REPLICA_CHECK_SECONDS
+# -------------------------------------------------
+_health = {'ok': True, 'checked': float('-inf')}
+_probe_lock = threading.Lock()
+
+
+def replica_lag():
+    """Seconds the replica is behind the primary (0 when it can't tell, e.g. SQLite)."""
+    connection = connections[REPLICA_DB_ALIAS]
+    with connection.cursor() as cursor:
+        cursor.execute(_PG_LAG_SQL if connection.vendor == 'postgresql' else 'SELECT 0')
+        return float(cursor.fetchone()[0] or 0)
+
+
+def _probe_due():
+    return time.monotonic() - _health['checked'] >= settings.REPLICA_CHECK_SECONDS
+
+
+def replica_available():
+    if not _probe_due() or not _probe_lock.acquire(blocking=False):
+        return _health['ok'] # fresh enough, or another thread is checking
+    try:
+        try:
+            lag = replica_lag()
+        except DatabaseError as exc:
+            ok = False
+            logger.warning("replica unreachable, reading from the primary: %s", exc)
+        else:
+            ok = lag <= settings.REPLICA_MAX_LAG_SECONDS
+            if not ok:
+                logger.warning("replica %.1fs behind, reading from the primary", lag)
+        _health.update(ok=ok, checked=time.monotonic())
+        return ok
+    finally:
+        _probe_lock.release()
+
+
+def mark_down():
+    """Stop using the replica until the next health check."""
+    _health.update(ok=False, checked=time.monotonic())
+
+
+# -------------------------------------------------
+# Per-request choice
+# -------------------------------------------------
+def pin(user):
+    """Send this user's reads to the primary for the next REPLICA_STICKY_SECONDS."""
+    cache.set(PIN_KEY.format(user_id=user.pk), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def route_reads(user):
+    """Called by replica-enabled views once the user is known."""
+    state = _request.get()
+    if state is None:
+        return
+    if user.is_authenticated and cache.get(PIN_KEY.format(user_id=user.pk)):
+        return
+    if replica_available():
+        state.reads = REPLICA_DB_ALIAS
+
+
+async def aroute_reads(user):
+    state = _request.get()
+    if state is None:
+        return
+    if user.is_authenticated and await cache.aget(PIN_KEY.format(user_id=user.pk)):
+        return
+    available = await sync_to_async(replica_available)() if _probe_due() else _health['ok']
+    if available:
+        state.reads = REPLICA_DB_ALIAS
+
+
+def replica_failed(exc):
+    """
+    True if `exc` is a database error from a replica read: the replica is
+    marked down and this request's reads switch to the primary, so the
+    caller can run the view again.
+    """
+    state = _request.get()
+    if state is None or state.reads != REPLICA_DB_ALIAS or not isinstance(exc, DatabaseError):
+        return False
+    logger.warning("replica read failed, retrying on the primary: %s", exc)
+    mark_down()
+    state.reads = None
+    return True
+
+
+class ReplicaReadMixin:
+    """DRF views whose reads may go to the replica."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        route_reads(request.user)
+
+    def handle_exception(self, exc):
+        if replica_failed(exc):
+            handler = getattr(self, self.request.method.lower())
+            try:
+                return handler(self.request, *self.args, **self.kwargs)
+            except Exception as retry_exc:
+                exc = retry_exc
+        return super().handle_exception(exc)
+
+
+class ReplicaMiddleware:
+    """Tracks writes per request and pins the user to the primary after one."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = _Request()
+        token = _request.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        if state.wrote:
+            self._pin(request)
+        return response
+
+    async def __acall__(self, request):
+        state = _Request()
+        token = _request.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request.reset(token)
+        if state.wrote:
+            await sync_to_async(self._pin)(request)
+        return response
+
+    def _pin(self, request):
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin(user)
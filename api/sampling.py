@@ -0,0 +1,95 @@
+"""
+Question pools.
+
+A quiz with `sample_size` set serves every attempt its own random subset of
+the questions, and with `shuffle_options` its own option order. Nothing
+about the draw is stored: the detail endpoint hands out a signed attempt
+token carrying a random seed, the client sends it back with its answers,
+and the same seed reproduces the same draw at grading time.
+
+The draw works on the cached answer key (api/grading.py), which already
+holds every question of the quiz in a fixed order, so picking K questions
+is random.sample() over index positions: O(K) whatever the pool size, with
+no ORDER BY RANDOM() and no query once the key is cached.
+
+Editing the quiz changes the pool, so an attempt that straddles an edit is
+graded against the new draw; answers to questions that fell out of it are
+ignored.
+"""
+import random
+import secrets
+
+from django.core import signing
+
+
+class InvalidAttempt(ValueError):
+    pass
+
+
+def _signer(quiz_id):
+    # Salted per quiz: a token from one quiz is no good for another
+    return signing.Signer(salt=f'api.sampling:{quiz_id}')
+
+
+def new_seed():
+    # 63 bits: fits a signed BIGINT column (QuizSession.seed)
+    return secrets.randbits(63)
+
+
+def attempt_token(quiz_id, seed):
+    return _signer(quiz_id).sign(format(seed, 'x'))
+
+
+def read_token(quiz_id, token):
+    """Return the seed from an attempt token, or raise InvalidAttempt."""
+    if not token or not isinstance(token, str):
+        raise InvalidAttempt("Missing attempt token")
+    try:
+        return int(_signer(quiz_id).unsign(token), 16)
+    except (signing.BadSignature, ValueError):
+        raise InvalidAttempt("Invalid attempt token")
+
+
+def draw(answer_key, seed):
+    """The questions (and option order) one attempt gets, as answer_key.questions rows."""
+    # str seeds are hashed with SHA-512, so the draw is the same in every process
+    rng = random.Random(f'{answer_key.quiz_id}:{seed}')
+    questions = answer_key.questions
+    size = answer_key.sample_size
+    if size is not None and size < len(questions):
+        questions = [questions[index] for index in rng.sample(range(len(questions)), size)]
+    if answer_key.shuffle_options:
+        questions = [
+            (question_id, text, rng.sample(options, len(options)))
+            for question_id, text, options in questions
+        ]
+    return questions
+
+
+def detail_payload(answer_key, seed=None):
+    """
+    Quiz detail payload (same shape as QuizDetailSerializer). Pass `seed`
+    for a randomized quiz to get one attempt's draw plus its token.
+    """
+    questions = answer_key.questions if seed is None else draw(answer_key, seed)
+    payload = {
+        'id': answer_key.quiz_id,
+        'title': answer_key.title,
+        'time_minutes': answer_key.time_minutes,
+        'questions': questions_payload(questions),
+    }
+    if seed is not None:
+        payload['attempt'] = attempt_token(answer_key.quiz_id, seed)
+        payload['pool_size'] = answer_key.total
+    return payload
+
+
+def questions_payload(questions):
+    return [
+        {
+            'id': question_id,
+            'text': text,
+            'options': [{'id': option_id, 'text': option_text} for option_id, option_text in options],
+        }
+        for question_id, text, options in questions
+    ]
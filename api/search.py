@@ -0,0 +1,306 @@
+"""
+Catalog search (GET /api/quizzes/search/?q=...).
+
+Matches quiz titles, descriptions and question text. Results are quizzes,
+best match first, in the same shape as the quiz list. Every word of the
+query has to match somewhere in the quiz.
+
+Postgres: one QuizSearchDocument per quiz holds a weighted tsvector (title A,
+description B, question text C) behind a GIN index, queried with
+websearch_to_tsquery ("quoted phrases", -excluded words) and ranked with
+ts_rank. The ids come from the index alone; the list fields are read for
+the page of results only.
+
+Anything else (SQLite: local runs, tests): an inverted index in process
+memory, word -> {quiz_id: weight}, built from the database on the first
+search. Words are lowercased, stop words dropped and plurals folded; the
+score is a tf-idf sum with the same A/B/C weights ts_rank uses by default.
+Other processes notice changes through a version counter in the cache and
+rebuild their copy on their next search. That needs a cache shared by the
+workers; with the process-local one (local runs) each copy is also rebuilt
+once it is LOCAL_INDEX_MAX_AGE old, so edits made through another worker
+show up within that time.
+
+Both are kept current the same way: saving or deleting a Quiz / Question
+marks its quiz dirty, and dirty quizzes are re-indexed once the transaction
+commits - one statement on Postgres however many rows changed. Bulk writes
+that bypass signals call reindex() themselves (api/bank.py,
+api/synthetic.py); `manage.py rebuild_search_index` redoes everything.
+"""
+import heapq
+import math
+import re
+import threading
+import time
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .content import cache_is_shared
+from .models import Quiz, Question, QuizSearchDocument
+from .routing import primary
+from .serializers import QuizListSerializer
+
+
+MAX_RESULTS = 50
+MAX_QUERY_LENGTH = 200
+SEARCH_CONFIG = 'english'
+VERSION_KEY = 'quiz-search:version'
+LOCAL_INDEX_MAX_AGE = 60
+
+# ts_rank's default weights for A / B / C
+TITLE_WEIGHT = 1.0
+DESCRIPTION_WEIGHT = 0.4
+QUESTION_WEIGHT = 0.2
+
+_UPSERT_SQL = """
+    INSERT INTO api_quizsearchdocument (quiz_id, vector)
+    SELECT quiz.id,
+           setweight(to_tsvector('english', quiz.title), 'A')
+           || setweight(to_tsvector('english', quiz.description), 'B')
+           || setweight(to_tsvector('english', coalesce(string_agg(question.text, ' '), '')), 'C')
+    FROM api_quiz quiz
+    LEFT JOIN api_question question ON question.quiz_id = quiz.id
+    WHERE quiz.id = ANY(%s)
+    GROUP BY quiz.id
+    ON CONFLICT (quiz_id) DO UPDATE SET vector = EXCLUDED.vector
+"""
+
+_WORD = re.compile(r'\w+')
+STOP_WORDS = frozenset(
+    'a an and are as at be by do does for from how in is it its of on or that the this to was '
+    'were what when where which who why will with'.split()
+)
+
+
+def _postgres():
+    return connection.vendor == 'postgresql'
+
+
+def words(text):
+    """Index terms of `text`: lowercased, stop words dropped, plurals folded."""
+    terms = []
+    for word in _WORD.findall(text.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+# -------------------------------------------------
+# In-process index (non-Postgres databases)
+# -------------------------------------------------
+class _Index:
+
+    def __init__(self, version):
+        self.version = version
+        self.built = time.monotonic()
+        self.postings = {}  # word -> {quiz_id: weight}
+        self.documents = {} # quiz_id -> {word: weight}, to take a quiz back out
+
+    def put(self, quiz_id, document):
+        """Replace a quiz's words; None removes the quiz."""
+        for word in self.documents.pop(quiz_id, ()):
+            postings = self.postings[word]
+            del postings[quiz_id]
+            if not postings:
+                del self.postings[word]
+        if document is None:
+            return
+        self.documents[quiz_id] = document
+        for word, weight in document.items():
+            self.postings.setdefault(word, {})[quiz_id] = weight
+
+    def search(self, terms, limit):
+        lists = [self.postings.get(term) for term in set(terms)]
+        if not lists or None in lists:
+            return []
+        lists.sort(key=len) # intersect from the rarest word up
+        candidates = lists[0].keys()
+        for postings in lists[1:]:
+            candidates = [quiz_id for quiz_id in candidates if quiz_id in postings]
+        total = len(self.documents)
+        idf = [math.log(1 + total / len(postings)) for postings in lists]
+        scored = (
+            (sum(math.log1p(postings[quiz_id]) * weight for postings, weight in zip(lists, idf)), -quiz_id)
+            for quiz_id in candidates
+        )
+        return [-quiz_id for _, quiz_id in heapq.nlargest(limit, scored)]
+
+
+def _documents(quiz_ids=None):
+    """{quiz_id: {word: weight}} straight from the database (2 queries)."""
+    quizzes = Quiz.objects.values_list('id', 'title', 'description')
+    questions = Question.objects.values_list('quiz_id', 'text')
+    if quiz_ids is not None:
+        quizzes = quizzes.filter(pk__in=quiz_ids)
+        questions = questions.filter(quiz_id__in=quiz_ids)
+
+    documents = {}
+
+    def add(document, text, weight):
+        for word in words(text):
+            document[word] = document.get(word, 0.0) + weight
+
+    with primary():
+        for quiz_id, title, description in quizzes:
+            document = documents[quiz_id] = {}
+            add(document, title, TITLE_WEIGHT)
+            add(document, description, DESCRIPTION_WEIGHT)
+        for quiz_id, text in questions.iterator(chunk_size=5000):
+            if quiz_id in documents:
+                add(documents[quiz_id], text, QUESTION_WEIGHT)
+    return documents
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def _local_index():
+    """This process's index, rebuilt when another process changed the catalog (call with the lock held)."""
+    global _index
+    version = cache.get(VERSION_KEY)
+    if _index is not None and version is not None and _index.version == version and (
+        cache_is_shared() or time.monotonic() - _index.built < LOCAL_INDEX_MAX_AGE
+    ):
+        return _index
+    if version is None:
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.get(VERSION_KEY, 0)
+    # Version read before the rows: a change made while building triggers another rebuild
+    index = _Index(version)
+    for quiz_id, document in _documents().items():
+        index.put(quiz_id, document)
+    _index = index
+    return index
+
+
+def _update_local(quiz_ids):
+    global _index
+    with _index_lock:
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError: # never set or evicted: the next search rebuilds
+            _index = None
+            return
+        if _index is None:
+            return
+        if version != _index.version + 1:
+            _index = None # another process changed the catalog as well
+            return
+        documents = _documents(quiz_ids)
+        for quiz_id in quiz_ids:
+            _index.put(quiz_id, documents.get(quiz_id))
+        _index.version = version
+
+
+def clear_local_index():
+    global _index
+    with _index_lock:
+        _index = None
+
+
+# -------------------------------------------------
+# Queries
+# -------------------------------------------------
+def _search_ids(query, limit):
+    if _postgres():
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        return list(
+            QuizSearchDocument.objects
+            .filter(vector=search_query)
+            .annotate(rank=SearchRank(F('vector'), search_query))
+            .order_by('-rank', 'quiz_id')
+            .values_list('quiz_id', flat=True)[:limit]
+        )
+    terms = words(query)
+    if not terms:
+        return []
+    with _index_lock:
+        return _local_index().search(terms, limit)
+
+
+def search(query, limit=20):
+    """Quiz list rows matching `query`, best match first."""
+    ids = _search_ids(query, limit)
+    if not ids:
+        return []
+    rows = (
+        Quiz.objects
+        .filter(pk__in=ids)
+        .annotate(questions_count=Count('questions'))
+        .values(*QuizListSerializer.Meta.fields)
+    )
+    by_id = {row['id']: row for row in rows}
+    return [by_id[quiz_id] for quiz_id in ids if quiz_id in by_id]
+
+
+# -------------------------------------------------
+# Maintenance
+# -------------------------------------------------
+def reindex(quiz_ids):
+    """
+    Re-index these quizzes; quizzes that no longer exist drop out. On Postgres
+    this is part of the current transaction, the in-process index waits for
+    the commit (it must never hold rows that could still roll back).
+    """
+    quiz_ids = sorted({quiz_id for quiz_id in quiz_ids if quiz_id is not None})
+    if not quiz_ids:
+        return
+    if _postgres():
+        with connection.cursor() as cursor:
+            cursor.execute(_UPSERT_SQL, [quiz_ids])
+    else:
+        transaction.on_commit(lambda: _update_local(quiz_ids))
+
+
+def rebuild():
+    """Re-index every quiz. Returns the number of quizzes."""
+    quiz_ids = list(Quiz.objects.values_list('id', flat=True))
+    if _postgres():
+        reindex(quiz_ids)
+    else:
+        # The indexes live in the web processes: make them all rebuild
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            pass
+        clear_local_index()
+    return len(quiz_ids)
+
+
+_local = threading.local()
+
+
+def _changed(quiz_id):
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = set()
+    pending.add(quiz_id)
+    # The first callback to run takes everything pending; the rest find nothing.
+    # Rolled-back ids may ride along with a later flush, which is harmless.
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    pending = getattr(_local, 'pending', None)
+    if pending:
+        _local.pending = set()
+        reindex(pending)
+
+
+@receiver([post_save, post_delete], sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    _changed(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Question)
+def question_changed(sender, instance, **kwargs):
+    _changed(instance.quiz_id)
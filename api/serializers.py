@@ -44,7 +44,8 @@ class QuestionSerializer(serializers.ModelSerializer):
 
 # 3. Quiz List Serializer (For Dashboard Cards)
 class QuizListSerializer(serializers.ModelSerializer):
-    questions_count = serializers.IntegerField(source='questions.count', read_only=True)
+    # Annotated by QuizListView (Count('questions')) - no query per quiz
+    questions_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Quiz
@@ -0,0 +1,170 @@
+"""
+Quiz sessions.
+
+POST /api/quizzes/<id>/start/ opens a session: the questions issued (and the
+seed behind their order, see api/sampling.py) and a deadline of
+`time_minutes` from now. The session is one INSERT and is mirrored in the
+cache, so submitting normally never reads it back from the database; a
+cache miss (eviction, restart) falls back to the row.
+
+Submitting with {"session": <id>} grades exactly the issued questions
+against the cached answer key and closes the session with one conditional
+UPDATE (... WHERE submitted_at IS NULL), which is what makes a replayed or
+concurrent second submit fail even if the cache says otherwise. Submits
+later than the deadline plus settings.QUIZ_SESSION_GRACE_SECONDS are
+rejected.
+
+Abandoned sessions cost nothing while they wait: the cache entry times out
+on its own and `python manage.py expire_sessions` deletes old rows by
+deadline in batches.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import sampling
+from .models import QuizSession
+
+
+SESSION_KEY = 'quiz-session:{session_id}'
+EXPIRE_BATCH_SIZE = 5000
+
+
+class SessionError(Exception):
+    status = 400
+
+
+class SessionNotFound(SessionError):
+    status = 404
+
+
+class SessionExpired(SessionError):
+    status = 400
+
+
+class SessionReplayed(SessionError):
+    status = 409
+
+
+def _grace():
+    return timedelta(seconds=getattr(settings, 'QUIZ_SESSION_GRACE_SECONDS', 30))
+
+
+def _cache_timeout(deadline):
+    # Long enough to reject a replay until the session could not be submitted anyway
+    return max(1, int((deadline + _grace() - timezone.now()).total_seconds()) + 60)
+
+
+def start(user, answer_key):
+    """Open a session on a quiz. Returns (session, questions issued)."""
+    seed = sampling.new_seed()
+    questions = sampling.draw(answer_key, seed)
+    now = timezone.now()
+    session = QuizSession.objects.create(
+        user=user, quiz_id=answer_key.quiz_id, seed=seed,
+        question_ids=[row[0] for row in questions] if len(questions) < answer_key.total else None,
+        started_at=now, deadline=now + timedelta(minutes=answer_key.time_minutes),
+    )
+    cache.set(SESSION_KEY.format(session_id=session.pk), _state(session), timeout=_cache_timeout(session.deadline))
+    return session, questions
+
+
+def _state(session):
+    return {
+        'user_id': session.user_id,
+        'quiz_id': session.quiz_id,
+        'seed': session.seed,
+        'question_ids': session.question_ids,
+        'deadline': session.deadline,
+        'submitted': session.submitted_at is not None,
+    }
+
+
+def _load(session_id):
+    session = (
+        QuizSession.objects
+        .filter(pk=session_id)
+        .only('user_id', 'quiz_id', 'seed', 'question_ids', 'deadline', 'submitted_at')
+        .first()
+    )
+    return _state(session) if session is not None else None
+
+
+def claim(session_id, user, quiz_id):
+    """
+    Validate a submit against its session and close the session.
+    Returns the session state; raises a SessionError subclass otherwise.
+    """
+    if not session_id:
+        raise SessionError("Start the quiz first: submits need a quiz session")
+    try:
+        session_id = uuid.UUID(str(session_id))
+    except ValueError:
+        raise SessionNotFound("Unknown quiz session")
+
+    key = SESSION_KEY.format(session_id=session_id)
+    state = cache.get(key) or _load(session_id)
+    if state is None or state['user_id'] != user.id or state['quiz_id'] != int(quiz_id):
+        raise SessionNotFound("Unknown quiz session")
+    if state['submitted']:
+        raise SessionReplayed("This quiz session was already submitted")
+
+    now = timezone.now()
+    if now > state['deadline'] + _grace():
+        raise SessionExpired("Time is up for this quiz session")
+
+    claimed = (
+        QuizSession.objects
+        .filter(pk=session_id, submitted_at__isnull=True)
+        .update(submitted_at=now)
+    )
+    if not claimed:
+        raise SessionReplayed("This quiz session was already submitted")
+    cache.set(key, {**state, 'submitted': True}, timeout=_cache_timeout(state['deadline']))
+    return state
+
+
+def issued_questions(answer_key, state):
+    """The answer key rows a session was issued, in the order they were served."""
+    questions = sampling.draw(answer_key, state['seed'])
+    issued = state['question_ids']
+    if issued is not None and [row[0] for row in questions] != issued:
+        # The quiz was edited since the session started: grade what was issued
+        rows = {row[0]: row for row in answer_key.questions}
+        questions = [rows[question_id] for question_id in issued if question_id in rows]
+    return questions
+
+
+def questions_for_submit(answer_key, user, data):
+    """
+    The questions a submit is graded on: its session's (and the session is
+    closed), the draw behind its attempt token for a randomized quiz, or
+    None for the whole quiz. Raises SessionError.
+    """
+    session_id = data.get('session')
+    if session_id or settings.QUIZ_REQUIRE_SESSION:
+        return issued_questions(answer_key, claim(session_id, user, answer_key.quiz_id))
+    if answer_key.randomized:
+        try:
+            return sampling.draw(answer_key, sampling.read_token(answer_key.quiz_id, data.get('attempt')))
+        except sampling.InvalidAttempt as exc:
+            raise SessionError(str(exc))
+    return None
+
+
+def expire(older_than, batch_size=EXPIRE_BATCH_SIZE):
+    """Delete sessions whose deadline passed more than `older_than` ago. Returns the count."""
+    cutoff = timezone.now() - older_than
+    deleted = 0
+    while True:
+        batch = list(
+            QuizSession.objects
+            .filter(deadline__lt=cutoff)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not batch:
+            return deleted
+        deleted += QuizSession.objects.filter(pk__in=batch).delete()[0]
@@ -0,0 +1,155 @@
+"""
+Per-user statistics.
+
+UserStats holds running totals (attempt count, sum of percentages, passed
+count and a 10% histogram) that are updated as attempts are recorded, so
+UserStatsView is a single-row read instead of a scan over the user's
+attempts. Deleted attempts (one by one, or with their quiz) are subtracted
+again; `python manage.py rebuild_user_stats` recomputes them.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from . import analysis
+from .models import AttemptAnswer, Quiz, UserStats, QuizAttempt
+
+
+PASS_PERCENTAGE = 60
+HISTOGRAM_BUCKETS = 10
+REBUILD_BATCH_SIZE = 2000
+
+
+def percentage(score, total):
+    return (score / total) * 100 if total > 0 else 0
+
+
+def _bucket(value):
+    return min(int(value // (100 / HISTOGRAM_BUCKETS)), HISTOGRAM_BUCKETS - 1)
+
+
+class _Totals:
+    __slots__ = ('attempts', 'graded', 'percentage_sum', 'passed', 'histogram')
+
+    def __init__(self):
+        self.attempts = 0
+        self.graded = 0
+        self.percentage_sum = 0.0
+        self.passed = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, score, total, sign=1):
+        self.attempts += sign
+        if total > 0:
+            value = percentage(score, total)
+            self.graded += sign
+            self.percentage_sum += sign * value
+            self.passed += sign * (value >= PASS_PERCENTAGE)
+            self.histogram[_bucket(value)] += sign
+
+    def apply_to(self, stats):
+        histogram = stats.histogram or [0] * HISTOGRAM_BUCKETS
+        stats.attempt_count += self.attempts
+        stats.graded_count += self.graded
+        stats.percentage_sum += self.percentage_sum
+        stats.passed_count += self.passed
+        stats.histogram = [a + b for a, b in zip(histogram, self.histogram)]
+
+
+def record_attempts(attempts):
+    """Fold newly saved attempts into their users' stats."""
+    per_user = defaultdict(_Totals)
+    for attempt in attempts:
+        per_user[attempt.user_id].add(attempt.score, attempt.total_questions)
+
+    # No savepoint: inside a submit/flush a failure aborts the caller's transaction anyway
+    with transaction.atomic(savepoint=False):
+        for user_id, totals in per_user.items():
+            stats, _ = UserStats.objects.select_for_update().get_or_create(user_id=user_id)
+            totals.apply_to(stats)
+            stats.save()
+
+
+def forget_attempts(attempts):
+    """Take (user_id, score, total_questions) rows of deleted attempts back out of the stats."""
+    per_user = defaultdict(_Totals)
+    for user_id, score, total in attempts:
+        per_user[user_id].add(score, total, sign=-1)
+    if not per_user:
+        return
+
+    with transaction.atomic(savepoint=False):
+        rows = list(UserStats.objects.select_for_update().filter(user_id__in=per_user))
+        for stats in rows:
+            per_user[stats.user_id].apply_to(stats)
+        UserStats.objects.bulk_update(
+            rows, ['attempt_count', 'graded_count', 'percentage_sum', 'passed_count', 'histogram'],
+        )
+
+
+@receiver(pre_delete, sender=Quiz)
+def _forget_quiz_attempts(sender, instance, **kwargs):
+    # Item stats go with the quiz's questions; the players' totals need the attempts taken out
+    forget_attempts(QuizAttempt.objects.filter(quiz=instance).values_list('user_id', 'score', 'total_questions'))
+
+
+@receiver(pre_delete, sender=QuizAttempt)
+def _forget_attempt(sender, instance, origin=None, **kwargs):
+    # Attempts deleted along with their user or quiz are handled once, by the receivers above
+    if not (isinstance(origin, QuizAttempt) or isinstance(origin, QuerySet) and origin.model is QuizAttempt):
+        return
+    forget_attempts([(instance.user_id, instance.score, instance.total_questions)])
+    analysis.forget_answers(AttemptAnswer.objects.filter(attempt=instance))
+
+
+def as_dict(stats):
+    if stats is None:
+        return {"total_quizzes": 0, "average_score": 0, "passed_quizzes": 0,
+                "histogram": [0] * HISTOGRAM_BUCKETS}
+    average = stats.percentage_sum / stats.graded_count if stats.graded_count else 0
+    return {
+        "total_quizzes": stats.attempt_count,
+        "average_score": round(average), # Returns 85 instead of 8.5
+        "passed_quizzes": stats.passed_count,
+        "histogram": stats.histogram or [0] * HISTOGRAM_BUCKETS,
+    }
+
+
+def rebuild(user_ids=None):
+    """Recompute stats from QuizAttempt (for everyone, or just `user_ids`)."""
+    attempts = QuizAttempt.objects.order_by('user_id')
+    existing = UserStats.objects.all()
+    if user_ids is not None:
+        attempts = attempts.filter(user_id__in=user_ids)
+        existing = existing.filter(user_id__in=user_ids)
+
+    written = 0
+    with transaction.atomic():
+        existing.delete()
+        batch = []
+        current_user, totals = None, None
+        rows = attempts.values_list('user_id', 'score', 'total_questions').iterator(chunk_size=REBUILD_BATCH_SIZE)
+        for user_id, score, total in rows:
+            if user_id != current_user:
+                if totals is not None:
+                    batch.append(_new_stats(current_user, totals))
+                current_user, totals = user_id, _Totals()
+            totals.add(score, total)
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                UserStats.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if totals is not None:
+            batch.append(_new_stats(current_user, totals))
+        UserStats.objects.bulk_create(batch)
+        written += len(batch)
+    return written
+
+
+def _new_stats(user_id, totals):
+    stats = UserStats(user_id=user_id, histogram=[0] * HISTOGRAM_BUCKETS)
+    totals.apply_to(stats)
+    return stats
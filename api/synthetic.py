@@ -0,0 +1,175 @@
+"""
+Synthetic data for load testing (`python manage.py generate_data`).
+
+Shapes roughly follow production:
+
+    - quiz popularity is Zipf-like: a few quizzes get most attempts
+    - user activity is Pareto-distributed: most users take a handful of
+      quizzes, a few take hundreds
+    - each user has a skill level and each difficulty an offset; scores are
+      drawn per question from that probability
+    - attempts are spread over the last --days, weighted towards recent ones
+
+Everything is written with bulk_create in batches and streamed, so millions
+of attempts don't need to fit in memory. Derived tables (leaderboard, user
+stats, and item analysis when answers are generated) are rebuilt at the end.
+"""
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from . import analysis, leaderboard, search, stats
+from .content import bump_catalog_version
+from .models import Quiz, Question, Option, QuizAttempt, AttemptAnswer, UserProfile
+
+
+BATCH_SIZE = 5000
+PASSWORD = 'benchmark'
+DIFFICULTY_OFFSET = {'Easy': 0.15, 'Medium': 0.0, 'Hard': -0.2}
+SKIP_RATE = 0.03
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Generator:
+    def __init__(self, seed=None, batch_size=BATCH_SIZE, log=print):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log
+
+    # -------------------------------------------------
+    # Users
+    # -------------------------------------------------
+    def users(self, count, prefix='bench', password=PASSWORD):
+        """Create `count` users named <prefix><n> (numbering continues after existing ones)."""
+        start = User.objects.filter(username__startswith=prefix).count()
+        hashed = make_password(password) # hash once, not once per user
+        created = []
+        for batch in _batches(range(start, start + count), self.batch_size):
+            users = User.objects.bulk_create([
+                User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=hashed,
+                     first_name='Bench', last_name=str(i))
+                for i in batch
+            ])
+            UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+            created.extend(user.id for user in users)
+        self.log(f"{len(created)} users")
+        return created
+
+    # -------------------------------------------------
+    # Quizzes
+    # -------------------------------------------------
+    def quizzes(self, count, min_questions=10, max_questions=30, options=4):
+        """Create quizzes; returns [(quiz_id, difficulty, [(question_id, correct_id, [wrong_ids])])]."""
+        rng = self.random
+        quizzes = Quiz.objects.bulk_create([
+            Quiz(
+                title=f'Benchmark Quiz {i}', description='Generated for load testing.',
+                time_minutes=rng.choice([5, 10, 15, 20, 30]),
+                difficulty=rng.choices(['Easy', 'Medium', 'Hard'], weights=[3, 5, 2])[0],
+            )
+            for i in range(count)
+        ], batch_size=self.batch_size)
+
+        key = []
+        for quiz in quizzes:
+            questions = Question.objects.bulk_create([
+                Question(quiz=quiz, text=f'{quiz.title} - question {n + 1}')
+                for n in range(rng.randint(min_questions, max_questions))
+            ])
+            created = Option.objects.bulk_create([
+                Option(question=question, text=f'Option {k + 1}', is_correct=k == correct)
+                for question in questions
+                for correct in [rng.randrange(options)]
+                for k in range(options)
+            ], batch_size=self.batch_size)
+            by_question = {}
+            for option in created:
+                by_question.setdefault(option.question_id, []).append(option)
+            key.append((quiz.id, quiz.difficulty, [
+                (
+                    question.id,
+                    next(o.id for o in by_question[question.id] if o.is_correct),
+                    [o.id for o in by_question[question.id] if not o.is_correct],
+                )
+                for question in questions
+            ]))
+        bump_catalog_version()
+        search.reindex(quiz.id for quiz in quizzes)
+        self.log(f"{len(key)} quizzes, {sum(len(q[2]) for q in key)} questions")
+        return key
+
+    # -------------------------------------------------
+    # Attempts
+    # -------------------------------------------------
+    def attempts(self, count, user_ids, quiz_key, days=180, answers=False):
+        """Create `count` attempts (and per-question answers when `answers`)."""
+        rng = self.random
+        now = timezone.now()
+        span = timedelta(days=days).total_seconds()
+
+        # Zipf-ish quiz popularity, Pareto user activity, per-user skill
+        quiz_weights = [1 / (rank + 1) ** 1.1 for rank in range(len(quiz_key))]
+        rng.shuffle(quiz_weights)
+        user_weights = [rng.paretovariate(1.2) for _ in user_ids]
+        skill = {user_id: min(0.95, max(0.1, rng.betavariate(5, 3))) for user_id in user_ids}
+
+        written = 0
+        while written < count:
+            size = min(self.batch_size, count - written)
+            users = rng.choices(user_ids, weights=user_weights, k=size)
+            quizzes = rng.choices(quiz_key, weights=quiz_weights, k=size)
+
+            rows = []
+            picks = []
+            for user_id, (quiz_id, difficulty, questions) in zip(users, quizzes):
+                p = min(0.98, max(0.02, skill[user_id] + DIFFICULTY_OFFSET[difficulty] + rng.gauss(0, 0.1)))
+                chosen = []
+                score = 0
+                for question_id, correct_id, wrong_ids in questions:
+                    roll = rng.random()
+                    if roll < SKIP_RATE:
+                        chosen.append((question_id, None, False))
+                    elif roll < SKIP_RATE + p * (1 - SKIP_RATE):
+                        chosen.append((question_id, correct_id, True))
+                        score += 1
+                    else:
+                        chosen.append((question_id, rng.choice(wrong_ids), False))
+                total = len(questions)
+                rows.append(QuizAttempt(
+                    user_id=user_id, quiz_id=quiz_id, score=score, total_questions=total,
+                    percentage=stats.percentage(score, total),
+                    completed_at=now - timedelta(seconds=rng.random() ** 2 * span),
+                ))
+                picks.append(chosen)
+
+            rows = QuizAttempt.objects.bulk_create(rows)
+            if answers:
+                AttemptAnswer.objects.bulk_create([
+                    AttemptAnswer(attempt=attempt, question_id=question_id, option_id=option_id, is_correct=is_correct)
+                    for attempt, chosen in zip(rows, picks)
+                    for question_id, option_id, is_correct in chosen
+                ], batch_size=self.batch_size)
+            written += size
+            self.log(f"  {written}/{count} attempts")
+        return written
+
+    def rebuild_aggregates(self, answers=False):
+        self.log(f"leaderboard: {leaderboard.rebuild()} rows")
+        stats.rebuild()
+        self.log("user stats rebuilt")
+        if answers:
+            # Every row written above is committed, and a load runs on a quiet database
+            self.log(f"item analysis: {analysis.rebuild(settle_seconds=0)} answers")
@@ -0,0 +1,155 @@
+"""
+The async read views (api/async_views.py) against their sync twins.
+
+The async views are only routed under ASGI with QUIZ_ASYNC_VIEWS=1, so the
+tests mount them on a URLconf of their own (this module) and compare each
+response with the sync view's for the same request.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import AsyncClient, AsyncRequestFactory, TestCase, override_settings
+from django.urls import include, path, resolve, reverse
+
+from . import async_views, authentication, grading, routing, urls as api_urls
+from .tests import Seed, SharedReplicaMixin
+from .serializers import MyTokenObtainPairSerializer
+
+
+ASYNC_VIEWS = {
+    'quiz-list': async_views.AsyncQuizListView,
+    'quiz-detail': async_views.AsyncQuizDetailView,
+    'leaderboard': async_views.AsyncLeaderboardView,
+    'leaderboard-rank': async_views.AsyncLeaderboardRankView,
+    'user-history': async_views.AsyncUserHistoryView,
+    'user-stats': async_views.AsyncUserStatsView,
+    'user-avatar': async_views.AsyncAvatarView,
+}
+
+urlpatterns = [
+    path('api/', include([
+        path(str(pattern.pattern), ASYNC_VIEWS[pattern.name].as_view(), name=pattern.name)
+        if pattern.name in ASYNC_VIEWS else pattern
+        for pattern in api_urls.urlpatterns
+    ])),
+]
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], QUIZ_SUBMIT_MODE='sync')
+class AsyncViewParityTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        self.seed = Seed(3)
+        self.token = str(MyTokenObtainPairSerializer.get_token(self.seed.me).access_token)
+
+    def clear_caches(self):
+        cache.clear()
+        grading.clear_local_cache()
+        authentication.clear_local_cache()
+
+    async def both(self, name, args=(), token=True, cold=True, **params):
+        """(sync response, async response) for the same GET, starting from cold caches."""
+        url = reverse(name, args=args)
+        headers = {'Authorization': f'Bearer {self.token}'} if token else {}
+        if isinstance(token, str):
+            headers = {'Authorization': f'Bearer {token}'}
+        if_none_match = params.pop('if_none_match', None)
+        if if_none_match:
+            headers['If-None-Match'] = if_none_match
+
+        if cold:
+            await sync_to_async(self.clear_caches)()
+        sync = await sync_to_async(self.client.get)(url, params, headers=headers)
+        with self.settings(ROOT_URLCONF=__name__):
+            self.assertIs(resolve(url).func.view_class, ASYNC_VIEWS[name])
+            response = await AsyncClient().get(url, params, headers=headers)
+        return sync, response
+
+    async def assertSame(self, name, args=(), status=200, **params):
+        sync, response = await self.both(name, args, **params)
+        self.assertEqual((sync.status_code, response.status_code), (status, status), response.content[:300])
+        self.assertEqual(response.content, sync.content)
+        for header in ('ETag', 'Cache-Control', 'WWW-Authenticate'):
+            self.assertEqual(response.headers.get(header), sync.headers.get(header), header)
+        return response
+
+    async def test_quiz_list(self):
+        await self.assertSame('quiz-list', all=1)
+        await self.assertSame('quiz-list', all=1, difficulty='Easy')
+        await self.assertSame('quiz-list') # a page: handed to the sync view
+
+    async def test_quiz_detail(self):
+        response = await self.assertSame('quiz-detail', args=[self.seed.quiz.pk])
+        await self.assertSame('quiz-detail', args=[self.seed.quiz.pk], status=304, cold=False,
+                              if_none_match=response['ETag'])
+        await self.assertSame('quiz-detail', args=[10**6], status=404)
+
+    async def test_leaderboards(self):
+        await self.assertSame('leaderboard')
+        await self.assertSame('leaderboard', quiz=self.seed.quiz.pk)
+        await self.assertSame('leaderboard', quiz='x', status=400)
+        await self.assertSame('leaderboard-rank')
+        await self.assertSame('leaderboard-rank', period='week')
+        await self.assertSame('leaderboard-rank', quiz='x', status=400)
+
+    async def test_history_and_stats(self):
+        await self.assertSame('user-history', all=1)
+        await self.assertSame('user-history', page_size=2)
+        await self.assertSame('user-stats')
+        await self.assertSame('user-avatar')
+
+    async def test_authentication(self):
+        for name in ASYNC_VIEWS:
+            args = [self.seed.quiz.pk] if name == 'quiz-detail' else []
+            with self.subTest(name=name):
+                await self.assertSame(name, args, status=401, token=False)
+                await self.assertSame(name, args, status=401, token='not-a-jwt')
+
+
+class AsyncReplicaTests(TestCase):
+    """The async dispatch's replica routing, with the state ReplicaMiddleware would set up."""
+
+    def setUp(self):
+        self.seed = Seed(1)
+        self.state = routing._Request()
+        token = routing._request.set(self.state)
+        self.addCleanup(routing._request.reset, token)
+        self.addCleanup(routing._health.update, ok=True, checked=float('-inf'))
+        routing._health.update(ok=True, checked=routing.time.monotonic())
+
+    def view(self, replica_reads=True):
+        calls = []
+
+        class View(async_views.AsyncAPIView):
+            sync_view = async_views.views.UserStatsView
+
+            async def get(self, request):
+                calls.append(routing._request.get().reads)
+                if routing._request.get().reads == routing.REPLICA_DB_ALIAS:
+                    raise OperationalError("replica went away")
+                return async_views._json({"ok": True})
+
+        View.replica_reads = replica_reads
+        request = AsyncRequestFactory().get('/', headers={
+            'Authorization': f'Bearer {MyTokenObtainPairSerializer.get_token(self.seed.me).access_token}',
+        })
+        return View.as_view(), request, calls
+
+    async def test_failed_replica_read_is_retried_on_the_primary(self):
+        view, request, calls = self.view()
+        with self.assertLogs('api.routing', 'WARNING'):
+            response = await view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, [routing.REPLICA_DB_ALIAS, None])
+        self.assertFalse(routing._health['ok']) # marked down
+
+    async def test_pinned_users_read_from_the_primary(self):
+        await sync_to_async(routing.pin)(self.seed.me)
+        view, request, calls = self.view()
+        self.assertEqual((await view(request)).status_code, 200)
+        self.assertEqual(calls, [None])
+
+    async def test_views_without_replica_reads_stay_on_the_primary(self):
+        view, request, calls = self.view(replica_reads=False)
+        self.assertEqual((await view(request)).status_code, 200)
+        self.assertEqual(calls, [None])
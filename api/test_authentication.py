@@ -0,0 +1,77 @@
+"""Cached user resolution for JWT requests (api/authentication.py)."""
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import authentication
+from .tests import PASSWORD, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], JWT_STATELESS_READS=False)
+class AuthenticationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        authentication.clear_local_cache()
+        self.user = User.objects.create_user('me', 'me@example.com', PASSWORD)
+        self.client = client_for(self.user)
+
+    def later(self, seconds):
+        return mock.patch.object(authentication.time, 'monotonic', return_value=time.monotonic() + seconds)
+
+    def shared_cache(self):
+        return mock.patch.object(authentication, 'cache_is_shared', return_value=True)
+
+    def user_queries(self, seconds=0):
+        """Fetch the profile `seconds` from now; returns (status, number of User lookups)."""
+        with self.later(seconds), CaptureQueriesContext(connection) as queries:
+            status = self.client.get(reverse('user-profile')).status_code
+        return status, sum('FROM "auth_user"' in query['sql'] for query in queries.captured_queries)
+
+    def test_deactivation_without_signal_is_seen_after_the_local_ttl(self):
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 200)
+        # queryset.update() skips the version bump, as does a bump in another process's local cache
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 200)
+        with mock.patch.object(authentication, 'LOCAL_CACHE_SECONDS', 0):
+            self.assertEqual(self.client.get(reverse('user-profile')).status_code, 401)
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 401)
+
+    def test_shared_cache_revalidates_by_version_after_the_local_window(self):
+        with self.shared_cache():
+            self.assertEqual(self.user_queries(), (200, 1))
+            self.assertEqual(self.user_queries(1), (200, 0))
+            window = authentication.LOCAL_CACHE_SECONDS + 1
+            self.assertEqual(self.user_queries(window), (200, 0)) # version unchanged: no database read
+            self.assertEqual(self.user_queries(window + authentication.USER_RECHECK_SECONDS), (200, 1))
+
+    def test_process_local_cache_rechecks_the_row_after_the_local_window(self):
+        self.assertEqual(self.user_queries(), (200, 1))
+        self.assertEqual(self.user_queries(1), (200, 0))
+        self.assertEqual(self.user_queries(authentication.LOCAL_CACHE_SECONDS + 1), (200, 1))
+
+    def test_version_bumped_elsewhere_is_seen_after_the_local_window(self):
+        with self.shared_cache():
+            self.assertEqual(self.user_queries(), (200, 1))
+            # Another worker deactivated the user: the shared version moved, this process's LRU didn't
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            cache.set(authentication.USER_VERSION_KEY.format(user_id=self.user.pk), time.time_ns())
+            self.assertEqual(self.user_queries(1)[0], 200)
+            self.assertEqual(self.user_queries(authentication.LOCAL_CACHE_SECONDS + 1), (401, 1))
+
+    def test_save_in_this_process_is_seen_at_once(self):
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 401)
+
+    def test_stateless_reads_need_a_shared_cache(self):
+        with override_settings(JWT_STATELESS_READS=True):
+            self.assertEqual([error.id for error in authentication.check_stateless_reads(None)], ['api.E001'])
+            self.assertFalse(authentication.stateless_reads())
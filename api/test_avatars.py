@@ -0,0 +1,129 @@
+"""Avatar uploads (api/avatars.py): header checks, the worker's decode and its reported state, file cleanup."""
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image, ImageFile
+from rest_framework.test import APIClient # pyright: ignore[reportMissingImports]
+
+from . import avatars
+from .models import UserProfile
+from .tests import PASSWORD
+
+
+class AvatarTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=media, AVATAR_ASYNC_PROCESSING=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        self.user = User.objects.create_user('me', 'me@example.com', PASSWORD)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def image(self, color='red', fmt='PNG'):
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 200), color).save(buffer, fmt)
+        return buffer.getvalue()
+
+    def upload(self, data):
+        return self.client.patch(
+            reverse('user-avatar'), {'avatar': SimpleUploadedFile('me.png', data, 'image/png')}, format='multipart',
+        )
+
+    def stored(self, content_hash):
+        return avatars.default_storage.exists(avatars.path_for(content_hash, avatars.DEFAULT_SIZE, 'jpeg'))
+
+    def profile(self):
+        return UserProfile.objects.get(user=self.user)
+
+    def queued(self):
+        """Run with AVATAR_ASYNC_PROCESSING on, collecting the worker jobs instead of starting them."""
+        jobs = []
+        settings = override_settings(AVATAR_ASYNC_PROCESSING=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        patcher = mock.patch.object(avatars._pool, 'submit', side_effect=lambda fn, *args: jobs.append((fn, args)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return jobs
+
+    def test_request_checks_the_header_without_decoding(self):
+        upload = SimpleUploadedFile('me.png', self.image(), 'image/png')
+        with mock.patch.object(ImageFile.ImageFile, 'load', side_effect=AssertionError('decoded')):
+            data, content_hash = avatars.validate(upload)
+        self.assertEqual(len(content_hash), 64)
+
+    def test_truncated_image_is_refused(self):
+        data = self.image()
+        self.assertEqual(self.upload(data[:len(data) // 2]).status_code, 400)
+        self.assertEqual(self.profile().avatar_hash, '')
+
+    def test_undecodable_upload_is_reported_by_the_worker(self):
+        # A truncated JPEG passes the header checks; only the full decode finds it
+        data = self.image(fmt='JPEG')
+        data = data[:len(data) // 2]
+        jobs = self.queued()
+
+        response = self.upload(data)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['state'], UserProfile.PROCESSING)
+        self.assertEqual(self.client.get(reverse('user-avatar')).json()['state'], UserProfile.PROCESSING)
+
+        for fn, args in jobs:
+            fn(*args)
+        body = self.client.get(reverse('user-avatar')).json()
+        self.assertEqual((body['state'], body['sizes']), (UserProfile.FAILED, {}))
+        self.assertEqual((self.profile().avatar_hash, self.profile().avatar_pending), ('', ''))
+
+        # The next good upload clears it
+        self.upload(self.image())
+        for fn, args in jobs[1:]:
+            fn(*args)
+        self.assertEqual(self.client.get(reverse('user-avatar')).json()['state'], UserProfile.READY)
+
+    def test_superseded_upload_does_not_take_over(self):
+        jobs = self.queued()
+        self.upload(self.image('red'))
+        self.upload(self.image('blue'))
+        (first, red), (second, blue) = jobs
+
+        second(*blue)
+        first(*red) # finishes last, but is no longer the pending upload
+        profile = self.profile()
+        self.assertEqual((profile.avatar_hash, profile.avatar_state), (blue[2], UserProfile.READY))
+        self.assertTrue(self.stored(blue[2]))
+        self.assertFalse(self.stored(red[2]))
+
+    def test_replaced_sets_and_legacy_files_are_removed(self):
+        legacy = avatars.default_storage.save('avatars/me.jpg', io.BytesIO(b'old upload'))
+        UserProfile.objects.filter(user=self.user).update(avatar=legacy)
+
+        self.assertEqual(self.upload(self.image('red')).status_code, 200) # processed inline
+        red = self.profile().avatar_hash
+        self.assertFalse(avatars.default_storage.exists(legacy))
+        self.assertTrue(self.stored(red))
+
+        self.assertEqual(self.upload(self.image('blue')).status_code, 200)
+        blue = self.profile().avatar_hash
+        self.assertTrue(self.stored(blue))
+        self.assertFalse(self.stored(red))
+
+    def test_cleanup_keeps_a_set_still_referenced(self):
+        self.upload(self.image())
+        content_hash = self.profile().avatar_hash
+        self.assertFalse(avatars.cleanup(content_hash))
+        self.assertEqual(avatars.sweep(), 0)
+        UserProfile.objects.filter(user=self.user).update(avatar_hash='', avatar=avatars.DEFAULT_AVATAR)
+        self.assertEqual(avatars.sweep(), 1)
+        self.assertFalse(self.stored(content_hash))
+        self.assertEqual(avatars.sweep(), 0)
@@ -0,0 +1,117 @@
+"""Question bank import / export (api/bank.py)."""
+import json
+
+from django.contrib.auth.models import Permission, User
+from django.test import TestCase
+from django.urls import reverse
+
+from . import bank
+from .models import Option, Question, Quiz
+from .tests import PASSWORD, Seed
+
+
+class BankImportTests(TestCase):
+
+    def lines(self, *records):
+        return [json.dumps(record) for record in records]
+
+    def question(self, external_id, option='A'):
+        return {'quiz': 'bio', 'external_id': external_id, 'text': 'Which?',
+                'options': [{'text': option, 'is_correct': True}, {'text': 'B'}]}
+
+    def test_over_long_values_are_rejected_before_any_write(self):
+        report = bank.import_bank(self.lines(
+            {'type': 'quiz', 'external_id': 'bio', 'title': 'Biology'},
+            {'type': 'quiz', 'external_id': 'x' * 101, 'title': 'Too long'},
+            self.question('q1'),
+            self.question('q2', option='A' * 256),
+            self.question('q' * 101),
+        ))
+        self.assertEqual(report.errors, [
+            "line 2: quiz external_id is longer than 100 characters",
+            "line 4: option text is longer than 255 characters",
+            "line 5: external_id is longer than 100 characters",
+        ])
+        self.assertEqual(list(Question.objects.values_list('external_id', flat=True)), ['q1'])
+
+    def test_admin_import_needs_question_permissions(self):
+        staff = User.objects.create_user('staff', 'staff@example.com', PASSWORD, is_staff=True)
+        self.client.force_login(staff)
+        url = reverse('admin:api_quiz_import_bank')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        staff.user_permissions.add(*Permission.objects.filter(codename__in=['add_quiz', 'add_question']))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_numeric_ids_name_the_same_rows_as_strings(self):
+        quiz = {'type': 'quiz', 'external_id': 7, 'title': 'Biology'}
+        question = dict(self.question(5), quiz=7)
+        first = bank.import_bank(self.lines(quiz, question))
+        again = bank.import_bank(self.lines(dict(quiz, external_id='7'), dict(question, quiz='7')), upsert=True)
+        self.assertEqual((first.errors, again.errors), ([], []))
+        self.assertEqual((again.quizzes_updated, again.questions_updated), (1, 1))
+        self.assertEqual(list(Question.objects.values_list('external_id', flat=True)), ['5'])
+
+    def test_malformed_values_are_reported(self):
+        report = bank.import_bank(self.lines(
+            {'type': 'quiz', 'external_id': ['bio'], 'title': 'Biology'},
+            {'type': 'quiz', 'external_id': 'a', 'title': 'A', 'time_minutes': 1e400},
+            {'type': 'quiz', 'external_id': 'b', 'title': 'B', 'time_minutes': 10 ** 13},
+            {'type': 'quiz', 'external_id': 'c', 'title': 'C', 'sample_size': 0},
+            {'type': 'quiz', 'external_id': 'd', 'title': 'D', 'time_minutes': 2.5},
+            {'type': 'quiz', 'external_id': 'bio', 'title': 'Biology', 'time_minutes': 1440, 'sample_size': 3},
+            dict(self.question({'id': 1})),
+            dict(self.question('q1'), text=12),
+        ))
+        self.assertEqual(report.errors, [
+            "line 1: quiz external_id must be a string or an integer, got list",
+            "line 2: time_minutes must be a number",
+            "line 3: time_minutes must be between 1 and 1440",
+            "line 4: sample_size must be between 1 and 1440",
+            "line 5: time_minutes must be a whole number",
+            "line 7: external_id must be a string or an integer, got dict",
+            "line 8: question text must be a string",
+        ])
+        self.assertEqual(list(Quiz.objects.values_list('external_id', flat=True)), ['bio'])
+
+    def test_csv_columns(self):
+        report = bank.import_bank([
+            'quiz,quiz_title,external_id,text,correct_option,option_text,option_2,option_10,option_1\n',
+            'bio,Biology,q1,Which?,3,ignored,Two,Ten,One\n',
+        ], fmt='csv')
+        self.assertEqual(report.errors, ["line 1: unknown column 'option_text' ignored"])
+        self.assertEqual(
+            list(Option.objects.order_by('id').values_list('text', 'is_correct')),
+            [('One', False), ('Two', False), ('Ten', True)],
+        )
+
+    def test_export_then_import_round_trips(self):
+        Seed(3)
+        Quiz.objects.filter(pk=Quiz.objects.first().pk).update(sample_size=2, shuffle_options=True, icon_name='FaLeaf')
+        for fmt in ('jsonl', 'csv'):
+            with self.subTest(fmt=fmt):
+                exported = list(bank.EXPORTERS[fmt]())
+                Quiz.objects.all().delete()
+                report = bank.import_bank(exported, fmt=fmt)
+                self.assertEqual(report.errors, [])
+                self.assertEqual(list(bank.EXPORTERS[fmt]()), exported)
+
+    def test_upsert_is_idempotent(self):
+        Seed(3)
+        exported = list(bank.export_jsonl())
+        Quiz.objects.all().delete()
+        self.assertEqual(bank.import_bank(exported).errors, [])
+        snapshot = lambda: (
+            list(Quiz.objects.order_by('id').values()),
+            list(Question.objects.order_by('id').values()),
+            list(Option.objects.order_by('id').values()),
+        )
+        before = snapshot()
+
+        counts = []
+        for _ in range(2):
+            report = bank.import_bank(exported, upsert=True)
+            self.assertEqual(report.errors, [])
+            counts.append((report.quizzes_created, report.quizzes_updated, report.questions_created,
+                           report.questions_updated, report.options_written))
+        self.assertEqual(counts, [(0, 3, 0, 9, 0)] * 2)
+        self.assertEqual(snapshot(), before)
@@ -0,0 +1,90 @@
+"""Batch submissions (api/batch.py): deduplication by key and per-item rejection."""
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import QuizAttempt
+from .tests import Seed, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], QUIZ_SUBMIT_MODE='sync')
+class BatchSubmitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.seed = Seed(2)
+        self.client = client_for(self.seed.me)
+
+    def submit(self, *submissions):
+        # Encoded here: Infinity stands in for a number like 1e400, which parses to inf
+        body = json.dumps({'submissions': list(submissions)}).replace('Infinity', '1e400')
+        response = self.client.post(reverse('submit-batch'), body, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.json()['results']
+
+    def test_retries_are_deduplicated_by_key(self):
+        item = {'key': 'offline-1', 'quiz_id': self.seed.quiz.pk, 'answers': self.seed.answers,
+                'client_timestamp': (timezone.now() - timedelta(hours=1)).isoformat()}
+        first, = self.submit(item)
+        self.assertEqual(first['status'], 'created')
+        self.assertEqual(first['score'], len(self.seed.answers))
+
+        retried, fresh = self.submit(item, {**item, 'key': 'offline-2', 'answers': {}})
+        self.assertEqual((retried['status'], retried['attempt_id']), ('duplicate', first['attempt_id']))
+        self.assertEqual((fresh['status'], fresh['score']), ('created', 0))
+        self.assertEqual(QuizAttempt.objects.filter(user=self.seed.me, client_key__isnull=False).count(), 2)
+
+    def test_invalid_items_are_rejected_individually(self):
+        quiz_id = self.seed.quiz.pk
+        results = self.submit(
+            {'key': 'a', 'quiz_id': quiz_id, 'answers': {}},
+            {'key': 'a', 'quiz_id': quiz_id, 'answers': {}},
+            {'key': 'b', 'quiz_id': quiz_id + 1000, 'answers': {}},
+            {'key': 'c', 'quiz_id': quiz_id, 'answers': [], 'client_timestamp': 'yesterday'},
+            {'key': 'd', 'quiz_id': quiz_id, 'client_timestamp': '2000-01-01T00:00:00Z'},
+            'not an object',
+        )
+        self.assertEqual([(result['status'], result.get('error')) for result in results], [
+            ('created', None),
+            ('rejected', "key appears twice in this batch"),
+            ('rejected', "Quiz not found"),
+            ('rejected', "answers must be an object"),
+            ('rejected', f"client_timestamp is older than {settings.QUIZ_BATCH_MAX_AGE_DAYS} days"),
+            ('rejected', "each submission must be an object"),
+        ])
+
+    def test_out_of_range_values_reject_the_item_only(self):
+        results = self.submit(
+            {'key': 'huge', 'quiz_id': self.seed.quiz.pk, 'answers': {}, 'client_timestamp': 1e20},
+            {'key': 'huge-id', 'quiz_id': float('inf'), 'answers': {}},
+            {'key': 'bigint', 'quiz_id': 10 ** 20, 'answers': {}},
+            {'key': 'zero', 'quiz_id': 0, 'answers': {}},
+            {'key': 'ok', 'quiz_id': self.seed.quiz.pk, 'answers': self.seed.answers},
+        )
+        self.assertEqual([(result['status'], result.get('error')) for result in results], [
+            ('rejected', "client_timestamp is out of range"),
+            ('rejected', "quiz_id must be an integer"),
+            ('rejected', "quiz_id out of range"),
+            ('rejected', "quiz_id out of range"),
+            ('created', None),
+        ])
+
+    def test_quiz_id_must_be_an_integer(self):
+        quiz_id = self.seed.quiz.pk
+        results = self.submit(
+            {'key': 'bool', 'quiz_id': True, 'answers': {}},
+            {'key': 'fraction', 'quiz_id': quiz_id + 0.5, 'answers': {}},
+            {'key': 'list', 'quiz_id': [quiz_id], 'answers': {}},
+            {'key': 'word', 'quiz_id': 'seven', 'answers': {}},
+            {'key': 'float', 'quiz_id': float(quiz_id), 'answers': {}},
+            {'key': 'string', 'quiz_id': str(quiz_id), 'answers': {}},
+        )
+        self.assertEqual(
+            [result.get('error') for result in results[:4]], ["quiz_id must be an integer"] * 4,
+        )
+        self.assertEqual([(result['status'], result['quiz_id']) for result in results[4:]], [('created', quiz_id)] * 2)
@@ -0,0 +1,54 @@
+"""The quiz catalog: default pagination of GET /api/quizzes/."""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Quiz
+from .pagination import QuizCursorPagination
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CatalogPaginationTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.seed = Seed(1)
+        Quiz.objects.bulk_create(
+            Quiz(title=f'Quiz {index:03}', difficulty='Easy' if index % 2 else 'Hard') for index in range(130)
+        )
+        self.client = client_for(self.seed.me)
+
+    def get(self, url=None, **params):
+        response = self.client.get(url or reverse('quiz-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_paginated_by_default(self):
+        page = self.get()
+        self.assertEqual(len(page['results']), QuizCursorPagination.page_size)
+        self.assertIsNotNone(page['next'])
+
+    def test_page_size_is_capped(self):
+        page = self.get(page_size=1000)
+        self.assertEqual(len(page['results']), QuizCursorPagination.max_page_size)
+
+    def test_cursor_walks_the_whole_catalog(self):
+        ids, url = [], None
+        while True:
+            page = self.get(url, page_size=50) if url is None else self.get(url)
+            ids += [quiz['id'] for quiz in page['results']]
+            url = page['next']
+            if url is None:
+                break
+        self.assertEqual(ids, list(Quiz.objects.order_by('created_at', 'id').values_list('id', flat=True)))
+
+    def test_filtered_pages(self):
+        page = self.get(difficulty='Hard', page_size=100)
+        self.assertEqual(len(page['results']), 65)
+        self.assertTrue(all(quiz['difficulty'] == 'Hard' for quiz in page['results']))
+
+    def test_full_list_behind_a_flag(self):
+        quizzes = self.get(all=1)
+        self.assertIsInstance(quizzes, list)
+        self.assertEqual(len(quizzes), Quiz.objects.count())
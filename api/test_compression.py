@@ -0,0 +1,101 @@
+"""Response compression (api/compression.py): negotiation, the size threshold and what is left alone."""
+import gzip
+import json
+
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from . import grading
+from .compression import CompressionMiddleware, accepts_gzip
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+BODY = json.dumps([{'id': n, 'title': f'Quiz {n}'} for n in range(200)]).encode()
+
+
+@override_settings(GZIP_MIN_BYTES=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    def respond(self, response, accept_encoding='gzip, deflate, br'):
+        request = RequestFactory().get('/api/quizzes/', HTTP_ACCEPT_ENCODING=accept_encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def json(self, body=BODY, **headers):
+        return HttpResponse(body, content_type='application/json', headers=headers)
+
+    def test_large_json_is_gzipped(self):
+        response = self.respond(self.json(ETag='"quiz-1-2"'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"quiz-1-2"')
+
+    def test_encoding_is_negotiated(self):
+        for accept_encoding, compressed in (
+            ('gzip', True),
+            ('br;q=1.0, gzip;q=0.5', True),
+            ('x-gzip', True),
+            ('', False),
+            ('identity', False),
+            ('br', False),
+            ('gzip;q=0', False),
+            ('gzip; q=0.000, deflate', False),
+            ('gzip;q=oops', False),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(accepts_gzip(accept_encoding), compressed)
+                response = self.respond(self.json(), accept_encoding)
+                self.assertEqual(response.has_header('Content-Encoding'), compressed)
+                # Either way the response depends on the header
+                self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_small_responses_are_sent_as_they_are(self):
+        body = BODY[:1023]
+        response = self.respond(self.json(body))
+        self.assertEqual((response.content, response.has_header('Content-Encoding')), (body, False))
+        with self.settings(GZIP_MIN_BYTES=100):
+            self.assertEqual(self.respond(self.json(body))['Content-Encoding'], 'gzip')
+
+    def test_binary_types_are_left_alone(self):
+        for content_type in ('image/png', 'application/octet-stream', 'application/gzip'):
+            with self.subTest(content_type=content_type):
+                response = self.respond(HttpResponse(BODY, content_type=content_type))
+                self.assertEqual((response.content, response.has_header('Content-Encoding')), (BODY, False))
+
+    def test_already_encoded_responses_are_left_alone(self):
+        encoded = gzip.compress(BODY)
+        response = self.respond(self.json(encoded, **{'Content-Encoding': 'gzip'}))
+        self.assertEqual(response.content, encoded)
+        self.assertFalse(response.has_header('Vary'))
+        response = self.respond(self.json(BODY, **{'Content-Encoding': 'br'}), 'gzip;q=0')
+        self.assertEqual((response.content, response['Content-Encoding']), (BODY, 'br'))
+
+    def test_streaming_responses_are_left_alone(self):
+        chunks = [BODY[:2000], BODY[2000:]]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='application/jsonl'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(response.streaming_content), BODY)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], GZIP_MIN_BYTES=200)
+class CompressedEndpointTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grading.clear_local_cache()
+        self.seed = Seed(3)
+        self.client = client_for(self.seed.me)
+
+    def test_compressed_detail_still_revalidates(self):
+        url = reverse('quiz-detail', args=[self.seed.quiz.pk])
+        plain = self.client.get(url)
+        response = self.client.get(url, headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response['ETag'], 'W/' + plain['ETag'])
+        # The weakened ETag is what the client sends back
+        repeat = self.client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response['ETag']})
+        self.assertEqual(repeat.status_code, 304)
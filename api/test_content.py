@@ -0,0 +1,80 @@
+"""Content versions as ETags: conditional GETs of quiz details and reviews."""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import grading
+from .models import Question, QuizAttempt
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ConditionalGetTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grading.clear_local_cache()
+        self.seed = Seed(3)
+        self.client = client_for(self.seed.me)
+        self.detail_url = reverse('quiz-detail', args=[self.seed.quiz.pk])
+        self.review_url = reverse('attempt-review', args=[self.seed.attempt.pk])
+
+    def get(self, url, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def edit_quiz(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            question = Question.objects.filter(quiz=self.seed.quiz).first()
+            question.text += '?'
+            question.save()
+
+    def test_matching_etag_is_not_modified(self):
+        # The review still checks the attempt's owner before comparing
+        for url, queries in ((self.detail_url, 0), (self.review_url, 1)):
+            with self.subTest(url=url):
+                first = self.get(url)
+                self.assertEqual(first.status_code, 200)
+                etag = first.headers['ETag']
+
+                with self.assertNumQueries(queries):
+                    repeat = self.get(url, etag)
+                self.assertEqual(repeat.status_code, 304)
+                self.assertEqual(repeat.headers['ETag'], etag)
+                self.assertEqual(self.get(url, '"something-else"').status_code, 200)
+
+    def test_version_bump_invalidates_the_etag(self):
+        detail_etag = self.get(self.detail_url).headers['ETag']
+        review_etag = self.get(self.review_url).headers['ETag']
+        self.edit_quiz()
+
+        for url, etag in ((self.detail_url, detail_etag), (self.review_url, review_etag)):
+            with self.subTest(url=url):
+                response = self.get(url, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.headers['ETag'], etag)
+                self.assertEqual(self.get(url, response.headers['ETag']).status_code, 304)
+
+    def test_review_etags_are_per_attempt(self):
+        detail_etag = self.get(self.detail_url).headers['ETag']
+        review_etag = self.get(self.review_url).headers['ETag']
+        self.assertNotEqual(review_etag, detail_etag)
+        self.assertIn(f'attempt-{self.seed.attempt.pk}-', review_etag)
+
+        # The quiz detail's ETag does not validate a review, nor one attempt's another's
+        self.assertEqual(self.get(self.review_url, detail_etag).status_code, 200)
+        other = QuizAttempt.objects.create(
+            user=self.seed.me, quiz=self.seed.quiz, score=0, total_questions=3, percentage=0,
+        )
+        other_url = reverse('attempt-review', args=[other.pk])
+        self.assertEqual(self.get(other_url, review_etag).status_code, 200)
+        self.assertEqual(self.get(self.review_url, detail_etag + ', ' + review_etag).status_code, 304)
+
+    def test_weak_etags_from_compressed_responses_match(self):
+        # GZipMiddleware sends W/"..." for large payloads; clients echo it back
+        for url in (self.detail_url, self.review_url):
+            with self.subTest(url=url):
+                etag = self.get(url).headers['ETag'].removeprefix('W/')
+                self.assertEqual(self.get(url, f'W/{etag}').status_code, 304)
+                self.assertEqual(self.get(url, '*').status_code, 304)
+                self.assertEqual(self.get(url, 'W/"something-else"').status_code, 200)
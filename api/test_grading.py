@@ -0,0 +1,61 @@
+"""Grading against the cached answer key (api/grading.py)."""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import grading, stats
+from .models import Option, QuizAttempt
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], QUIZ_SUBMIT_MODE='sync')
+class GradingTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grading.clear_local_cache()
+        self.seed = Seed(3)
+        self.client = client_for(self.seed.me)
+
+    def submit(self, answers):
+        return self.client.post(
+            reverse('quiz-submit', args=[self.seed.quiz.pk]) + '?review=full', {'answers': answers}, format='json',
+        )
+
+    def test_grading(self):
+        answers = dict(self.seed.answers)
+        wrong_question = next(iter(answers))
+        wrong_option = Option.objects.filter(question_id=wrong_question, is_correct=False).values_list('id', flat=True)[0]
+        answers[wrong_question] = wrong_option
+        del answers[list(answers)[-1]] # one left unanswered
+
+        response = self.submit(answers)
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual((result['score'], result['total']), (1, 3))
+        self.assertAlmostEqual(result['percentage'], stats.percentage(1, 3))
+        review = {str(item['question_id']): item for item in result['review_data']}
+        self.assertEqual(review[wrong_question]['user_selected_id'], wrong_option)
+        self.assertEqual(review[wrong_question]['correct_option_id'], self.seed.answers[wrong_question])
+        self.assertEqual([item['is_correct'] for item in result['review_data']], [False, True, False])
+
+        # The stored attempt and its review agree with the response
+        attempt = QuizAttempt.objects.get(pk=result['attempt_id'])
+        self.assertEqual((attempt.score, attempt.total_questions), (1, 3))
+        stored = self.client.get(reverse('attempt-review', args=[attempt.pk])).json()
+        self.assertEqual([item['is_correct'] for item in stored['review_data']], [False, True, False])
+
+    def test_answers_to_other_quizzes_do_not_count(self):
+        other = Option.objects.filter(is_correct=True).exclude(question__quiz=self.seed.quiz).first()
+        response = self.submit({str(other.question_id): other.id, 'junk': 'x'})
+        self.assertEqual(response.json()['score'], 0)
+
+    def test_editing_the_correct_option_regrades(self):
+        self.assertEqual(self.submit(self.seed.answers).json()['score'], 3) # answer key now cached
+        question_id, correct_id = next(iter(self.seed.answers.items()))
+        with self.captureOnCommitCallbacks(execute=True):
+            Option.objects.filter(pk=correct_id).update(is_correct=False)
+            other = Option.objects.filter(question_id=question_id).exclude(pk=correct_id).first()
+            other.is_correct = True
+            other.save() # the signal bumps the quiz's content version
+        self.assertEqual(self.submit(self.seed.answers).json()['score'], 2)
@@ -0,0 +1,73 @@
+"""GET /api/history/: cursor pages by default, outbox rows on the first page."""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import grading, ingest
+from .models import QuizAttempt
+from .pagination import HistoryCursorPagination
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], QUIZ_SUBMIT_MODE='outbox')
+class HistoryPaginationTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grading.clear_local_cache()
+        self.seed = Seed(7) # `me` has 7 stored attempts
+        self.client = client_for(self.seed.me)
+        self.stored = list(
+            QuizAttempt.objects.filter(user=self.seed.me).order_by('-completed_at', '-id').values_list('id', flat=True)
+        )
+
+    def get(self, url=None, **params):
+        response = self.client.get(url or reverse('user-history'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def queue(self, count):
+        for _ in range(count):
+            response = self.client.post(
+                reverse('quiz-submit', args=[self.seed.quiz.pk]), {'answers': self.seed.answers}, format='json',
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def walk(self, **params):
+        pages, url = [], None
+        while True:
+            page = self.get(url, **params) if url is None else self.get(url)
+            pages.append([row['id'] for row in page['results']])
+            url = page['next']
+            if url is None:
+                return pages
+
+    def test_paginated_by_default(self):
+        with self.settings(QUIZ_SUBMIT_MODE='sync'):
+            page = self.get()
+        self.assertEqual([row['id'] for row in page['results']], self.stored)
+        self.assertIsNone(page['next'])
+        self.assertEqual(len(self.get(page_size=1000)['results']), len(self.stored))
+        self.assertEqual(HistoryCursorPagination.max_page_size, 100)
+
+    def test_pending_rows_count_towards_the_page_size(self):
+        self.queue(2)
+        pages = self.walk(page_size=4)
+        self.assertEqual(pages[0], [None, None] + self.stored[:2])
+        self.assertEqual([row for page in pages[1:] for row in page], self.stored[2:])
+        self.assertTrue(all(len(page) <= 4 for page in pages))
+
+    def test_a_full_outbox_leaves_room_for_one_stored_row(self):
+        self.queue(5)
+        pages = self.walk(page_size=3)
+        self.assertEqual(pages[0], [None, None, self.stored[0]])
+        self.assertEqual([row for page in pages[1:] for row in page], self.stored[1:])
+
+        ingest.flush()
+        self.assertEqual(len(self.get(page_size=3)['results']), 3)
+
+    def test_full_list_behind_a_flag(self):
+        self.queue(2)
+        rows = self.get(all=1)
+        self.assertIsInstance(rows, list)
+        self.assertEqual([row['id'] for row in rows], [None, None] + self.stored)
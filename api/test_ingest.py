@@ -0,0 +1,108 @@
+"""The submission outbox (api/ingest.py): claiming, flushing and read-your-writes."""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import grading, ingest, leaderboard, stats
+from .models import AttemptAnswer, LeaderboardScore, PendingAttempt, QuizAttempt
+from .tests import Seed, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], QUIZ_SUBMIT_MODE='outbox')
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grading.clear_local_cache()
+        self.seed = Seed(2)
+        self.client = client_for(self.seed.me)
+
+    def submit(self):
+        response = self.client.post(
+            reverse('quiz-submit', args=[self.seed.quiz.pk]), {'answers': self.seed.answers}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def total(self):
+        return LeaderboardScore.objects.get(board=leaderboard.ALL_TIME, user=self.seed.me).score
+
+    def test_submit_only_queues(self):
+        attempts, total = QuizAttempt.objects.count(), self.total()
+        self.submit()
+        self.assertEqual(PendingAttempt.objects.count(), 1)
+        self.assertEqual((QuizAttempt.objects.count(), self.total()), (attempts, total))
+
+    def test_flush_applies_each_submission_once(self):
+        attempts, answers, total = QuizAttempt.objects.count(), AttemptAnswer.objects.count(), self.total()
+        self.submit()
+        self.submit()
+
+        self.assertEqual(ingest.flush(), 2)
+        self.assertEqual(ingest.flush(), 0)
+        self.assertFalse(PendingAttempt.objects.exists())
+        self.assertEqual(QuizAttempt.objects.count(), attempts + 2)
+        self.assertEqual(AttemptAnswer.objects.count(), answers + 2 * len(self.seed.answers))
+        self.assertEqual(self.total(), total + 2 * len(self.seed.answers))
+        self.assertEqual(
+            stats.as_dict(self.seed.me.stats)['total_quizzes'], QuizAttempt.objects.filter(user=self.seed.me).count(),
+        )
+
+    def test_failed_flush_is_retried_without_double_applying(self):
+        attempts, total = QuizAttempt.objects.count(), self.total()
+        self.submit()
+        with mock.patch.object(stats, 'record_attempts', side_effect=OperationalError('lost connection')):
+            with self.assertRaises(OperationalError):
+                ingest.flush()
+        # Rolled back as a whole: still pending, nothing applied
+        self.assertEqual(PendingAttempt.objects.count(), 1)
+        self.assertEqual((QuizAttempt.objects.count(), self.total()), (attempts, total))
+
+        self.assertEqual(ingest.flush(), 1)
+        self.assertEqual(ingest.flush(), 0)
+        self.assertEqual(QuizAttempt.objects.count(), attempts + 1)
+        self.assertEqual(self.total(), total + len(self.seed.answers))
+
+    def test_rows_claimed_by_another_worker_are_skipped(self):
+        self.submit()
+        self.submit()
+        taken = PendingAttempt.objects.order_by('id').first()
+        claims = []
+        select_for_update = QuerySet.select_for_update
+
+        def claim(queryset, **kwargs):
+            # SQLite has no row locks: stand in for a worker holding `taken`
+            if queryset.model is not PendingAttempt:
+                return select_for_update(queryset, **kwargs)
+            claims.append(kwargs)
+            return select_for_update(queryset, **kwargs).exclude(pk=taken.pk)
+
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=claim):
+            self.assertEqual(ingest.flush(), 1)
+        self.assertEqual(claims, [{'skip_locked': True}])
+        self.assertEqual(list(PendingAttempt.objects.all()), [taken])
+        self.assertEqual(ingest.flush(), 1)
+
+    def test_pending_rows_show_in_history(self):
+        self.submit()
+        pending = ingest.pending_history(self.seed.me)
+        self.assertEqual(len(pending), 1)
+        self.assertEqual(
+            (pending[0]['id'], pending[0]['quiz__title'], pending[0]['score']),
+            (None, self.seed.quiz.title, len(self.seed.answers)),
+        )
+        self.assertEqual(ingest.pending_history(User.objects.get(username='user0')), [])
+
+        history = self.client.get(reverse('user-history')).json()['results']
+        self.assertEqual(history[0]['id'], None)
+        self.assertEqual(history[0]['quiz_title'], self.seed.quiz.title)
+
+        ingest.flush()
+        self.assertEqual(ingest.pending_history(self.seed.me), [])
+        history = self.client.get(reverse('user-history')).json()['results']
+        self.assertEqual(history[0]['id'], QuizAttempt.objects.latest('id').pk)
+        self.assertEqual(len(history), 3)
@@ -0,0 +1,109 @@
+"""Request instrumentation (api/instrumentation.py): Server-Timing, the slow-request log and /api/metrics/."""
+import json
+import re
+from contextlib import ExitStack
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import instrumentation
+from .serializers import MyTokenObtainPairSerializer
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+DB_TIMING = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries"')
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    INSTRUMENTATION_SAMPLE_RATE=1.0, INSTRUMENTATION_SERVER_TIMING=True, SLOW_REQUEST_MS=60_000,
+)
+class InstrumentationTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        instrumentation.histograms.reset()
+        self.addCleanup(instrumentation.histograms.reset)
+        self.seed = Seed(2)
+        self.client = client_for(self.seed.me)
+
+    def captured(self, request):
+        """(response, number of queries run on any connection)."""
+        with ExitStack() as stack:
+            captures = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+            response = request()
+        return response, sum(len(capture) for capture in captures)
+
+    def traced_queries(self, response):
+        match = DB_TIMING.search(response['Server-Timing'])
+        return int(match.group(1)) if match else None
+
+    def test_server_timing_counts_the_queries(self):
+        response, queries = self.captured(lambda: self.client.get(reverse('quiz-detail', args=[self.seed.quiz.pk])))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [part.split(';')[0] for part in response['Server-Timing'].split(', ')], ['total', 'view', 'render', 'db'],
+        )
+        self.assertEqual(self.traced_queries(response), queries)
+
+    def test_unsampled_requests_skip_the_query_trace(self):
+        with self.settings(INSTRUMENTATION_SAMPLE_RATE=0):
+            response = self.client.get(reverse('quiz-detail', args=[self.seed.quiz.pk]))
+        self.assertTrue(response['Server-Timing'].startswith('total;dur='))
+        self.assertIsNone(self.traced_queries(response))
+        with self.settings(INSTRUMENTATION_SERVER_TIMING=False):
+            self.assertNotIn('Server-Timing', self.client.get(reverse('quiz-detail', args=[self.seed.quiz.pk])))
+
+    def test_async_requests_trace_the_orm_thread(self):
+        # The async ORM runs on the thread-sensitive executor; here (no per-request
+        # ThreadSensitiveContext) that is this thread, so its queries are captured too
+        url = reverse('quiz-detail', args=[self.seed.quiz.pk])
+        headers = {'Authorization': f'Bearer {MyTokenObtainPairSerializer.get_token(self.seed.me).access_token}'}
+        with self.settings(ROOT_URLCONF='api.test_async'):
+            response, queries = self.captured(lambda: async_to_sync(AsyncClient().get)(url, headers=headers))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(queries, 0)
+        self.assertEqual(self.traced_queries(response), queries)
+        self.assertFalse(any(connection.execute_wrappers for connection in connections.all())) # uninstalled again
+
+    def test_slow_requests_are_logged_with_their_worst_queries(self):
+        with self.settings(SLOW_REQUEST_MS=0), self.assertLogs('api.slow_requests', 'WARNING') as logs:
+            self.client.get(reverse('quiz-detail', args=[self.seed.quiz.pk]))
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(
+            (line['event'], line['route'], line['status'], line['sampled']),
+            ('slow_request', 'GET /api/quizzes/<int:pk>/', 200, True),
+        )
+        self.assertGreater(line['queries'], 0)
+        self.assertTrue(0 < len(line['worst_queries']) <= min(line['queries'], 3))
+        self.assertEqual(
+            [entry['ms'] for entry in line['worst_queries']],
+            sorted((entry['ms'] for entry in line['worst_queries']), reverse=True),
+        )
+
+    def test_fast_requests_are_not_logged(self):
+        with self.assertNoLogs('api.slow_requests'):
+            self.client.get(reverse('quiz-detail', args=[self.seed.quiz.pk]))
+
+    def test_metrics_are_staff_only_and_reset_by_delete(self):
+        self.client.get(reverse('quiz-detail', args=[self.seed.quiz.pk]))
+        self.client.get(reverse('quiz-detail', args=[self.seed.quiz.pk]))
+
+        other = client_for(User.objects.get(username='user0'))
+        self.assertEqual(other.get(reverse('metrics')).status_code, 403)
+        self.assertEqual(other.delete(reverse('metrics')).status_code, 403)
+
+        routes = self.client.get(reverse('metrics')).json()['routes']
+        detail = routes['GET /api/quizzes/<int:pk>/']
+        self.assertEqual((detail['count'], detail['sampled'], sum(detail['buckets'].values())), (2, 2, 2))
+        self.assertGreater(detail['queries_per_request'], 0)
+
+        self.assertEqual(self.client.delete(reverse('metrics')).status_code, 204)
+        # Only the DELETE itself, recorded after it emptied the histograms
+        self.assertEqual(list(self.client.get(reverse('metrics')).json()['routes']), ['DELETE /api/metrics/'])
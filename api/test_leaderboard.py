@@ -0,0 +1,81 @@
+"""Leaderboard totals and the score buckets ranks are read from (api/leaderboard.py)."""
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from . import leaderboard
+from .models import LeaderboardBucket, LeaderboardScore, Quiz, QuizAttempt
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LeaderboardTests(TestCase):
+
+    def setUp(self):
+        self.users = User.objects.bulk_create([User(username=f'player{i}') for i in range(12)])
+        self.quizzes = Quiz.objects.bulk_create([Quiz(title=f'Quiz {i}') for i in range(3)])
+        self.random = random.Random(4)
+
+    def play(self, count):
+        """Record `count` random attempts, one or a few at a time like submits and batches."""
+        monday = datetime(2026, 9, 28, 12, tzinfo=dt_timezone.utc)
+        attempts = []
+        for _ in range(count):
+            attempts.append(QuizAttempt.objects.create(
+                user=self.random.choice(self.users), quiz=self.random.choice(self.quizzes),
+                score=self.random.randint(0, 5), total_questions=5, percentage=0,
+                completed_at=monday + timedelta(days=self.random.choice([0, 3, 8])),
+            ))
+            if self.random.random() < 0.5:
+                leaderboard.record_attempts(attempts)
+                attempts = []
+        leaderboard.record_attempts(attempts)
+
+    def snapshot(self):
+        scores = set(LeaderboardScore.objects.values_list('board', 'user_id', 'score'))
+        buckets = set(LeaderboardBucket.objects.exclude(users=0).values_list('board', 'score', 'users'))
+        return scores, buckets
+
+    def test_incremental_updates_match_a_rebuild(self):
+        self.play(80)
+        User.objects.filter(pk__in=[self.users[0].pk, self.users[1].pk]).delete()
+        self.users = self.users[2:]
+        self.play(40)
+
+        incremental = self.snapshot()
+        self.assertTrue(incremental[1])
+        self.assertFalse(LeaderboardBucket.objects.filter(users__lt=0).exists())
+        leaderboard.rebuild()
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_rank_and_neighbours(self):
+        self.play(60)
+        ordered = list(
+            LeaderboardScore.objects.filter(board=leaderboard.ALL_TIME)
+            .order_by('-score', 'user_id').values_list('user__username', 'score')
+        )
+        for user in self.users:
+            result = leaderboard.rank_of(leaderboard.ALL_TIME, user, neighbours=2)
+            index = ordered.index((user.username, result['me']['score']))
+            self.assertEqual(result['me']['rank'], index + 1)
+            self.assertEqual(
+                [(entry['rank'], entry['username'], entry['score']) for entry in result['above']],
+                [(rank + 1, *ordered[rank]) for rank in range(max(0, index - 2), index)],
+            )
+            self.assertEqual(
+                [(entry['rank'], entry['username'], entry['score']) for entry in result['below']],
+                [(rank + 1, *ordered[rank]) for rank in range(index + 1, min(len(ordered), index + 3))],
+            )
+            self.assertEqual(async_to_sync(leaderboard.arank_of)(leaderboard.ALL_TIME, user), result)
+
+    def test_ties_rank_by_user_id(self):
+        first, second = self.users[:2]
+        leaderboard.record_attempts([
+            QuizAttempt.objects.create(user=user, quiz=self.quizzes[0], score=3, total_questions=5, percentage=60)
+            for user in (second, first)
+        ])
+        self.assertEqual(leaderboard.rank_of(leaderboard.ALL_TIME, first)['me']['rank'], 1)
+        self.assertEqual(leaderboard.rank_of(leaderboard.ALL_TIME, second)['me']['rank'], 2)
+        self.assertIsNone(leaderboard.rank_of(leaderboard.ALL_TIME, self.users[2])['me'])
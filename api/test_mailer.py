@@ -0,0 +1,63 @@
+"""Password-reset emails (api/mailer.py): queued in the request, delivered by the worker."""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient # pyright: ignore[reportMissingImports]
+
+from . import mailer
+from .models import OutboundEmail
+from .tests import PASSWORD
+
+
+# The test runner swaps in the locmem email backend: sent mail lands in mail.outbox
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class PasswordResetEmailTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('me', 'me@example.com', PASSWORD)
+        self.client = APIClient()
+
+    def request_reset(self, email):
+        response = self.client.post(reverse('password-reset-request'), {'email': email}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"message": "If email exists, a link has been sent."})
+
+    def test_queued_then_delivered(self):
+        self.request_reset('me@example.com')
+        self.request_reset('me@example.com') # collapses into the pending message
+        self.request_reset('nobody@example.com')
+        self.assertEqual(OutboundEmail.objects.filter(status=OutboundEmail.PENDING).count(), 2)
+        self.assertEqual(mail.outbox, []) # nothing sent inside the request
+
+        self.assertEqual(mailer.send_batch(), 2)
+        self.assertEqual([message.to for message in mail.outbox], [['me@example.com']])
+        self.assertIn('reset-password?uid=', mail.outbox[0].body)
+        # The unknown address is dropped, the sent row kept for the cooldown
+        self.assertEqual(list(OutboundEmail.objects.values_list('email', 'status')), [('me@example.com', 'sent')])
+
+    def test_cooldown(self):
+        self.request_reset('me@example.com')
+        mailer.send_batch()
+        self.request_reset('me@example.com')
+        self.assertEqual(mailer.send_batch(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_invalid_addresses_are_not_queued(self):
+        for email in ('not-an-address', 'a' * 250 + '@example.com', ['me@example.com'], 12):
+            self.request_reset(email)
+        self.assertFalse(OutboundEmail.objects.exists())
+
+    def test_failed_delivery_is_retried_later(self):
+        self.request_reset('me@example.com')
+        with mock.patch.object(mail.EmailMessage, 'send', side_effect=OSError('connection refused')):
+            self.assertEqual(mailer.send_batch(), 1)
+        row = OutboundEmail.objects.get()
+        self.assertEqual((row.status, row.attempts), (OutboundEmail.PENDING, 1))
+        self.assertGreater(row.next_attempt_at, timezone.now())
+        self.assertEqual(mailer.send_batch(), 0) # not due yet
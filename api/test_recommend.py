@@ -0,0 +1,46 @@
+"""Next-quiz recommendations (api/recommend.py): ordering, the level and the score matrix rows."""
+from django.test import TestCase
+from django.urls import reverse
+
+from . import recommend
+from .models import QuizAttempt
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+class RecommendationTests(SharedReplicaMixin, TestCase):
+
+    CATALOG = {
+        quiz_id: {'id': quiz_id, 'title': f'Quiz {quiz_id}', 'difficulty': difficulty}
+        for quiz_id, difficulty in {1: 'Easy', 2: 'Easy', 3: 'Medium', 4: 'Hard', 5: 'Easy', 6: 'Easy', 7: 'Medium'}.items()
+    }
+
+    def order(self, scores):
+        data = recommend.build(1, scores, self.CATALOG)
+        return data['level'], [(row['id'], row['reason']) for row in data['recommendations']]
+
+    def test_weakest_retries_first_then_new_quizzes_nearest_the_level(self):
+        level, picks = self.order({1: [55, 55, 1], 2: [20, 40, 3], 3: [90, 90, 1]})
+        self.assertEqual(level, 'Easy')
+        self.assertEqual(picks[:2], [(2, 'retry'), (1, 'retry')])
+        self.assertEqual({quiz_id for quiz_id, _ in picks[2:4]}, {5, 6}) # Easy, ties in a per-user order
+        self.assertEqual(picks[4:], [(7, 'new'), (4, 'new')])
+
+    def test_mastered_level_moves_up(self):
+        level, picks = self.order({1: [90, 90, 1], 2: [80, 80, 1]})
+        self.assertEqual(level, 'Medium')
+        self.assertEqual({quiz_id for quiz_id, _ in picks[:2]}, {3, 7})
+        self.assertEqual([reason for _, reason in picks], ['new'] * 5)
+
+    def test_rows_hold_64_bit_quiz_ids(self):
+        scores = {2 ** 40: [70, 60, 3], 5: [100, 100, 1]}
+        self.assertEqual(recommend.unpack(recommend.pack(scores)), scores)
+
+    def test_served_from_the_matrix(self):
+        seed = Seed(2)
+        QuizAttempt.objects.filter(user=seed.me).update(percentage=100)
+        QuizAttempt.objects.filter(user=seed.me, quiz=seed.quiz).update(percentage=10)
+        recommend.rebuild()
+        response = client_for(seed.me).get(reverse('recommendations'))
+        self.assertEqual(response.status_code, 200)
+        first = response.json()['recommendations'][0]
+        self.assertEqual((first['id'], first['reason'], first['best_percentage']), (seed.quiz.pk, 'retry', 10))
@@ -0,0 +1,70 @@
+"""FastJSONRenderer (api/renderers.py) against DRF's JSONRenderer: the same bytes for the same data."""
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer # pyright: ignore[reportMissingImports]
+
+from . import renderers
+from .renderers import FastJSONRenderer
+
+
+CASES = {
+    'plain': {'id': 1, 'title': 'Quiz', 'ratio': 0.1, 'tags': ['a', 'b'], 'none': None, 'yes': True, 'empty': {}},
+    'floats': [100 / 3, 1e16, 1.2345678901234568e17, 1e22, 0.0001, 0.00001, 2.5e-7, 5e-324, 100.00001, -0.0],
+    'decimals': [Decimal('1.10'), Decimal('0.1'), Decimal('-3'), Decimal('12345678901234567890.5')],
+    'datetimes': [
+        datetime(2026, 10, 17, 12, 30, 5, 123456, tzinfo=dt_timezone.utc),
+        datetime(2026, 10, 17, 12, 30, 5, tzinfo=dt_timezone(timedelta(hours=2))),
+        datetime(2026, 10, 17, 12, 30, 5, 999), # naive
+        date(2026, 10, 17),
+        time(12, 30, 5, 250000),
+        timedelta(minutes=90),
+    ],
+    'lazy strings': {'message': gettext_lazy("User not found"), 'nested': [gettext_lazy("Not found.")]},
+    'non-str keys': {1: 'int', 2.5: 'float', True: 'bool', None: 'none', -7: 'negative'},
+    'unicode': {'text': 'héllo ✓ — 你好 🎉', 'separators': 'line\u2028paragraph\u2029end'},
+    'float-like strings': {'code': '2e5', 'version': '1.0000'},
+    'other types': {'uuid': uuid.UUID(int=7), 'bytes': b'raw', 'tuple': (1, 2), 'set': {3}},
+    'big ints': [2 ** 63, -(2 ** 64), 2 ** 63 - 1],
+    'top-level list': [{'id': n, 'score': n / 3} for n in range(5)],
+}
+
+
+class RendererParityTests(SimpleTestCase):
+
+    def assertParity(self, fast, drf, media_type=None, context=None):
+        for name, data in CASES.items():
+            with self.subTest(name):
+                self.assertEqual(fast.render(data, media_type, context), drf.render(data, media_type, context))
+
+    def test_same_bytes_as_drf(self):
+        self.assertParity(FastJSONRenderer(), JSONRenderer())
+        self.assertEqual(FastJSONRenderer().render(None), JSONRenderer().render(None))
+
+    def test_module_render_matches_the_views(self):
+        for name, data in CASES.items():
+            with self.subTest(name):
+                self.assertEqual(renderers.render(data), JSONRenderer().render(data))
+
+    def test_ensure_ascii(self):
+        fast, drf = FastJSONRenderer(), JSONRenderer()
+        fast.ensure_ascii = drf.ensure_ascii = True # UNICODE_JSON = False
+        self.assertParity(fast, drf)
+        self.assertIn(b'\\u2713', fast.render(CASES['unicode']))
+
+    def test_indented_output(self):
+        self.assertParity(FastJSONRenderer(), JSONRenderer(), 'application/json; indent=2')
+        self.assertParity(FastJSONRenderer(), JSONRenderer(), context={'indent': 4})
+
+    def test_non_compact_settings(self):
+        fast, drf = FastJSONRenderer(), JSONRenderer()
+        fast.compact = drf.compact = False
+        self.assertParity(fast, drf)
+
+    def test_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            self.assertParity(FastJSONRenderer(), JSONRenderer())
@@ -0,0 +1,58 @@
+"""Read-replica routing (api/routing.py): replica choice, pinning after writes and the primary fallback."""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import TestCase
+from rest_framework.response import Response # pyright: ignore[reportMissingImports]
+from rest_framework.test import APIRequestFactory # pyright: ignore[reportMissingImports]
+from rest_framework.views import APIView # pyright: ignore[reportMissingImports]
+
+from . import routing
+from .tests import PASSWORD
+
+
+class ReplicaRoutingTests(TestCase):
+    """The routing decisions, with the per-request state ReplicaMiddleware would set up."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('me', 'me@example.com', PASSWORD)
+        self.state = routing._Request()
+        token = routing._request.set(self.state)
+        self.addCleanup(routing._request.reset, token)
+        self.addCleanup(routing._health.update, ok=True, checked=float('-inf'))
+        routing._health.update(ok=True, checked=routing.time.monotonic())
+
+    def test_reads_go_to_the_replica_unless_pinned(self):
+        routing.route_reads(self.user)
+        self.assertEqual(routing.ReplicaRouter().db_for_read(User), routing.REPLICA_DB_ALIAS)
+        with routing.primary():
+            self.assertIsNone(routing.ReplicaRouter().db_for_read(User))
+
+        self.state.reads = None
+        routing.pin(self.user) # wrote something a moment ago
+        routing.route_reads(self.user)
+        self.assertIsNone(self.state.reads)
+
+    def test_failed_replica_read_is_retried_on_the_primary(self):
+        calls = []
+
+        class View(routing.ReplicaReadMixin, APIView):
+            permission_classes = ()
+
+            def get(self, request):
+                calls.append(routing._request.get().reads)
+                if routing._request.get().reads == routing.REPLICA_DB_ALIAS:
+                    raise OperationalError("replica went away")
+                return Response({"ok": True})
+
+        with self.assertLogs('api.routing', 'WARNING'):
+            response = View.as_view()(APIRequestFactory().get('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, [routing.REPLICA_DB_ALIAS, None])
+        # Marked down: the next request reads from the primary straight away
+        self.assertFalse(routing.replica_available())
+        fresh = routing._Request()
+        routing._request.set(fresh)
+        routing.route_reads(self.user)
+        self.assertIsNone(fresh.reads)
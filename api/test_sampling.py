@@ -0,0 +1,76 @@
+"""Question pools (api/sampling.py): per-attempt draws, attempt tokens and grading of the draw."""
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import grading, sampling
+from .models import Quiz
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], QUIZ_SUBMIT_MODE='sync')
+class QuestionPoolTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grading.clear_local_cache()
+        self.seed = Seed(4, pool=True) # the last quiz serves 2 of its 4 questions, options shuffled
+        self.client = client_for(self.seed.me)
+        self.answer_key = grading.get_answer_key(self.seed.quiz.pk)
+
+    def detail(self):
+        response = self.client.get(reverse('quiz-detail', args=[self.seed.quiz.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-store')
+        return response.json()
+
+    def submit(self, **data):
+        return self.client.post(
+            reverse('quiz-submit', args=[self.seed.quiz.pk]) + '?review=full', {'answers': self.seed.answers, **data},
+            format='json',
+        )
+
+    def test_draw_is_reproducible_from_the_seed(self):
+        first, second = sampling.draw(self.answer_key, 42), sampling.draw(self.answer_key, 42)
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 2)
+        by_id = {question_id: options for question_id, _, options in self.answer_key.questions}
+        for question_id, _, options in first:
+            self.assertCountEqual(options, by_id[question_id]) # reordered, never changed
+        # Different seeds cover the pool
+        drawn = {question_id for seed in range(50) for question_id, _, _ in sampling.draw(self.answer_key, seed)}
+        self.assertEqual(drawn, set(by_id))
+
+    def test_only_the_served_questions_are_graded(self):
+        payload = self.detail()
+        self.assertEqual((len(payload['questions']), payload['pool_size']), (2, 4))
+        served = [question['id'] for question in payload['questions']]
+
+        # Every question of the pool answered correctly: only the two served count
+        result = self.submit(attempt=payload['attempt']).json()
+        self.assertEqual((result['score'], result['total']), (2, 2))
+        self.assertEqual([item['question_id'] for item in result['review_data']], served)
+
+    def test_draw_matches_the_token_seed(self):
+        seed = sampling.new_seed()
+        token = sampling.attempt_token(self.seed.quiz.pk, seed)
+        self.assertEqual(sampling.read_token(self.seed.quiz.pk, token), seed)
+        result = self.submit(attempt=token).json()
+        self.assertEqual(
+            [item['question_id'] for item in result['review_data']],
+            [question_id for question_id, _, _ in sampling.draw(self.answer_key, seed)],
+        )
+
+    def test_missing_or_foreign_tokens_are_refused(self):
+        other = Quiz.objects.exclude(pk=self.seed.quiz.pk).first()
+        foreign = sampling.attempt_token(other.pk, sampling.new_seed())
+        for data in ({}, {'attempt': 'garbage'}, {'attempt': foreign}, {'attempt': 12}):
+            response = self.submit(**data)
+            self.assertEqual(response.status_code, 400, data)
+
+    def test_quiz_without_a_pool_is_graded_whole(self):
+        Quiz.objects.filter(pk=self.seed.quiz.pk).update(sample_size=None, shuffle_options=False)
+        grading.clear_local_cache()
+        cache.clear()
+        result = self.submit().json()
+        self.assertEqual((result['score'], result['total']), (4, 4))
@@ -0,0 +1,52 @@
+"""Quiz search (api/search.py): ranking, word matching and re-indexing."""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from . import search
+from .models import Question, Quiz
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+class SearchTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        search.clear_local_index()
+        self.addCleanup(search.clear_local_index)
+        self.seed = Seed(2)
+
+    def titles(self, query):
+        return [row['title'] for row in search.search(query)]
+
+    def test_best_match_first_and_every_word_must_match(self):
+        title = Quiz.objects.create(title='Photosynthesis basics', description='Plants')
+        description = Quiz.objects.create(title='Botany', description='Light, chlorophyll and photosynthesis')
+        question = Quiz.objects.create(title='Biology', description='Cells')
+        Question.objects.create(quiz=question, text='Where does photosynthesis happen?')
+
+        self.assertEqual(self.titles('photosynthesis'), ['Photosynthesis basics', 'Botany', 'Biology'])
+        self.assertEqual(self.titles('the photosynthesis basics'), ['Photosynthesis basics'])
+        self.assertEqual(self.titles('plant'), ['Photosynthesis basics']) # plurals folded
+        self.assertEqual(self.titles('photosynthesis zebra'), [])
+
+        response = client_for(self.seed.me).get(reverse('quiz-search'), {'q': 'chlorophyll'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()], [description.pk])
+
+        # Edits are picked up once they commit
+        with self.captureOnCommitCallbacks(execute=True):
+            title.title = 'Respiration'
+            title.save()
+        self.assertEqual(self.titles('photosynthesis'), ['Botany', 'Biology'])
+        self.assertEqual(self.titles('respiration'), ['Respiration'])
+
+    def test_local_index_expires_without_a_shared_cache(self):
+        self.assertEqual(self.titles('zebra'), [])
+        # Another worker's edit: its version bump lands in that worker's local cache only
+        Quiz.objects.filter(pk=self.seed.quiz.pk).update(title='Zebra crossings')
+        self.assertEqual(self.titles('zebra'), [])
+        with mock.patch.object(search, 'LOCAL_INDEX_MAX_AGE', 0):
+            self.assertEqual(self.titles('zebra'), ['Zebra crossings'])
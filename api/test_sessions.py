@@ -0,0 +1,60 @@
+"""Timed quiz sessions (api/sessions.py): replays, late submits and ownership."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import sessions
+from .models import QuizAttempt, QuizSession
+from .tests import Seed, SharedReplicaMixin, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], QUIZ_SUBMIT_MODE='sync')
+class SessionTests(SharedReplicaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.seed = Seed(3)
+        self.client = client_for(self.seed.me)
+
+    def submit(self, answers, **data):
+        return self.client.post(
+            reverse('quiz-submit', args=[self.seed.quiz.pk]) + '?review=full', {'answers': answers, **data},
+            format='json',
+        )
+
+    def start(self):
+        response = self.client.post(reverse('quiz-start', args=[self.seed.quiz.pk]))
+        self.assertEqual(response.status_code, 201)
+        return response.json()['session']
+
+    def test_session_cannot_be_submitted_twice(self):
+        session = self.start()
+        self.assertEqual(self.submit(self.seed.answers, session=session).status_code, 200)
+        replay = self.submit(self.seed.answers, session=session)
+        self.assertEqual(replay.status_code, 409)
+        # Not even once the cached state is gone: the row says it was submitted
+        cache.delete(sessions.SESSION_KEY.format(session_id=session))
+        self.assertEqual(self.submit(self.seed.answers, session=session).status_code, 409)
+        self.assertEqual(QuizAttempt.objects.filter(user=self.seed.me, quiz=self.seed.quiz).count(), 2)
+
+    def test_late_submit_is_rejected(self):
+        session = self.start()
+        late = timezone.now() - timedelta(seconds=settings.QUIZ_SESSION_GRACE_SECONDS + 1)
+        QuizSession.objects.filter(pk=session).update(deadline=late)
+        cache.delete(sessions.SESSION_KEY.format(session_id=session)) # as if evicted: the row is read
+        response = self.submit(self.seed.answers, session=session)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Time is up for this quiz session"})
+
+    def test_sessions_belong_to_their_user(self):
+        session = self.start()
+        other = client_for(User.objects.exclude(pk=self.seed.me.pk).first())
+        response = other.post(
+            reverse('quiz-submit', args=[self.seed.quiz.pk]), {'answers': {}, 'session': session}, format='json',
+        )
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,88 @@
+"""Running totals kept on write: UserStats (api/stats.py) and item stats (api/analysis.py)."""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import analysis, grading, recommend, stats
+from .models import AttemptAnswer, Option, OptionStats, Quiz, QuestionStats, QuizAttempt, UserStats
+from .tests import PASSWORD, Seed, client_for
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], QUIZ_SUBMIT_MODE='sync')
+class IncrementalStatsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        grading.clear_local_cache()
+        self.seed = Seed(4, item_stats=True)
+
+    def submit(self, user, quiz, correct):
+        """Answer `correct` of the quiz's questions right and the rest wrong."""
+        answers = {}
+        for index, question in enumerate(quiz.questions.order_by('id')):
+            option = Option.objects.filter(question=question, is_correct=index < correct).first()
+            answers[str(question.pk)] = option.pk
+        response = client_for(user).post(reverse('quiz-submit', args=[quiz.pk]), {'answers': answers}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def snapshot(self):
+        # A rebuild has no rows for users / items whose every attempt was deleted
+        users = {
+            row.user_id: (row.attempt_count, row.graded_count, round(row.percentage_sum, 6), row.passed_count, row.histogram)
+            for row in UserStats.objects.exclude(attempt_count=0)
+        }
+        questions = {
+            row.question_id: (row.responses, row.correct_count, round(row.score_sum, 6),
+                              round(row.score_sq_sum, 6), round(row.correct_score_sum, 6))
+            for row in QuestionStats.objects.exclude(responses=0)
+        }
+        options = dict(OptionStats.objects.exclude(picks=0).values_list('option_id', 'picks'))
+        return users, questions, options
+
+    def test_incremental_updates_match_a_rebuild(self):
+        users = list(User.objects.order_by('id'))
+        quizzes = list(Quiz.objects.order_by('id'))
+        for step, user in enumerate(users):
+            self.submit(user, quizzes[step % len(quizzes)], correct=step % 5)
+        analysis.run(settle_seconds=0)
+
+        # Deletions: one attempt, a queryset of attempts, an account and a whole quiz
+        QuizAttempt.objects.filter(user=users[1]).first().delete()
+        QuizAttempt.objects.filter(user=users[2], quiz=quizzes[0]).delete()
+        response = client_for(users[3]).delete(reverse('delete-account'), {'password': PASSWORD}, format='json')
+        self.assertEqual(response.status_code, 200)
+        quizzes[1].delete()
+
+        # Deleted before the item analysis got to it: nothing to take back out
+        self.submit(users[0], quizzes[3], correct=1)
+        QuizAttempt.objects.filter(user=users[0]).latest('id').delete()
+
+        self.submit(users[4], quizzes[2], correct=3)
+        analysis.run(settle_seconds=0)
+
+        incremental = self.snapshot()
+        self.assertTrue(all(incremental))
+        stats.rebuild()
+        analysis.rebuild(settle_seconds=0)
+        self.assertEqual(incremental, self.snapshot())
+
+
+class SettleWindowTests(TestCase):
+
+    def test_backdated_attempts_wait_for_their_insert_time(self):
+        seed = Seed(1)
+        analysis.run() # the seed's own (settled) answers
+        # An offline submission from last week, written just now
+        attempt = QuizAttempt.objects.create(
+            user=seed.me, quiz=seed.quiz, score=1, total_questions=1, percentage=100,
+            completed_at=timezone.now() - timedelta(days=7),
+        )
+        AttemptAnswer.objects.create(attempt=attempt, question=seed.quiz.questions.get(), is_correct=True)
+        self.assertEqual(analysis.run(), 0)
+        self.assertEqual(recommend.run(), 0)
+        self.assertEqual(analysis.run(settle_seconds=0), 1)
+        self.assertEqual(recommend.run(settle_seconds=0), 1)
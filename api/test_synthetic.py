@@ -0,0 +1,64 @@
+"""The load-test data generator (api/synthetic.py, `manage.py generate_data`)."""
+import io
+
+from django.core.management import CommandError, call_command
+from django.db.models import Count, F, Q, Sum
+from django.test import TestCase
+
+from . import leaderboard
+from .models import AttemptAnswer, LeaderboardScore, Question, Quiz, QuizAttempt, UserProfile, UserStats
+
+
+class GenerateDataTests(TestCase):
+
+    def generate(self, **options):
+        call_command('generate_data', stdout=io.StringIO(), **options)
+
+    def test_small_dataset_is_consistent(self):
+        self.generate(users=6, quizzes=3, questions='2-4', options=3, attempts=50, answers=True, seed=7, batch_size=16)
+
+        self.assertEqual(UserProfile.objects.filter(user__username__startswith='bench').count(), 6)
+        self.assertEqual(Quiz.objects.count(), 3)
+        for quiz in Quiz.objects.annotate(question_count=Count('questions')):
+            self.assertTrue(2 <= quiz.question_count <= 4)
+        for question in Question.objects.annotate(
+            option_count=Count('options'), correct=Count('options', filter=Q(options__is_correct=True)),
+        ):
+            self.assertEqual((question.option_count, question.correct), (3, 1))
+
+        attempts = QuizAttempt.objects.select_related('quiz')
+        self.assertEqual(attempts.count(), 50)
+        for attempt in attempts:
+            self.assertEqual(attempt.total_questions, Question.objects.filter(quiz=attempt.quiz_id).count())
+            self.assertTrue(0 <= attempt.score <= attempt.total_questions)
+            self.assertEqual(
+                attempt.score, AttemptAnswer.objects.filter(attempt=attempt, is_correct=True).count(),
+            )
+        self.assertEqual(
+            AttemptAnswer.objects.count(), QuizAttempt.objects.aggregate(n=Sum('total_questions'))['n'],
+        )
+        # Answers only ever pick options of their own question
+        self.assertFalse(AttemptAnswer.objects.exclude(option=None).exclude(option__question=F('question')).exists())
+
+        # Derived tables were rebuilt from the attempts
+        totals = dict(QuizAttempt.objects.values_list('user').annotate(Sum('score')))
+        board = dict(LeaderboardScore.objects.filter(board=leaderboard.ALL_TIME).values_list('user', 'score'))
+        self.assertEqual(board, totals)
+        counts = dict(QuizAttempt.objects.values_list('user').annotate(Count('id')))
+        self.assertEqual(dict(UserStats.objects.filter(attempt_count__gt=0).values_list('user', 'attempt_count')), counts)
+
+    def test_numbering_continues_after_existing_users(self):
+        self.generate(users=2, quizzes=1, questions='1', attempts=1, seed=1)
+        self.generate(users=2, quizzes=1, questions='1', attempts=1, seed=1)
+        self.assertEqual(
+            sorted(UserProfile.objects.values_list('user__username', flat=True)),
+            ['bench0', 'bench1', 'bench2', 'bench3'],
+        )
+
+    def test_bad_arguments_are_refused(self):
+        with self.assertRaises(CommandError):
+            self.generate(users=1, quizzes=1, questions='ten')
+        with self.assertRaises(CommandError):
+            self.generate(users=1, quizzes=1, options=1)
+        with self.assertRaises(CommandError):
+            self.generate(users=0, quizzes=1, attempts=1)
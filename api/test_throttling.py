@@ -0,0 +1,37 @@
+"""Throttling (api/throttling.py): per-account login limits and malformed bodies on throttled endpoints."""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.settings import api_settings # pyright: ignore[reportMissingImports]
+from rest_framework.test import APIClient # pyright: ignore[reportMissingImports]
+
+from . import throttling
+from .tests import PASSWORD
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user('me', 'me@example.com', PASSWORD)
+        self.client = APIClient()
+
+    def login(self, username):
+        return self.client.post(reverse('token_obtain_pair'), {'username': username, 'password': 'wrong'}, format='json')
+
+    def test_login_attempts_are_limited_per_account(self):
+        capacity, _ = throttling.parse_rate(api_settings.DEFAULT_THROTTLE_RATES['login.user'])
+        for _ in range(capacity):
+            self.assertEqual(self.login('me').status_code, 401)
+        response = self.login('ME ') # same account, however it is spelled
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.login('someone-else').status_code, 401)
+        self.assertEqual(throttling.metrics(['login.user'])['login.user']['rejected'], 1)
+
+    def test_non_object_body_is_not_a_server_error(self):
+        for name, expected in (('token_obtain_pair', 400), ('password-reset-request', 200), ('password-reset-confirm', 400)):
+            response = self.client.post(reverse(name), [1, 2], format='json')
+            self.assertEqual(response.status_code, expected, f"{name}: {response.content[:300]!r}")
@@ -1,3 +1,388 @@
-from django.test import TestCase
+"""
+Query budgets, plus the fixtures the behaviour tests share.
 
-# Create your tests here.
+Every endpoint in api/urls.py is called against databases seeded at several
+sizes, with all caches cold, and must stay within a fixed number of queries
+that does not grow with the data. A failure prints the queries that ran and
+a diff against the smallest size, so an N+1 shows up as a block of repeated
+lines.
+
+What a budget can't see (results, edge cases, invalidation) is tested next
+to each module, in api/test_<module>.py; those import Seed, client_for,
+PASSWORD and SharedReplicaMixin from here.
+
+Runs on SQLite with the local-memory cache: `python manage.py test api`
+(and again with DATABASE_REPLICA_URL=sqlite:////tmp/replica.sqlite3 to
+exercise the replica routing).
+"""
+import difflib
+import io
+import re
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from PIL import Image
+from rest_framework.test import APIClient # pyright: ignore[reportMissingImports]
+
+from . import analysis, authentication, grading, leaderboard, recommend, routing, sampling, sessions, stats
+from .models import Quiz, Question, Option, QuizAttempt, AttemptAnswer
+from .serializers import MyTokenObtainPairSerializer
+
+
+SIZES = (1, 4, 12)
+PASSWORD = 'correct-horse'
+
+# Cold-cache budget per endpoint (authentication included)
+BUDGETS = {
+    'register': 3,
+    'login': 1,
+    'token_refresh': 1,
+    'profile_get': 1,
+    'profile_update': 2,
+    'change_password': 2,
+    'delete_account': 17,
+    'password_reset': 1,
+    'password_reset_confirm': 2,
+    'quiz_list': 2,
+    'quiz_list_page': 2,
+    'quiz_list_all': 2,
+    'quiz_detail': 4,
+    'quiz_detail_pooled': 4,
+    'quiz_search': 4,
+    'quiz_start': 5,
+    'quiz_submit': 14,
+    'quiz_submit_session': 16,
+    'quiz_submit_pooled': 14,
+    'submit_batch': 18,
+    'attempt_review': 6,
+    'quiz_analysis': 4,
+    'leaderboard': 2,
+    'leaderboard_rank': 6,
+    'history': 2,
+    'history_page': 2,
+    'history_all': 2,
+    'user_stats': 2,
+    'recommendations': 3,
+    'avatar_get': 2,
+    'avatar_update': 4,
+    'metrics': 1,
+}
+
+
+class Seed:
+    """
+    n users, n quizzes of n questions (3 options each), n attempts per user.
+    With `pool`, the last quiz serves half of its questions per attempt;
+    with `session`, `me` has an open session on it; with `stored_key`, `me`'s
+    attempt on it was batch-submitted under the key 'stored'.
+    """
+
+    def __init__(self, n, item_stats=False, pool=False, session=False, stored_key=False):
+        hashed = make_password(PASSWORD)
+        self.me = User.objects.create_user('me', 'me@example.com', PASSWORD, is_staff=True)
+        others = User.objects.bulk_create([
+            User(username=f'user{i}', email=f'user{i}@example.com', password=hashed)
+            for i in range(n)
+        ])
+        users = [self.me] + others
+
+        quizzes = Quiz.objects.bulk_create([
+            Quiz(title=f'Quiz {i}', description='...', difficulty='Easy') for i in range(n)
+        ])
+        questions = Question.objects.bulk_create([
+            Question(quiz=quiz, text=f'Question {j}') for quiz in quizzes for j in range(n)
+        ])
+        options = Option.objects.bulk_create([
+            Option(question=question, text=f'Option {k}', is_correct=k == 0)
+            for question in questions for k in range(3)
+        ])
+        self.quiz = quizzes[-1]
+        if pool:
+            Quiz.objects.filter(pk=self.quiz.pk).update(sample_size=max(1, n // 2), shuffle_options=True)
+        self.answers = {
+            str(option.question_id): option.id
+            for option in options if option.is_correct and option.question.quiz_id == self.quiz.id
+        }
+
+        by_quiz = {}
+        for question in questions:
+            by_quiz.setdefault(question.quiz_id, []).append(question)
+        settled = timezone.now() - timedelta(seconds=analysis.SETTLE_SECONDS * 2)
+        attempts = QuizAttempt.objects.bulk_create([
+            QuizAttempt(
+                user=user, quiz=quiz, score=(i + j) % (n + 1), total_questions=n,
+                percentage=stats.percentage((i + j) % (n + 1), n), completed_at=settled, inserted_at=settled,
+            )
+            for i, user in enumerate(users) for j, quiz in enumerate(quizzes)
+        ])
+        self.attempt = next(a for a in attempts if a.user_id == self.me.id and a.quiz_id == self.quiz.id)
+        AttemptAnswer.objects.bulk_create([
+            AttemptAnswer(attempt=attempt, question=question, is_correct=True)
+            for attempt in attempts for question in by_quiz[attempt.quiz_id]
+        ])
+        leaderboard.rebuild()
+        stats.rebuild()
+        recommend.rebuild()
+        if item_stats:
+            analysis.rebuild()
+        if stored_key:
+            QuizAttempt.objects.filter(user=self.me, quiz=self.quiz).update(client_key='stored')
+        if session:
+            self.session, _ = sessions.start(self.me, grading.get_answer_key(self.quiz.pk))
+
+
+def client_for(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(user).access_token}')
+    return client
+
+
+def _normalize(sql):
+    sql = re.sub(r"'[^']*'", '?', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+    return re.sub(r'\((?:\?, )+\?\)', '(?...)', sql)
+
+
+class SharedReplicaMixin:
+    """
+    With DATABASE_REPLICA_URL set, the replica is a test mirror: a second
+    connection that can't see the test's open transaction. Share the default
+    one instead, so replica reads see the data (and count in budgets).
+    """
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.replica = connections[routing.REPLICA_DB_ALIAS] if routing.replica_configured() else None
+        if cls.replica is not None:
+            connections[routing.REPLICA_DB_ALIAS] = connection
+            routing.replica_available() # the periodic lag probe, out of the way of the budgets
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.replica is not None:
+            connections[routing.REPLICA_DB_ALIAS] = cls.replica
+        super().tearDownClass()
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    QUIZ_SUBMIT_MODE='sync',
+    JWT_STATELESS_READS=False,
+    REPLICA_CHECK_SECONDS=3600,
+)
+class QueryBudgetTests(SharedReplicaMixin, TestCase):
+
+    def measure(self, name, call, status=200, **seed_options):
+        """
+        Seed each size inside a rolled-back savepoint, run `call(client, seed)`
+        with cold caches and check the query count against BUDGETS[name].
+        """
+        budget = BUDGETS[name]
+        runs = {}
+        for size in SIZES:
+            with transaction.atomic():
+                seed = Seed(size, **seed_options)
+                client = APIClient()
+                client.credentials(
+                    HTTP_AUTHORIZATION=f'Bearer {MyTokenObtainPairSerializer.get_token(seed.me).access_token}'
+                )
+                cache.clear()
+                grading.clear_local_cache()
+                authentication.clear_local_cache()
+                with CaptureQueriesContext(connection) as context:
+                    response = call(client, seed)
+                self.assertEqual(response.status_code, status, f"{name} at size {size}: {response.content[:300]!r}")
+                runs[size] = [query['sql'] for query in context.captured_queries]
+                transaction.set_rollback(True)
+
+        smallest = SIZES[0]
+        for size, queries in runs.items():
+            if len(queries) <= budget and len(queries) == len(runs[smallest]):
+                continue
+            listing = '\n'.join(f'{index}. {sql}' for index, sql in enumerate(queries, 1))
+            diff = '\n'.join(difflib.unified_diff(
+                [_normalize(sql) for sql in runs[smallest]], [_normalize(sql) for sql in queries],
+                f'size {smallest}', f'size {size}', lineterm='',
+            ))
+            self.fail(
+                f"{name}: {len(queries)} queries at size {size} "
+                f"(budget {budget}, {len(runs[smallest])} at size {smallest})\n\n"
+                f"{listing}\n\n{diff or '(same queries as the smallest size)'}"
+            )
+
+    # --- Auth ---
+    def test_register(self):
+        self.measure('register', lambda client, seed: client.post(
+            reverse('register'), {'username': 'newbie', 'email': 'new@example.com', 'password': PASSWORD},
+            format='json',
+        ), status=201)
+
+    def test_login(self):
+        self.measure('login', lambda client, seed: client.post(
+            reverse('token_obtain_pair'), {'username': 'me', 'password': PASSWORD}, format='json',
+        ))
+
+    def test_token_refresh(self):
+        self.measure('token_refresh', lambda client, seed: client.post(
+            reverse('token_refresh'),
+            {'refresh': str(MyTokenObtainPairSerializer.get_token(seed.me))}, format='json',
+        ))
+
+    # --- Profile & Security ---
+    def test_profile_get(self):
+        self.measure('profile_get', lambda client, seed: client.get(reverse('user-profile')))
+
+    def test_profile_update(self):
+        self.measure('profile_update', lambda client, seed: client.patch(
+            reverse('user-profile'), {'first_name': 'Me'}, format='json',
+        ))
+
+    def test_change_password(self):
+        self.measure('change_password', lambda client, seed: client.post(
+            reverse('change-password'), {'old_password': PASSWORD, 'new_password': 'battery-staple'},
+            format='json',
+        ))
+
+    def test_delete_account(self):
+        self.measure('delete_account', lambda client, seed: client.delete(reverse('delete-account')))
+
+    def test_password_reset(self):
+        self.measure('password_reset', lambda client, seed: client.post(
+            reverse('password-reset-request'), {'email': 'me@example.com'}, format='json',
+        ))
+
+    def test_password_reset_confirm(self):
+        self.measure('password_reset_confirm', lambda client, seed: client.post(
+            reverse('password-reset-confirm'),
+            {
+                'uid': urlsafe_base64_encode(force_bytes(seed.me.pk)),
+                'token': default_token_generator.make_token(seed.me),
+                'new_password': 'battery-staple',
+            },
+            format='json',
+        ))
+
+    # --- Quiz Data ---
+    def test_quiz_list(self):
+        self.measure('quiz_list', lambda client, seed: client.get(reverse('quiz-list')))
+
+    def test_quiz_list_page(self):
+        self.measure('quiz_list_page', lambda client, seed: client.get(reverse('quiz-list'), {'page_size': 5}))
+
+    def test_quiz_list_all(self):
+        self.measure('quiz_list_all', lambda client, seed: client.get(reverse('quiz-list'), {'all': 1}))
+
+    def test_quiz_detail(self):
+        self.measure('quiz_detail', lambda client, seed: client.get(reverse('quiz-detail', args=[seed.quiz.pk])))
+
+    def test_quiz_detail_pooled(self):
+        self.measure('quiz_detail_pooled', lambda client, seed: client.get(
+            reverse('quiz-detail', args=[seed.quiz.pk]),
+        ), pool=True)
+
+    def test_quiz_search(self):
+        # Cold: the in-process index is built (quizzes + questions), then the result rows
+        self.measure('quiz_search', lambda client, seed: client.get(reverse('quiz-search'), {'q': 'quiz question'}))
+
+    def test_quiz_submit(self):
+        self.measure('quiz_submit', lambda client, seed: client.post(
+            reverse('quiz-submit', args=[seed.quiz.pk]), {'answers': seed.answers}, format='json',
+        ))
+
+    def test_quiz_start(self):
+        self.measure('quiz_start', lambda client, seed: client.post(
+            reverse('quiz-start', args=[seed.quiz.pk]),
+        ), status=201, pool=True)
+
+    def test_quiz_submit_session(self):
+        # Cold cache: the session is read back from its row
+        self.measure('quiz_submit_session', lambda client, seed: client.post(
+            reverse('quiz-submit', args=[seed.quiz.pk]),
+            {'answers': seed.answers, 'session': str(seed.session.pk)}, format='json',
+        ), pool=True, session=True)
+
+    def test_quiz_submit_pooled(self):
+        self.measure('quiz_submit_pooled', lambda client, seed: client.post(
+            reverse('quiz-submit', args=[seed.quiz.pk]),
+            {'answers': seed.answers, 'attempt': sampling.attempt_token(seed.quiz.pk, sampling.new_seed())},
+            format='json',
+        ), pool=True)
+
+    def test_submit_batch(self):
+        # n offline results, plus a retry of one that is already stored
+        self.measure('submit_batch', lambda client, seed: client.post(reverse('submit-batch'), {'submissions': [
+            {'key': f'offline-{i}', 'quiz_id': seed.quiz.pk, 'answers': seed.answers,
+             'client_timestamp': '2026-10-01T12:00:00Z'}
+            for i in range(len(seed.answers))
+        ] + [{'key': 'stored', 'quiz_id': seed.quiz.pk, 'answers': {}}]}, format='json'), stored_key=True)
+
+    def test_attempt_review(self):
+        self.measure('attempt_review', lambda client, seed: client.get(
+            reverse('attempt-review', args=[seed.attempt.pk]),
+        ))
+
+    def test_quiz_analysis(self):
+        self.measure('quiz_analysis', lambda client, seed: client.get(
+            reverse('quiz-analysis', args=[seed.quiz.pk]),
+        ), item_stats=True)
+
+    # --- Analytics ---
+    def test_leaderboard(self):
+        self.measure('leaderboard', lambda client, seed: client.get(reverse('leaderboard')))
+
+    def test_leaderboard_rank(self):
+        self.measure('leaderboard_rank', lambda client, seed: client.get(reverse('leaderboard-rank')))
+
+    def test_history(self):
+        self.measure('history', lambda client, seed: client.get(reverse('user-history')))
+
+    def test_history_page(self):
+        self.measure('history_page', lambda client, seed: client.get(reverse('user-history'), {'page_size': 5}))
+
+    def test_history_all(self):
+        self.measure('history_all', lambda client, seed: client.get(reverse('user-history'), {'all': 1}))
+
+    def test_user_stats(self):
+        self.measure('user_stats', lambda client, seed: client.get(reverse('user-stats')))
+
+    def test_recommendations(self):
+        # Cold: the user's matrix row and the catalog summary
+        self.measure('recommendations', lambda client, seed: client.get(reverse('recommendations')))
+
+    def test_avatar_get(self):
+        self.measure('avatar_get', lambda client, seed: client.get(reverse('user-avatar')))
+
+    def test_avatar_update(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+
+        def upload(client, seed):
+            buffer = io.BytesIO()
+            Image.new('RGB', (300, 200), 'red').save(buffer, 'PNG')
+            return client.patch(
+                reverse('user-avatar'),
+                {'avatar': SimpleUploadedFile('me.png', buffer.getvalue(), 'image/png')},
+                format='multipart',
+            )
+
+        with override_settings(MEDIA_ROOT=media, AVATAR_ASYNC_PROCESSING=False):
+            self.measure('avatar_update', upload)
+
+    # --- Operations ---
+    def test_metrics(self):
+        self.measure('metrics', lambda client, seed: client.get(reverse('metrics')))
@@ -0,0 +1,152 @@
+"""
+Rate limiting for the expensive anonymous endpoints (login, register, password
+reset) and for quiz submission.
+
+Each view names a `throttle_scope`; budgets are set per scope and per key
+kind in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']:
+
+    'login.ip':   '20/min'   - per client IP
+    'login.user': '5/min'    - per target account (username / email field)
+                               or per authenticated user
+
+A rate 'N/period' is a bucket of N requests refilled over `period`. The
+refill is approximated with two fixed-window counters (current and previous
+window, the previous one weighted by how much of it still overlaps), so
+every check is an atomic cache.incr() plus one get - safe across processes
+with Redis, and LocMemCache stands in for tests / single-process runs.
+
+Throttles run in APIView.initial(), before the serializer (and so before any
+password hashing) or the view touches the database. Allowed / rejected
+counts per budget ('login.ip', ...) are kept in the cache, see
+`python manage.py throttle_stats`.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings # pyright: ignore[reportMissingImports]
+from rest_framework.throttling import BaseThrottle # pyright: ignore[reportMissingImports]
+
+
+BUCKET_KEY = 'throttle:{scope}:{kind}:{ident}:{window}'
+METRIC_KEY = 'throttle-metrics:{budget}:{outcome}'
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def _cache():
+    return caches[getattr(settings, 'THROTTLE_CACHE', 'default')]
+
+
+def parse_rate(rate):
+    """'20/min' -> (20, 60). None disables the throttle."""
+    if not rate:
+        return None
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def _incr(cache, key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError: # missing (new window or evicted)
+        if cache.add(key, 1, timeout=timeout):
+            return 1
+        return cache.incr(key)
+
+
+def record(budget, outcome):
+    _incr(_cache(), METRIC_KEY.format(budget=budget, outcome=outcome), timeout=None)
+
+
+def metrics(budgets):
+    """{budget: {'allowed': n, 'rejected': n}} for the given budgets ('login.ip', ...)."""
+    keys = {
+        METRIC_KEY.format(budget=budget, outcome=outcome): (budget, outcome)
+        for budget in budgets for outcome in ('allowed', 'rejected')
+    }
+    found = _cache().get_many(list(keys))
+    result = {budget: {'allowed': 0, 'rejected': 0} for budget in budgets}
+    for key, (budget, outcome) in keys.items():
+        result[budget][outcome] = found.get(key, 0)
+    return result
+
+
+def reset_metrics(budgets):
+    _cache().delete_many([
+        METRIC_KEY.format(budget=budget, outcome=outcome)
+        for budget in budgets for outcome in ('allowed', 'rejected')
+    ])
+
+
+def configured_budgets():
+    return sorted(api_settings.DEFAULT_THROTTLE_RATES or {})
+
+
+class BucketThrottle(BaseThrottle):
+    kind = None
+
+    def get_ident_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        budget = f'{scope}.{self.kind}'
+        rate = parse_rate((api_settings.DEFAULT_THROTTLE_RATES or {}).get(budget))
+        if scope is None or rate is None:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+
+        capacity, period = rate
+        now = time.time()
+        window, into = divmod(now, period)
+        window = int(window)
+        key = BUCKET_KEY.format(scope=scope, kind=self.kind, ident=ident, window='{}')
+
+        cache = _cache()
+        # Rejected requests count too: a client that keeps hammering stays throttled
+        current = _incr(cache, key.format(window), timeout=period * 2)
+        previous = cache.get(key.format(window - 1), 0)
+        weight = 1 - into / period
+        if current + previous * weight <= capacity:
+            record(budget, 'allowed')
+            return True
+
+        record(budget, 'rejected')
+        # Until enough of the previous window has drained (or the next window starts)
+        if previous:
+            drained = (current + previous * weight - capacity) / previous * period
+            self.wait_seconds = min(drained, period - into)
+        else:
+            self.wait_seconds = period - into
+        return False
+
+    def wait(self):
+        return getattr(self, 'wait_seconds', None)
+
+
+class IPBucketThrottle(BucketThrottle):
+    kind = 'ip'
+
+    def get_ident_key(self, request, view):
+        return self.get_ident(request) # honours NUM_PROXIES / X-Forwarded-For like DRF's throttles
+
+
+class UserBucketThrottle(BucketThrottle):
+    """Per account: the authenticated user, or the account named in the request body."""
+    kind = 'user'
+
+    def get_ident_key(self, request, view):
+        user = request.user
+        if user is not None and user.is_authenticated:
+            return f'id{user.pk}'
+        field = getattr(view, 'throttle_user_field', None)
+        if field and not isinstance(request.data, dict):
+            # A JSON list/string body names no account: bucket it by client instead
+            return f'ip{self.get_ident(request)}'
+        value = request.data.get(field) if field else None
+        if not value or not isinstance(value, str):
+            return None
+        return hashlib.md5(value.strip().lower().encode()).hexdigest()
@@ -3,20 +3,41 @@ from .views import (
     RegisterView, 
     QuizListView, 
     QuizDetailView, 
+    QuizSearchView,
+    QuizStartView,
     SubmitQuizView,
+    SubmitBatchView,
+    AttemptReviewView,
+    QuizAnalysisView,
     UserStatsView, 
+    RecommendationsView,
     ManageUserView, 
     MyTokenObtainPairView,
     ChangePasswordView,
     DeleteAccountView,
     LeaderboardView,
+    LeaderboardRankView,
     UserHistoryView,
     PasswordResetRequestView,
     PasswordResetConfirmView,
-    AvatarUpdateView
+    AvatarUpdateView,
+    MetricsView,
 
 )
 from rest_framework_simplejwt.views import TokenRefreshView # pyright: ignore[reportMissingImports]
+from django.conf import settings
+
+# Under ASGI, serve the read-heavy endpoints from native async views
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        AsyncQuizListView as QuizListView,
+        AsyncQuizDetailView as QuizDetailView,
+        AsyncLeaderboardView as LeaderboardView,
+        AsyncLeaderboardRankView as LeaderboardRankView,
+        AsyncUserHistoryView as UserHistoryView,
+        AsyncUserStatsView as UserStatsView,
+        AsyncAvatarView as AvatarUpdateView,
+    )
 
 urlpatterns = [
     # --- Auth ---
@@ -33,14 +54,24 @@ urlpatterns = [
 
     # --- Quiz Data ---
     path('quizzes/', QuizListView.as_view(), name='quiz-list'),
+    path('quizzes/search/', QuizSearchView.as_view(), name='quiz-search'),
     path('quizzes/<int:pk>/', QuizDetailView.as_view(), name='quiz-detail'),
+    path('quizzes/<int:pk>/start/', QuizStartView.as_view(), name='quiz-start'),
     path('quizzes/<int:pk>/submit/', SubmitQuizView.as_view(), name='quiz-submit'),
+    path('attempts/<int:pk>/review/', AttemptReviewView.as_view(), name='attempt-review'),
+    path('submissions/batch/', SubmitBatchView.as_view(), name='submit-batch'),
+    path('quizzes/<int:pk>/analysis/', QuizAnalysisView.as_view(), name='quiz-analysis'),
 
     # --- Analytics ---
     path('leaderboard/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/me/', LeaderboardRankView.as_view(), name='leaderboard-rank'),
     path('history/', UserHistoryView.as_view(), name='user-history'),
     path('user/stats/', UserStatsView.as_view(), name='user-stats'),
+    path('recommendations/', RecommendationsView.as_view(), name='recommendations'),
     path('user/avatar/', AvatarUpdateView.as_view(), name='user-avatar'),
 
+    # --- Operations (staff) ---
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+
     
 ]
\ No newline at end of file
@@ -1,5 +1,12 @@
-from .models import Quiz, QuizAttempt,UserProfile
+from .models import Quiz, QuizAttempt, UserProfile, UserStats
 from .serializers import QuizListSerializer, QuizDetailSerializer,UserSerializer,RegisterSerializer,MyTokenObtainPairSerializer, ChangePasswordSerializer
+from .grading import get_answer_key, grade
+from .content import content_etag, etag_matches, get_cached_payload, get_cached_catalog_page, get_content_version
+from .authentication import StatelessJWTAuthentication
+from .routing import ReplicaReadMixin # reads may go to the replica (api/routing.py)
+from .throttling import IPBucketThrottle, UserBucketThrottle
+from .pagination import QuizCursorPagination, HistoryCursorPagination
+from . import analysis, avatars, batch, ingest, instrumentation, leaderboard, mailer, recommend, review, sampling, search, sessions, stats, throttling
 from rest_framework import generics, permissions, status # pyright: ignore[reportMissingImports]
 from rest_framework.response import Response # pyright: ignore[reportMissingImports]
 from rest_framework.views import APIView # pyright: ignore[reportMissingImports]
@@ -7,11 +14,13 @@ from django.shortcuts import render
 from django.contrib.auth.models import User
 from rest_framework.permissions import AllowAny # pyright: ignore[reportMissingImports]
 from rest_framework_simplejwt.views import TokenObtainPairView # pyright: ignore[reportMissingImports]
-from django.db.models import Sum
+from django.db.models import Count
+from django.urls import reverse
+import os
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, force_str
-from django.core.mail import send_mail
+from django.utils.http import urlsafe_base64_decode
+from django.utils.encoding import force_str
 from rest_framework.parsers import MultiPartParser, FormParser #  pyright: ignore[reportMissingImports]
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -24,80 +33,246 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (AllowAny,) # Allow anyone to register
+    authentication_classes = ()
+    throttle_classes = [IPBucketThrottle]
+    throttle_scope = 'register'
     serializer_class = RegisterSerializer
 
 # 1. List All Quizzes
-class QuizListView(generics.ListAPIView):
-    queryset = Quiz.objects.all()
+class QuizListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = QuizListSerializer
+    pagination_class = QuizCursorPagination # 20 per page (max 100); ?all=1 for the full list
     permission_classes = [permissions.IsAuthenticated] # User must be logged in
+    authentication_classes = [StatelessJWTAuthentication] # read-only
+
+    def get_queryset(self):
+        # Count questions in the main query instead of one COUNT per quiz;
+        # plain .values() rows (created_at is only there for the page cursor)
+        queryset = (
+            Quiz.objects
+            .annotate(questions_count=Count('questions'))
+            .order_by('created_at', 'id')
+            .values(*QuizListSerializer.Meta.fields, 'created_at')
+        )
+        difficulty = self.request.query_params.get('difficulty')
+        if difficulty:
+            queryset = queryset.filter(difficulty=difficulty)
+        return queryset
+
+    def build_page(self):
+        # Same output as QuizListSerializer, without its per-field machinery
+        fields = QuizListSerializer.Meta.fields
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        data = [{name: row[name] for name in fields} for row in rows]
+        if page is not None:
+            return self.get_paginated_response(data).data
+        return data
+
+    def list(self, request, *args, **kwargs):
+        # Rendered pages are cached until any quiz/question changes
+        return Response(get_cached_catalog_page(request.build_absolute_uri(), self.build_page))
 
 # 2. Get Single Quiz Details
-class QuizDetailView(generics.RetrieveAPIView):
+class QuizDetailView(ReplicaReadMixin, generics.RetrieveAPIView):
     queryset = Quiz.objects.all()
-    serializer_class = QuizDetailSerializer
+    serializer_class = QuizDetailSerializer # payload shape; built from the answer key below
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [StatelessJWTAuthentication] # read-only
+
+    def retrieve(self, request, *args, **kwargs):
+        quiz_id = self.kwargs['pk']
+
+        # Client already has the current version -> 304 without touching the DB
+        etag = content_etag(quiz_id, get_content_version(quiz_id))
+        if etag_matches(etag, request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        # The answer key already holds every question and option (3 queries cold)
+        answer_key = get_answer_key(quiz_id)
+        if answer_key is None:
+            return Response({"detail": "No Quiz matches the given query."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Question pool / shuffled options: a fresh draw (and attempt token) per request
+        if answer_key.randomized:
+            data = sampling.detail_payload(answer_key, seed=sampling.new_seed())
+            return Response(data, headers={'Cache-Control': 'private, no-store'})
 
-# 3. Submit Quiz Score
+        etag, data = get_cached_payload('detail', quiz_id, lambda: sampling.detail_payload(answer_key))
+        return Response(data, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
+
+# 3. Start a Timed Session (optional unless settings.QUIZ_REQUIRE_SESSION, see api/sessions.py)
+class QuizStartView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [IPBucketThrottle, UserBucketThrottle]
+    throttle_scope = 'start'
+
+    def post(self, request, pk):
+        answer_key = get_answer_key(pk)
+        if answer_key is None:
+            return Response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        session, questions = sessions.start(request.user, answer_key)
+        return Response({
+            "session": session.pk,
+            "deadline": session.deadline,
+            "id": answer_key.quiz_id,
+            "title": answer_key.title,
+            "time_minutes": answer_key.time_minutes,
+            "questions": sampling.questions_payload(questions),
+        }, status=status.HTTP_201_CREATED)
+
+# 4. Submit Quiz Score
 # backend/api/views.py
 
 class SubmitQuizView(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [IPBucketThrottle, UserBucketThrottle]
+    throttle_scope = 'submit'
 
     def post(self, request, pk):
-        try:
-            quiz = Quiz.objects.get(pk=pk)
-        except Quiz.DoesNotExist:
+        # 1. Load the (cached) answer key - no per-question queries
+        answer_key = get_answer_key(pk)
+        if answer_key is None:
             return Response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # 1. Get the answers user sent: { "question_id": option_id }
-        user_answers = request.data.get('answers', {}) 
-        
-        score = 0
-        total_questions = quiz.questions.count()
-        review_data = [] # We will send this back so user can review what they got wrong
-
-        # 2. Grade the Quiz Server-Side
-        for question in quiz.questions.all():
-            # Get the option ID the user selected for this question
-            selected_option_id = user_answers.get(str(question.id))
-            
-            # Find the actual correct option in DB
-            correct_option = question.options.filter(is_correct=True).first()
-            
-            is_correct = False
-            if selected_option_id and correct_option:
-                # Compare IDs (Convert to string just in case)
-                if str(selected_option_id) == str(correct_option.id):
-                    score += 1
-                    is_correct = True
-            
-            # 3. Prepare Review Data (Safe to send now because quiz is over)
-            review_data.append({
-                "question_id": question.id,
-                "question_text": question.text,
-                "user_selected_id": int(selected_option_id) if selected_option_id else None,
-                "correct_option_id": correct_option.id if correct_option else None,
-                "is_correct": is_correct,
-                "options": [
-                    {"id": opt.id, "text": opt.text} for opt in question.options.all()
-                ]
-            })
-
-        # 4. Save the Attempt to History
-        QuizAttempt.objects.create(user=request.user, quiz=quiz, score=score)
-
-        # 5. Return Results
-        return Response({
+        # 2. Get the answers user sent: { "question_id": option_id }
+        user_answers = request.data.get('answers', {})
+
+        # Timed session (late / repeated submits are rejected) or question pool
+        # draw: grade only the questions this attempt was served
+        try:
+            questions = sessions.questions_for_submit(answer_key, request.user, request.data)
+        except sessions.SessionError as exc:
+            return Response({"error": str(exc)}, status=exc.status)
+
+        # 3. Grade the Quiz Server-Side (review_data is safe to send now because quiz is over)
+        score, review_data = grade(answer_key, user_answers, questions)
+        total_questions = len(review_data)
+        percentage = stats.percentage(score, total_questions)
+
+        # 4. Save the Attempt to History (directly, or via the outbox - see api/ingest.py)
+        attempt = ingest.submit_attempt(request.user, pk, score, total_questions, percentage, review_data)
+
+        # 5. Return Results - the score only; the review is fetched separately
+        # (AttemptReviewView) unless asked for with ?review=full
+        result = {
             "score": score,
             "total": total_questions,
-            "percentage": (score / total_questions) * 100 if total_questions > 0 else 0,
-            "review_data": review_data
-        }, status=status.HTTP_200_OK)
+            "percentage": percentage,
+        }
+        if attempt is not None:
+            result["attempt_id"] = attempt.id
+            result["review_url"] = request.build_absolute_uri(reverse('attempt-review', args=[attempt.id]))
+        if attempt is None or request.query_params.get('review') == 'full':
+            # Outbox mode has no attempt to point to yet
+            result["review_data"] = review_data
+        return Response(result, status=status.HTTP_200_OK)
+
+
+# 5. Attempt Review (rebuilt from stored answers + cached quiz content, see api/review.py)
+class AttemptReviewView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [StatelessJWTAuthentication] # read-only
+
+    def get(self, request, pk):
+        attempt = (
+            QuizAttempt.objects
+            .filter(pk=pk, user=request.user)
+            .values('quiz_id', 'score', 'total_questions', 'percentage')
+            .first()
+        )
+        if attempt is None:
+            return Response({"error": "Attempt not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        quiz_id = attempt['quiz_id']
+        etag = content_etag(quiz_id, get_content_version(quiz_id), attempt_id=pk)
+        if etag_matches(etag, request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        etag, data = get_cached_payload(
+            f'review-{pk}', quiz_id, lambda: review.build(pk, attempt), attempt_id=pk,
+        )
+        return Response(data, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
+
+
+# 6. Batch Submit (offline / mobile clients replaying queued results, see api/batch.py)
+class SubmitBatchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [IPBucketThrottle, UserBucketThrottle]
+    throttle_scope = 'submit_batch'
+
+    def post(self, request):
+        submissions = request.data.get('submissions')
+        if not isinstance(submissions, list) or not submissions:
+            return Response({"error": "submissions must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(submissions) > settings.QUIZ_BATCH_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {settings.QUIZ_BATCH_MAX_ITEMS} submissions per batch"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response({"results": batch.submit_batch(request.user, submissions)}, status=status.HTTP_200_OK)
+
+
+# 7. Item Analysis (staff only) - filled in by `manage.py update_item_analysis`
+class QuizAnalysisView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, pk):
+        if not Quiz.objects.filter(pk=pk).exists():
+            return Response({"error": "Quiz not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(analysis.quiz_report(pk))
+
+
+# 8. Catalog Search (titles, descriptions, question text - see api/search.py)
+class QuizSearchView(ReplicaReadMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [StatelessJWTAuthentication] # read-only
+    throttle_classes = [IPBucketThrottle, UserBucketThrottle]
+    throttle_scope = 'search'
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query or len(query) > search.MAX_QUERY_LENGTH:
+            return Response(
+                {"error": f"q must be 1-{search.MAX_QUERY_LENGTH} characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= search.MAX_RESULTS:
+            return Response(
+                {"error": f"limit must be between 1 and {search.MAX_RESULTS}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(search.search(query, limit))
+
+
+# 9. Request Metrics (staff only) - this worker process's histograms, see api/instrumentation.py
+class MetricsView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            "pid": os.getpid(),
+            "routes": instrumentation.histograms.snapshot(),
+            "throttles": throttling.metrics(throttling.configured_budgets()),
+        })
+
+    def delete(self, request):
+        instrumentation.histograms.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
+    # Checked before the serializer runs, so a rejected attempt never hashes a password
+    throttle_classes = [IPBucketThrottle, UserBucketThrottle]
+    throttle_scope = 'login'
+    throttle_user_field = 'username'
 
 
 
@@ -127,93 +302,102 @@ class DeleteAccountView(APIView):
 
 
 
-class LeaderboardView(APIView):
+class LeaderboardView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [StatelessJWTAuthentication] # read-only
 
     def get(self, request):
-        # 1. Group by User and Sum their scores
-        leaders = (
-            QuizAttempt.objects
-            .values('user__username', 'user__first_name', 'user__last_name')
-            .annotate(total_score=Sum('score'))
-            .order_by('-total_score')[:10] # Top 10 only
-        )
+        # Totals are maintained incrementally (api/leaderboard.py),
+        # ?period=week or ?quiz=<id> picks another board
+        try:
+            board = leaderboard.resolve_board(request.query_params)
+        except ValueError:
+            return Response({"error": "Invalid quiz id"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 2. Add Rank to the data
-        data = []
-        for index, entry in enumerate(leaders):
-            data.append({
-                "rank": index + 1,
-                "username": entry['user__username'],
-                "name": f"{entry['user__first_name']} {entry['user__last_name']}".strip() or entry['user__username'],
-                "score": entry['total_score']
-            })
+        return Response(leaderboard.top(board, limit=10)) # Top 10 only
 
-        return Response(data)
-    
 
+class LeaderboardRankView(ReplicaReadMixin, APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [StatelessJWTAuthentication] # read-only
 
+    def get(self, request):
+        # The caller's own rank plus the players right above / below
+        try:
+            board = leaderboard.resolve_board(request.query_params)
+        except ValueError:
+            return Response({"error": "Invalid quiz id"}, status=status.HTTP_400_BAD_REQUEST)
 
-class UserHistoryView(APIView):
+        return Response(leaderboard.rank_of(board, request.user))
+
+
+
+
+class UserHistoryView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [StatelessJWTAuthentication] # read-only
 
     def get(self, request):
-        # Get all attempts for this user, newest first
-        attempts = QuizAttempt.objects.filter(user=request.user).order_by('-completed_at')
-        
-        data = []
-        for attempt in attempts:
-            total_questions = attempt.quiz.questions.count()
-            percentage = (attempt.score / total_questions * 100) if total_questions > 0 else 0
-            
-            data.append({
-                "id": attempt.id,
-                "quiz_title": attempt.quiz.title,
-                "score": attempt.score,
-                "total_questions": total_questions,
-                "percentage": round(percentage),
-                "date": attempt.completed_at,
-                "status": "Passed" if percentage >= 60 else "Failed" # Define your passing logic here
-            })
-            
+        # Newest first; totals were snapshotted at submit time and the quiz
+        # title comes from the same query, so any page is a single query
+        attempts = (
+            QuizAttempt.objects
+            .filter(user=request.user)
+            .values('id', 'quiz__title', 'score', 'total_questions', 'percentage', 'completed_at')
+        )
+
+        paginator = HistoryCursorPagination()
+        if paginator.wants_full_list(request.query_params):
+            page = None
+            rows = ingest.pending_history(request.user) + list(attempts.order_by(*paginator.ordering))
+        else:
+            # Read-your-writes: results still waiting in the outbox go on top of the
+            # first page and count towards its size (at least one stored row stays,
+            # so the page keeps its cursor; the outbox drains within seconds)
+            pending = []
+            if paginator.cursor_query_param not in request.query_params:
+                pending = ingest.pending_history(request.user, limit=paginator.get_page_size(request) - 1)
+            paginator.reserved = len(pending)
+            page = paginator.paginate_queryset(attempts, request, view=self)
+            rows = pending + page
+
+        data = [
+            {
+                "id": attempt['id'],
+                "quiz_title": attempt['quiz__title'],
+                "score": attempt['score'],
+                "total_questions": attempt['total_questions'],
+                "percentage": round(attempt['percentage']),
+                "date": attempt['completed_at'],
+                "status": "Passed" if attempt['percentage'] >= stats.PASS_PERCENTAGE else "Failed"
+            }
+            for attempt in rows
+        ]
+
+        if page is not None:
+            return paginator.get_paginated_response(data)
         return Response(data)
 
 
 
-class UserStatsView(APIView):
+class UserStatsView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [StatelessJWTAuthentication] # read-only
 
     def get(self, request):
-        user = request.user
-        attempts = QuizAttempt.objects.filter(user=user)
+        # Running totals are kept up to date on submit (api/stats.py),
+        # so this is a single-row read however many attempts the user has
+        user_stats = UserStats.objects.filter(user=request.user).first()
+        return Response(stats.as_dict(user_stats))
 
-        total_quizzes = attempts.count()
-        
-        # Calculate Average % and Passed Count manually
-        total_percentage = 0
-        passed_count = 0
-        valid_attempts = 0
-
-        for attempt in attempts:
-            # We need the total questions to calculate percentage for this specific quiz
-            question_count = attempt.quiz.questions.count()
-            
-            if question_count > 0:
-                percentage = (attempt.score / question_count) * 100
-                total_percentage += percentage
-                valid_attempts += 1
-                
-                # Check if passed (Assuming 60% is passing)
-                if percentage >= 60:
-                    passed_count += 1
-
-        avg_score = (total_percentage / valid_attempts) if valid_attempts > 0 else 0
 
-        return Response({
-            "total_quizzes": total_quizzes,
-            "average_score": round(avg_score), # Returns 85 instead of 8.5
-            "passed_quizzes": passed_count
-        })
+class RecommendationsView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [StatelessJWTAuthentication] # read-only
+
+    def get(self, request):
+        # Cached per user, built from the precomputed score matrix (api/recommend.py)
+        return Response(recommend.recommendations(request.user))
     
 
 
@@ -221,27 +405,18 @@ class UserStatsView(APIView):
 # 1. Request Password Reset Link
 class PasswordResetRequestView(APIView):
     permission_classes = [AllowAny] # Anyone can ask for a reset
+    authentication_classes = ()
+    throttle_classes = [IPBucketThrottle, UserBucketThrottle]
+    throttle_scope = 'password_reset'
+    throttle_user_field = 'email'
 
     def post(self, request):
-        email = request.data.get('email')
-        user = User.objects.filter(email=email).first()
-
-        if user:
-            # Generate Token & ID
-            token = default_token_generator.make_token(user)
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            
-            # Create the Reset Link (Point to your React App)
-            reset_link = f"http://localhost:5173/reset-password?uid={uid}&token={token}"
-            
-            # Send Email (Prints to Console for now)
-            send_mail(
-                subject="Password Reset Request",
-                message=f"Click the link to reset your password: {reset_link}",
-                from_email="noreply@quizapp.com",
-                recipient_list=[email],
-                fail_silently=False,
-            )
+        email = request.data.get('email') if isinstance(request.data, dict) else None
+
+        # Queued for `manage.py send_emails`: same single write whether or not the
+        # address exists, so neither SMTP latency nor timing leaks into the response
+        if email:
+            mailer.queue_password_reset(email)
         
         # Always return 200 (Security: Don't reveal if email exists)
         return Response({"message": "If email exists, a link has been sent."}, status=status.HTTP_200_OK)
@@ -249,8 +424,11 @@ class PasswordResetRequestView(APIView):
 # 2. Confirm & Set New Password
 class PasswordResetConfirmView(APIView):
     permission_classes = [AllowAny]
+    authentication_classes = ()
 
     def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Invalid link"}, status=status.HTTP_400_BAD_REQUEST)
         uid = request.data.get('uid')
         token = request.data.get('token')
         new_password = request.data.get('new_password')
@@ -276,21 +454,36 @@ class AvatarUpdateView(APIView):
     parser_classes = (MultiPartParser, FormParser) # Allow file uploads
 
     def get(self, request):
-        # Return current avatar URL
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
-        if profile.avatar:
-            # Build full URL (e.g., http://localhost:8000/media/avatars/me.jpg)
-            return Response({"avatar": request.build_absolute_uri(profile.avatar.url)})
-        return Response({"avatar": "https://placehold.co/150"})
+        # Current avatar URLs, one per thumbnail size/format (read only, no profile write)
+        profile = (
+            UserProfile.objects
+            .filter(user=request.user)
+            .values('avatar', 'avatar_hash', 'avatar_state')
+            .first()
+        ) or {'avatar': None, 'avatar_hash': '', 'avatar_state': UserProfile.READY}
+        return Response(avatars.payload(
+            profile['avatar'], profile['avatar_hash'], request.build_absolute_uri, profile['avatar_state'],
+        ))
 
     def patch(self, request):
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
         file_obj = request.data.get('avatar')
-        
+
         if file_obj:
-            profile.avatar = file_obj
-            profile.save()
-            return Response({"message": "Avatar updated", "avatar": request.build_absolute_uri(profile.avatar.url)}, status=status.HTTP_200_OK)
+            try:
+                data, content_hash = avatars.validate(file_obj)
+                # Thumbnails are rendered in the background; URLs are known up front (content hash).
+                # A decode failure there shows up as state 'failed' on GET.
+                avatars.submit(request.user.id, data, content_hash)
+            except avatars.InvalidAvatar as exc:
+                return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+            sizes = avatars.urls_for(content_hash, request.build_absolute_uri)
+            queued = settings.AVATAR_ASYNC_PROCESSING
+            return Response({
+                "message": "Avatar updated",
+                "avatar": sizes[str(avatars.DEFAULT_SIZE)]['jpeg'],
+                "sizes": sizes,
+                "state": UserProfile.PROCESSING if queued else UserProfile.READY,
+            }, status=status.HTTP_202_ACCEPTED if queued else status.HTTP_200_OK)
         
         return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -0,0 +1,77 @@
+"""
+Compare concurrent-request throughput of the WSGI and ASGI deployments.
+
+Start the same code twice against the same database, e.g.
+
+    gunicorn quiz_backend.wsgi:application --workers 4 --bind :8000
+    QUIZ_ASYNC_VIEWS=1 uvicorn quiz_backend.asgi:application --workers 4 --port 8001
+
+then run
+
+    python benchmarks/asgi_vs_wsgi.py --token <access token> \\
+        --wsgi http://localhost:8000 --asgi http://localhost:8001
+
+Each read endpoint is hit with --concurrency parallel clients for
+--requests requests per server; requests/second and p50/p95 latency are
+printed side by side. Standard library only.
+"""
+import argparse
+import statistics
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+ENDPOINTS = [
+    '/api/quizzes/',
+    '/api/quizzes/{quiz_id}/',
+    '/api/leaderboard/',
+    '/api/history/',
+    '/api/user/stats/',
+    '/api/user/avatar/',
+]
+
+
+def _fetch(url, token):
+    request = urllib.request.Request(url, headers={'Authorization': f'Bearer {token}'})
+    started = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def run(base_url, path, token, requests, concurrency):
+    url = base_url.rstrip('/') + path
+    _fetch(url, token) # warm caches / connections
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = sorted(pool.map(lambda _: _fetch(url, token), range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': requests / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--wsgi', required=True, help="Base URL of the WSGI server")
+    parser.add_argument('--asgi', required=True, help="Base URL of the ASGI server")
+    parser.add_argument('--token', required=True, help="JWT access token")
+    parser.add_argument('--quiz-id', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':28} {'WSGI req/s':>11} {'p50 ms':>8} {'p95 ms':>8} | {'ASGI req/s':>11} {'p50 ms':>8} {'p95 ms':>8}")
+    for template in ENDPOINTS:
+        path = template.format(quiz_id=args.quiz_id)
+        wsgi = run(args.wsgi, path, args.token, args.requests, args.concurrency)
+        asgi = run(args.asgi, path, args.token, args.requests, args.concurrency)
+        print(f"{path:28} {wsgi['rps']:11.1f} {wsgi['p50']:8.1f} {wsgi['p95']:8.1f} | "
+              f"{asgi['rps']:11.1f} {asgi['p50']:8.1f} {asgi['p95']:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Compare the two ways of producing quiz payloads:
+
+    drf   - QuizDetailSerializer / QuizListSerializer over model instances,
+            rendered by DRF's JSONRenderer (the original path)
+    fast  - plain dicts from the answer key / .values() rows, rendered by
+            api.renderers.FastJSONRenderer (what the views do now)
+
+For every size in --sizes a quiz with that many questions (4 options each)
+is created inside a transaction that is rolled back at the end, so any
+configured database works. The database reads happen once, outside the
+timed loop, so only serialization + rendering is measured. Before timing,
+the script checks that both paths produce the same bytes.
+
+    python benchmarks/serialization.py
+    python benchmarks/serialization.py --sizes 10 100 500 --repeat 200 --output ser.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'quiz_backend.settings')
+
+import django # noqa: E402
+
+django.setup()
+
+from django.db import transaction # noqa: E402
+from django.db.models import Count # noqa: E402
+from rest_framework.renderers import JSONRenderer # noqa: E402 # pyright: ignore[reportMissingImports]
+
+from api import renderers, sampling # noqa: E402
+from api.grading import AnswerKey # noqa: E402
+from api.models import Quiz # noqa: E402
+from api.serializers import QuizDetailSerializer, QuizListSerializer # noqa: E402
+from api.synthetic import Generator # noqa: E402
+
+
+DEFAULT_SIZES = [10, 25, 50, 100, 250, 500]
+
+
+def _time(function, repeat):
+    function() # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def bench_detail(quiz_id, repeat):
+    drf_renderer = JSONRenderer()
+    instance = Quiz.objects.prefetch_related('questions__options').get(pk=quiz_id)
+    answer_key = AnswerKey.load(quiz_id, version=0)
+
+    drf = lambda: drf_renderer.render(QuizDetailSerializer(instance).data)
+    fast = lambda: renderers.render(sampling.detail_payload(answer_key))
+    if drf() != fast():
+        raise SystemExit(f"quiz {quiz_id}: payloads differ")
+    return _time(drf, repeat), _time(fast, repeat), len(fast())
+
+
+def bench_list(repeat):
+    drf_renderer = JSONRenderer()
+    queryset = Quiz.objects.annotate(questions_count=Count('questions')).order_by('created_at', 'id')
+    instances = list(queryset)
+    rows = list(queryset.values(*QuizListSerializer.Meta.fields))
+
+    drf = lambda: drf_renderer.render(QuizListSerializer(instances, many=True).data)
+    fast = lambda: renderers.render([dict(row) for row in rows])
+    if drf() != fast():
+        raise SystemExit("quiz list: payloads differ")
+    return _time(drf, repeat), _time(fast, repeat), len(fast()), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="Questions per quiz.")
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--output', help="Also write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    results = {'orjson': renderers.orjson is not None, 'detail': [], 'list': None}
+    print(f"orjson: {'yes' if results['orjson'] else 'no (stdlib fallback)'}")
+    print(f"{'questions':>9}  {'bytes':>8}  {'drf ms':>8}  {'fast ms':>8}  {'speedup':>7}")
+    with transaction.atomic():
+        generator = Generator(seed=1, log=lambda message: None)
+        for size in args.sizes:
+            ((quiz_id, _, _),) = generator.quizzes(1, min_questions=size, max_questions=size)
+            drf_ms, fast_ms, size_bytes = bench_detail(quiz_id, args.repeat)
+            results['detail'].append({'questions': size, 'bytes': size_bytes, 'drf_ms': drf_ms, 'fast_ms': fast_ms})
+            print(f"{size:>9}  {size_bytes:>8}  {drf_ms:>8.3f}  {fast_ms:>8.3f}  {drf_ms / fast_ms:>6.1f}x")
+
+        drf_ms, fast_ms, size_bytes, count = bench_list(args.repeat)
+        results['list'] = {'quizzes': count, 'bytes': size_bytes, 'drf_ms': drf_ms, 'fast_ms': fast_ms}
+        print(f"quiz list ({count} quizzes): drf {drf_ms:.3f} ms, fast {fast_ms:.3f} ms, {drf_ms / fast_ms:.1f}x")
+        transaction.set_rollback(True)
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
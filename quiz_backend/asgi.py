@@ -5,6 +5,25 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Async deployment mode
+---------------------
+With QUIZ_ASYNC_VIEWS=1 the read-heavy endpoints (quiz list/detail,
+leaderboard, history, stats, avatar GET) are served by the native async
+views in api/async_views.py, so one worker can keep many requests waiting
+on Postgres at once. Run it under an ASGI server, e.g.:
+
+    QUIZ_ASYNC_VIEWS=1 gunicorn quiz_backend.asgi:application \\
+        -k uvicorn.workers.UvicornWorker --workers 4
+
+or without gunicorn:
+
+    QUIZ_ASYNC_VIEWS=1 uvicorn quiz_backend.asgi:application --workers 4
+
+Writes still run the regular DRF views (on a thread). Leave
+QUIZ_ASYNC_VIEWS unset for the WSGI entry point (quiz_backend/wsgi.py):
+async views behind WSGI only add overhead. To compare the two modes run
+benchmarks/asgi_vs_wsgi.py against both servers.
 """
 
 import os
@@ -7,6 +7,7 @@ Generated by 'django-admin startproject' using Django 6.0.
 from pathlib import Path
 import os
 import dj_database_url # pyright: ignore[reportMissingImports]
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -36,6 +37,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole stack (api/instrumentation.py)
+    'api.instrumentation.InstrumentationMiddleware',
+    # gzip for large JSON / text responses (api/compression.py)
+    'api.compression.CompressionMiddleware',
+    # Pins users to the primary after a write; removed when no replica is configured (api/routing.py)
+    'api.routing.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",  
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -47,6 +54,28 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request instrumentation: share of requests whose SQL is traced (Server-Timing
+# db entry, per-route query counts), and the threshold for the slow-request log
+INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('QUIZ_TRACE_SAMPLE_RATE', '1.0' if 'RENDER' not in os.environ else '0.1'))
+INSTRUMENTATION_WORST_QUERIES = 3
+INSTRUMENTATION_SERVER_TIMING = os.environ.get('QUIZ_SERVER_TIMING', '1') == '1'
+SLOW_REQUEST_MS = int(os.environ.get('QUIZ_SLOW_REQUEST_MS', '500'))
+
+# JSON / text responses smaller than this are sent uncompressed (api/compression.py)
+GZIP_MIN_BYTES = int(os.environ.get('QUIZ_GZIP_MIN_BYTES', '1024'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per slow request
+        'api.slow_requests': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
 ROOT_URLCONF = 'quiz_backend.urls'
 
 TEMPLATES = [
@@ -71,15 +100,83 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Serve the read endpoints from api/async_views.py (ASGI deployments only,
+# see quiz_backend/asgi.py)
+ASYNC_READ_VIEWS = os.environ.get('QUIZ_ASYNC_VIEWS') == '1'
+
+# Falls back to a local SQLite file (tests, local runs) when DATABASE_URL isn't set
+DATABASE_URL = os.environ.get('DATABASE_URL') or f"sqlite:///{BASE_DIR / 'db.sqlite3'}"
+
 DATABASES = {
     'default': dj_database_url.config(
         # Now it reads 'DATABASE_URL' from your .env file automatically
-        default=os.environ.get('DATABASE_URL'),
-        conn_max_age=600,
-        ssl_require=True
+        default=DATABASE_URL,
+        # Persistent connections don't mix with async views (each request may
+        # run its queries on a different thread), so only keep them under WSGI
+        conn_max_age=0 if ASYNC_READ_VIEWS else 600,
+        # sslmode is a Postgres option; SQLite rejects it. DATABASE_SSL_REQUIRE=0
+        # for a local Postgres container (see benchmarks/docker-compose.yml)
+        ssl_require=not DATABASE_URL.startswith('sqlite') and os.environ.get('DATABASE_SSL_REQUIRE', '1') != '0'
     )
 }
 
+# Optional read replica for the read-heavy endpoints (api/routing.py).
+# Two local SQLite files work too: DATABASE_REPLICA_URL=sqlite:///db-replica.sqlite3
+DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+if DATABASE_REPLICA_URL:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=0 if ASYNC_READ_VIEWS else 600,
+        ssl_require=not DATABASE_REPLICA_URL.startswith('sqlite') and os.environ.get('DATABASE_SSL_REQUIRE', '1') != '0',
+        test_options={'MIRROR': 'default'}, # the test runner points it at the test database
+    )
+    if DATABASES['replica']['ENGINE'].endswith('postgresql'):
+        # An unreachable replica should fail over quickly, not hang the request
+        DATABASES['replica'].setdefault('OPTIONS', {})['connect_timeout'] = 2
+
+DATABASE_ROUTERS = ['api.routing.ReplicaRouter']
+# Reads stay on the primary this long after a user writes (read-your-writes)
+REPLICA_STICKY_SECONDS = int(os.environ.get('QUIZ_REPLICA_STICKY_SECONDS', '10'))
+# A replica further behind than this is skipped until it catches up (Postgres only)
+REPLICA_MAX_LAG_SECONDS = float(os.environ.get('QUIZ_REPLICA_MAX_LAG_SECONDS', '5'))
+# How often each process re-checks the replica's lag / reachability
+REPLICA_CHECK_SECONDS = float(os.environ.get('QUIZ_REPLICA_CHECK_SECONDS', '5'))
+
+
+# Shared cache (answer keys, quiz content, auth users). Required in production
+# (REDIS_URL): cache invalidation only reaches every worker through it. Local
+# runs fall back to per-process memory.
+if 'RENDER' in os.environ and not os.environ.get('REDIS_URL'):
+    raise ImproperlyConfigured("REDIS_URL must point at a shared cache (Redis) in production")
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# 'sync' writes attempts in the submit request; 'outbox' queues them for
+# `python manage.py flush_attempts` (see api/ingest.py)
+QUIZ_SUBMIT_MODE = os.environ.get('QUIZ_SUBMIT_MODE', 'sync')
+
+# Timed sessions (api/sessions.py): with QUIZ_REQUIRE_SESSION=1 every submit
+# needs a session from /start/; submits later than the deadline plus the
+# grace period are rejected either way
+QUIZ_REQUIRE_SESSION = os.environ.get('QUIZ_REQUIRE_SESSION') == '1'
+QUIZ_SESSION_GRACE_SECONDS = int(os.environ.get('QUIZ_SESSION_GRACE_SECONDS', '30'))
+
+# Batch submissions from offline clients (api/batch.py)
+QUIZ_BATCH_MAX_ITEMS = int(os.environ.get('QUIZ_BATCH_MAX_ITEMS', '100'))
+QUIZ_BATCH_MAX_AGE_DAYS = int(os.environ.get('QUIZ_BATCH_MAX_AGE_DAYS', '30'))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     { 'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator', },
@@ -94,6 +191,8 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
 
 
 STATIC_URL = 'static/'
@@ -104,6 +203,11 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Avatar thumbnails are rendered in a background thread pool (api/avatars.py);
+# set QUIZ_AVATAR_INLINE=1 to process inside the request instead.
+AVATAR_ASYNC_PROCESSING = os.environ.get('QUIZ_AVATAR_INLINE') != '1'
+AVATAR_WORKERS = int(os.environ.get('QUIZ_AVATAR_WORKERS', '2'))
+
 
 # Allows your Frontend to talk to this Backend
 CORS_ALLOW_ALL_ORIGINS = False
@@ -115,15 +219,46 @@ CORS_ALLOWED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt's JWTAuthentication with a cached user lookup (api/authentication.py)
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Same bytes as DRF's JSONRenderer, encoded with orjson when installed (api/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Token-bucket budgets per view scope, per client IP / per account (api/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'login.ip': os.environ.get('QUIZ_THROTTLE_LOGIN_IP', '20/min'),
+        'login.user': os.environ.get('QUIZ_THROTTLE_LOGIN_USER', '5/min'),
+        'register.ip': os.environ.get('QUIZ_THROTTLE_REGISTER_IP', '10/hour'),
+        'password_reset.ip': os.environ.get('QUIZ_THROTTLE_RESET_IP', '10/hour'),
+        'password_reset.user': os.environ.get('QUIZ_THROTTLE_RESET_USER', '3/hour'),
+        'submit.ip': os.environ.get('QUIZ_THROTTLE_SUBMIT_IP', '120/min'),
+        'submit.user': os.environ.get('QUIZ_THROTTLE_SUBMIT_USER', '30/min'),
+        'start.ip': os.environ.get('QUIZ_THROTTLE_START_IP', '120/min'),
+        'start.user': os.environ.get('QUIZ_THROTTLE_START_USER', '30/min'),
+        'submit_batch.ip': os.environ.get('QUIZ_THROTTLE_BATCH_IP', '30/min'),
+        'submit_batch.user': os.environ.get('QUIZ_THROTTLE_BATCH_USER', '10/min'),
+        # Search-as-you-type sends a request per keystroke or so
+        'search.ip': os.environ.get('QUIZ_THROTTLE_SEARCH_IP', '600/min'),
+        'search.user': os.environ.get('QUIZ_THROTTLE_SEARCH_USER', '120/min'),
+    },
+    # Behind a reverse proxy set this so X-Forwarded-For is used for the client IP
+    'NUM_PROXIES': int(os.environ['QUIZ_NUM_PROXIES']) if os.environ.get('QUIZ_NUM_PROXIES') else None,
 }
+# Cache alias holding throttle buckets and shed-load counters
+THROTTLE_CACHE = 'default'
 
 from datetime import timedelta
 
+# Read-only endpoints build request.user from the token claims instead of
+# loading the User (a deactivated user keeps read access until the token expires)
+JWT_STATELESS_READS = os.environ.get('QUIZ_STATELESS_READS') == '1'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),